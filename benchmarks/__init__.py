@@ -0,0 +1 @@
+"""Benchmarks for BracketHighlighter that run with the headless Sublime API."""
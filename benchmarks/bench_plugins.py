@@ -0,0 +1,216 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+
+Benchmark the `bh_modules` plugins.
+
+Each plugin is exercised by matching at sampled pairs of a corpus document
+for which the plugin is used.  The rule callbacks (`validate`, `compare`,
+`post_match`, and `highlighting`) and the `run` of plugin commands are
+timed where they are called, so the times are for real calls with real
+arguments.  Times per call are reported for each document size along with
+how they scale from the smallest to the largest size.
+
+```
+python -m benchmarks.bench_plugins --sizes 16k,64k,256k
+python -m benchmarks.bench_plugins --save
+python -m benchmarks.bench_plugins --compare
+```
+"""
+from collections import OrderedDict
+import argparse
+import sys
+from . import corpus, harness
+
+ENTRY_POINTS = ("validate", "compare", "post_match", "highlighting")
+BASELINE = "plugins"
+TOLERANCE = 1.25
+
+# Plugin: (corpus, pair names to sample or `None` for all, settings overlay, key command plugin)
+CASES = OrderedDict(
+    [
+        ("tags", ("html", None, None, None)),
+        ("latexenvironments", ("latex", ["latexenv"], None, None)),
+        ("bashsupport", ("keywords_bash", None, None, None)),
+        ("rubykeywords", ("keywords_ruby", None, None, None)),
+        ("pyquotes", ("strings", ["py_double_quote", "py_single_quote"], None, None)),
+        ("mdcode", ("markdown", None, None, None)),
+        ("lowercase", ("erlang", None, None, None)),
+        (
+            "erlangcase",
+            (
+                "erlang", None,
+                {"user_brackets": [{"name": "erlang", "plugin_library": "bh_modules.erlangcase"}]},
+                None
+            )
+        ),
+        (
+            "swapquotes",
+            (
+                "strings", ["py_double_quote", "py_single_quote"], None,
+                {"type": ["__all__"], "command": "bh_modules.swapquotes"}
+            )
+        ),
+        (
+            "bracketremove",
+            (
+                "nested", None, None,
+                {"type": ["__all__"], "command": "bh_modules.bracketremove", "args": {"remove_indent": True}}
+            )
+        )
+    ]
+)
+
+
+def wrap_rules(core, timer):
+    """Time the plugin callbacks of the core's loaded rules."""
+
+    entries = list(core.rules.brackets)
+    for scope in core.rules.scopes:
+        entries.extend(scope["brackets"])
+    for entry in entries:
+        for attr in ENTRY_POINTS:
+            fn = getattr(entry, attr)
+            if fn is not None:
+                plugin = getattr(fn, "wrapped", fn).__module__.split(".")[-1]
+                setattr(entry, attr, timer.wrap(fn, (plugin, attr)))
+
+
+def wrap_command(core, timer, plugin):
+    """Time the `run` of the core's plugin command."""
+
+    cls = core.plugin.plugin
+    cls.run = timer.wrap(cls.run, (plugin, "run"))
+
+
+def bench_matches(doc, pairs, timer):
+    """Match at each pair with the listener's core."""
+
+    bh_core = harness.load()
+    view = harness.open_view(doc.text(), doc.syntax, [pairs[0].left[1]])
+    bh_core.bh_match(view)
+    wrap_rules(bh_core.bh_match.__self__, timer)
+    timer.clear()
+    missed = 0
+    for pair in pairs:
+        harness.move_cursors(view, [pair.left[1]])
+        bh_core.bh_match(view)
+        if harness.matched_pairs(view) != [(pair.left, pair.right)]:
+            missed += 1
+    return missed
+
+
+def bench_command(doc, pairs, timer, plugin, command):
+    """Run the key command at each pair on a fresh view of the document."""
+
+    bh_core = harness.load()
+    text = doc.text()
+    spans = harness.scope_spans(text, doc.syntax)
+    core = bh_core.get_key_core(True, False, False, False, False, {}, command)
+    wrap_command(core, timer, plugin)
+    timer.clear()
+    for pair in pairs:
+        view = harness.open_view(text, doc.syntax, [pair.left[1]], spans)
+        view.window().run_command("bh_key", {"plugin": command})
+    return 0
+
+
+def run_case(plugin, size, points, seed=0):
+    """Benchmark a plugin on a document of the size; return the stats and the number of missed matches."""
+
+    name, names, settings, command = CASES[plugin]
+    doc = corpus.generate(name, size, seed)
+    pairs = [
+        p for p in doc.sample(points * 4, seed, max_span=harness.core_settings().get("search_threshold", 5000))
+        if names is None or p.name in names
+    ][:points]
+    timer = harness.CallTimer()
+    with harness.overlay(settings or {}):
+        if command is None:
+            missed = bench_matches(doc, pairs, timer)
+        else:
+            missed = bench_command(doc, pairs, timer, plugin, command)
+    stats = OrderedDict()
+    for (owner, entry), (calls, elapsed) in sorted(timer.stats.items()):
+        if owner == plugin:
+            stats[entry] = (calls, elapsed)
+    return stats, missed
+
+
+def run(plugins, sizes, points, seed=0):
+    """Run the benchmarks; results map plugin to entry point to size to microseconds per call."""
+
+    results = OrderedDict()
+    for plugin in plugins:
+        results[plugin] = OrderedDict()
+        for size in sizes:
+            stats, missed = run_case(plugin, size, points, seed)
+            if missed:
+                print("%s %s: %d of %d matches were not the expected pair" % (plugin, size, missed, points))
+            for entry, (calls, elapsed) in stats.items():
+                results[plugin].setdefault(entry, OrderedDict())[size] = elapsed * 1e6 / calls
+    return results
+
+
+def report(results, sizes, baseline=None, tolerance=TOLERANCE):
+    """Format the results, comparing them to the baseline if given; return the text and the regressions."""
+
+    lines = ["%-18s %-13s %s %s" % ("plugin", "entry", " ".join("%10s" % s for s in sizes), "   scaling")]
+    regressions = []
+    for plugin, entries in results.items():
+        for entry, times in entries.items():
+            cells = []
+            for size in sizes:
+                us = times.get(size)
+                cell = "%8.1fus" % us if us is not None else "%10s" % "-"
+                old = ((baseline or {}).get(plugin, {}).get(entry, {})).get(size)
+                if us is not None and old:
+                    if us > old * tolerance:
+                        regressions.append((plugin, entry, size, old, us))
+                        cell += "!"
+                cells.append(cell)
+            first, last = times.get(sizes[0]), times.get(sizes[-1])
+            scaling = "%9.2fx" % (last / first) if first and last else "%10s" % "-"
+            lines.append("%-18s %-13s %s %s" % (plugin, entry, " ".join(cells), scaling))
+    for plugin, entry, size, old, new in regressions:
+        lines.append("Slower: %s.%s at %s: %.1fus -> %.1fus" % (plugin, entry, size, old, new))
+    return "\n".join(lines), regressions
+
+
+def main(argv):
+    """Run the benchmarks from the command line."""
+
+    parser = argparse.ArgumentParser(prog="bench_plugins", description="Benchmark the bh_modules plugins.")
+    parser.add_argument("--plugins", default=",".join(CASES), help="Comma separated plugins to benchmark.")
+    parser.add_argument("--sizes", default="16k,64k,256k", help="Comma separated document sizes.")
+    parser.add_argument("--points", type=int, default=50, help="Matches per document.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the documents and sampled pairs.")
+    parser.add_argument("--save", action="store_true", help="Store the results as the baseline.")
+    parser.add_argument("--compare", action="store_true", help="Compare the results against the baseline.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Slowdown allowed by --compare.")
+    args = parser.parse_args(argv)
+
+    plugins = [p for p in args.plugins.split(",") if p]
+    sizes = [s for s in args.sizes.split(",") if s]
+    for plugin in plugins:
+        if plugin not in CASES:
+            parser.error("Unknown plugin '%s'" % plugin)
+
+    results = run(plugins, sizes, args.points, args.seed)
+    baseline = harness.load_baseline(BASELINE) if args.compare else None
+    if args.compare and baseline is None:
+        print("No baseline stored; run with --save first.")
+    text, regressions = report(results, sizes, baseline, args.tolerance)
+    print(text)
+    if args.save:
+        stored = harness.load_baseline(BASELINE) or {}
+        for plugin, entries in results.items():
+            stored[plugin] = entries
+        harness.save_baseline(BASELINE, stored)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,148 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+
+Compare the regex engines the bracket rules are compiled with.
+
+For each corpus document, the rules of its language are loaded as the core
+loads them: once with every pattern compiled by `backrefs`, and once with
+the engine picked for each pattern (`bracket_standard_regex`), which
+compiles the patterns that use no `backrefs` syntax with `re` and only
+ignores case in patterns with letters.  Loading is timed with the regex
+caches cleared, and the combined bracket pattern is run over the document
+to time how fast it scans.
+
+```
+python -m benchmarks.bench_regex --size 1m
+python -m benchmarks.bench_regex --corpus keywords_ruby,erlang --repeat 10
+```
+"""
+from collections import OrderedDict
+from os.path import basename, splitext
+from time import perf_counter
+import argparse
+import re
+import sys
+from . import corpus, harness
+
+# Engine: the `standard_regex` rules are loaded with.
+ENGINES = OrderedDict([("backrefs", False), ("selected", True)])
+
+
+def load_rules(syntax, standard_regex):
+    """Load the bracket and scope rules of the syntax's language."""
+
+    harness.load()
+    from BracketHighlighter import bh_rules
+    settings = harness.core_settings()
+    rules = bh_rules.SearchRules(
+        settings.get("brackets", []) + settings.get("user_brackets", []),
+        settings.get("scope_brackets", []) + settings.get("user_scope_brackets", []),
+        "string", True, False, standard_regex=standard_regex
+    )
+    rules.load_rules(splitext(basename(syntax))[0].lower(), set())
+    return rules
+
+
+def best(fn, repeat):
+    """Get the fastest of the runs of the function in seconds, and what it returned."""
+
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn()
+        times.append(perf_counter() - start)
+    return min(times), result
+
+
+def bench_engine(doc, text, standard_regex, repeat):
+    """Time loading the rules and scanning the text with their combined pattern."""
+
+    from backrefs import bre
+
+    def load():
+        """Load the rules with nothing cached."""
+
+        re.purge()
+        bre.purge()
+        return load_rules(doc.syntax, standard_regex)
+
+    compile_time, rules = best(load, repeat)
+    if rules.pattern is None:
+        return OrderedDict([("compile", compile_time), ("scan", None), ("brackets", 0), ("ignorecase", False)])
+    pattern = rules.pattern
+    scan_time, found = best(lambda: sum(1 for m in pattern.finditer(text)), repeat)
+    return OrderedDict(
+        [
+            ("compile", compile_time),
+            ("scan", scan_time),
+            ("brackets", found),
+            ("ignorecase", bool(pattern.flags & re.IGNORECASE))
+        ]
+    )
+
+
+def run(corpora, size, repeat, seed=0):
+    """Benchmark the engines on each corpus document."""
+
+    results = OrderedDict()
+    for name in corpora:
+        doc = corpus.generate(name, size, seed)
+        text = doc.text()
+        results[name] = OrderedDict(
+            (engine, bench_engine(doc, text, standard_regex, repeat))
+            for engine, standard_regex in ENGINES.items()
+        )
+        results[name]["size"] = len(text)
+    return results
+
+
+def report(results):
+    """Format the results with the speedup of the selected engines over `backrefs`."""
+
+    lines = ["%-14s %-9s %10s %10s %10s %9s  %s" % (
+        "corpus", "engine", "compile", "scan", "MB/s", "brackets", "ignorecase"
+    )]
+    for name, engines in results.items():
+        size = engines["size"]
+        reference = engines["backrefs"]
+        for engine in ENGINES:
+            stats = engines[engine]
+            scan = stats["scan"]
+            line = "%-14s %-9s %8.2fms %10s %10s %9d  %s" % (
+                name, engine, stats["compile"] * 1000,
+                "%.2fms" % (scan * 1000) if scan is not None else "-",
+                "%.1f" % (size / scan / 1e6) if scan else "-",
+                stats["brackets"], "yes" if stats["ignorecase"] else "no"
+            )
+            if engine != "backrefs":
+                line += "  (compile x%.2f, scan x%s)" % (
+                    reference["compile"] / stats["compile"],
+                    "%.2f" % (reference["scan"] / scan) if scan else "-"
+                )
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv):
+    """Compare the engines from the command line."""
+
+    parser = argparse.ArgumentParser(prog="bench_regex", description="Compare the engines of the bracket rules.")
+    parser.add_argument("--corpus", default=",".join(corpus.GENERATORS), help="Comma separated corpus documents.")
+    parser.add_argument("--size", default="256k", help="Size of the corpus documents.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs to take the fastest of.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the documents.")
+    args = parser.parse_args(argv)
+
+    corpora = [c for c in args.corpus.split(",") if c]
+    for name in corpora:
+        if name not in corpus.GENERATORS:
+            parser.error("Unknown corpus '%s'" % name)
+    print(report(run(corpora, args.size, args.repeat, args.seed)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
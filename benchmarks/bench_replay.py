@@ -0,0 +1,314 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+
+Replay traces of listener events against the headless API.
+
+A trace is either one dumped by `bh_dump_trace` or one of the synthetic
+traces below: a key repeat walk of the cursor, a typing burst, or an edit
+with a column of cursors.  Events are fed to `BhListenerCommand` at their
+recorded times on a simulated clock; the background thread's check runs at
+its poll interval, and the matches it schedules run on the clock as well,
+taking as long as they really take.
+
+The replay reports how many matches ran for how many events, how many
+events were coalesced into a later match or never got one, the latency of
+each event from when it happened to when its match finished, and the
+throughput of the replay.
+"""
+from collections import OrderedDict
+from time import perf_counter
+import argparse
+import random
+import sys
+from . import corpus, harness
+
+KEY_REPEAT = 30.0
+TYPING_RATE = 8.0
+SETTLE = 2.0
+MATCH_EVENTS = ("on_load", "on_modified", "on_activated", "on_selection_modified")
+
+
+def make_trace(text, syntax, steps):
+    """
+    Make a trace from a starting text and a list of steps.
+
+    Each step is `(time, kind, selections, spans)` where `selections` is a
+    list of `(a, b)` and `spans` are the edits `(begin, end, text)` of an
+    `on_modified` step applied in order.
+    """
+
+    events = [["snapshot", 0.0, 1, 0, [0, 0], [syntax, text]]]
+    count = 0
+    for t, kind, sels, spans in steps:
+        data = None
+        if kind == "on_modified":
+            count += 1
+            data = [[begin, end, begin + len(insert), insert] for begin, end, insert in spans]
+        events.append([kind, round(t, 4), 1, count, [pt for sel in sels for pt in sel], data])
+    return {"version": 1, "events": len(events)}, events
+
+
+def cursor_walk(doc, steps=300, rate=KEY_REPEAT, seed=0):
+    """Walk the cursor forward one character at a time at the key repeat rate."""
+
+    start = random.Random(seed).randrange(max(1, doc.size - steps))
+    return make_trace(
+        doc.text(), doc.syntax,
+        [((i + 1) / rate, "on_selection_modified", [(start + i, start + i)], None) for i in range(steps)]
+    )
+
+
+def typing_burst(doc, chars=200, rate=TYPING_RATE, seed=0):
+    """Type a burst of code at one point; each keystroke modifies the buffer and moves the cursor."""
+
+    rand = random.Random(seed)
+    pt = rand.randrange(max(1, doc.size))
+    steps = []
+    typed = "".join(rand.choice("abc (x) [y] {z} = 1;\n") for _ in range(chars))
+    for i, char in enumerate(typed):
+        t = (i + 1) / rate
+        steps.append((t, "on_modified", [(pt + 1, pt + 1)], [(pt, pt, char)]))
+        steps.append((t, "on_selection_modified", [(pt + 1, pt + 1)], None))
+        pt += 1
+    return make_trace(doc.text(), doc.syntax, steps)
+
+
+def column_edit(doc, cursors=8, chars=40, rate=TYPING_RATE, seed=0):
+    """Type with a column of cursors, one on each of a run of lines."""
+
+    text = doc.text()
+    lines = []
+    pt = random.Random(seed).randrange(max(1, doc.size // 2))
+    pt = text.find("\n", pt) + 1
+    while len(lines) < cursors and 0 < pt < len(text):
+        lines.append(pt)
+        pt = text.find("\n", pt) + 1
+    if not lines:
+        lines.append(0)
+    steps = []
+    for i in range(chars):
+        t = (i + 1) / rate
+        # Each cursor has `i` characters typed before it on its line, and `i` more for each line above it.
+        points = [p + i * (n + 1) for n, p in enumerate(lines)]
+        spans = [(p, p, "x") for p in points]
+        steps.append((t, "on_modified", [(p + 1, p + 1) for p in points], spans))
+        steps.append((t, "on_selection_modified", [(p + 1, p + 1) for p in points], None))
+    return make_trace(text, doc.syntax, steps)
+
+
+TRACES = OrderedDict(
+    [
+        ("cursor_walk", cursor_walk),
+        ("typing_burst", typing_burst),
+        ("column_edit", column_edit)
+    ]
+)
+
+
+class Replay(object):
+    """Replay a trace on a simulated clock."""
+
+    def __init__(self, events):
+        """Setup the replay."""
+
+        self.bh_core = harness.load()
+        import sublime
+        from BracketHighlighter.bh_perf import LatencyHistogram
+
+        self.sublime = sublime
+        self.events = events
+        self.views = {}
+        self.pending = []
+        self.latency = OrderedDict()
+        self.histogram = LatencyHistogram
+        self.stats = OrderedDict(
+            [
+                ("events", 0), ("matches", 0), ("coalesced", 0), ("skipped", 0),
+                ("unreplayable", 0), ("keys", 0), ("compute", 0.0), ("wall", 0.0)
+            ]
+        )
+
+    def now(self):
+        """Get the simulated time."""
+
+        return self.sublime.clock[0]
+
+    def payload(self):
+        """Run the thread's payload, timing it and charging its time to the simulated clock."""
+
+        start = self.now()
+        compute = perf_counter()
+        self.run_payload()
+        compute = perf_counter() - compute
+        self.sublime.clock[0] += compute
+        self.stats["matches"] += 1
+        self.stats["compute"] += compute
+        for kind, t in self.pending:
+            histogram = self.latency.get(kind)
+            if histogram is None:
+                histogram = self.histogram()
+                self.latency[kind] = histogram
+            histogram.add((start - t) * 1000, compute * 1000)
+        self.stats["coalesced"] += max(0, len(self.pending) - 1)
+        self.pending = []
+
+    def advance(self, t):
+        """Advance the clock to the time, polling the thread along the way."""
+
+        while self.next_poll <= t:
+            self.sublime.advance(max(0.0, self.next_poll - self.now()))
+            self.bh_core.bh_thread.check()
+            self.sublime.advance()
+            self.next_poll += self.bh_core.THREAD_POLL
+        self.sublime.advance(max(0.0, t - self.now()))
+
+    def snapshot(self, view_id, data):
+        """Open a view for a snapshot of the buffer."""
+
+        syntax, text = data
+        if text is None:
+            self.views.pop(view_id, None)
+            return None
+        view = harness.open_view(text, syntax or "Packages/Text/Plain text.tmLanguage", [0])
+        self.views[view_id] = view
+        return view
+
+    def edit(self, view, spans):
+        """Apply the recorded edits without notifying the listeners."""
+
+        for begin, old_end, new_end, text in spans:
+            if text is None:
+                text = " " * (new_end - begin)
+            view.modify(min(begin, view.size()), min(old_end, view.size()), text, notify=False)
+
+    def select(self, view, sels):
+        """Set the recorded selections."""
+
+        view.sel().clear()
+        size = view.size()
+        for i in range(0, len(sels), 2):
+            view.sel().add(self.sublime.Region(min(sels[i], size), min(sels[i + 1], size)))
+
+    def dispatch(self, kind, view):
+        """Send an event to the listener and note it as waiting for a match."""
+
+        listener = self.listener
+        self.stats["events"] += 1
+        if listener.ignore_event(view):
+            self.stats["skipped"] += 1
+            return
+        self.pending.append((kind, self.now()))
+        getattr(listener, kind)(view)
+
+    def run(self):
+        """Replay the events and return the stats and latency histograms."""
+
+        bh_core = self.bh_core
+        sublime = self.sublime
+        window = sublime.active_window()
+        self.listener = bh_core.BhListenerCommand()
+        saved_time = bh_core.time
+        thread = bh_core.bh_thread
+        self.run_payload = thread.payload
+        thread.payload = self.payload
+        bh_core.time = self.now
+        thread.reset()
+        self.next_poll = self.now() + bh_core.THREAD_POLL
+        start = self.now()
+        wall = perf_counter()
+        try:
+            for kind, t, view_id, change_count, sels, data in self.events:
+                self.advance(start + t)
+                if kind == "snapshot":
+                    view = self.snapshot(view_id, data)
+                    if view is not None:
+                        self.select(view, sels)
+                    continue
+                view = self.views.get(view_id)
+                if view is None:
+                    self.stats["unreplayable"] += 1
+                    continue
+                window.focus_view(view)
+                if kind == "on_modified":
+                    if data is None:
+                        self.stats["unreplayable"] += 1
+                    else:
+                        self.edit(view, data)
+                self.select(view, sels)
+                if kind in MATCH_EVENTS:
+                    self.dispatch(kind, view)
+                elif kind == "key":
+                    self.stats["keys"] += 1
+                    window.run_command("bh_key")
+            self.advance(self.now() + SETTLE)
+        finally:
+            thread.payload = self.run_payload
+            bh_core.time = saved_time
+        self.stats["skipped"] += len(self.pending)
+        self.pending = []
+        self.stats["wall"] = perf_counter() - wall
+        return self.stats, self.latency
+
+
+def report(name, stats, latency):
+    """Format the replay results."""
+
+    wall = stats["wall"] or 1e-9
+    lines = [
+        "%s: %d events, %d matches, %d coalesced, %d skipped, %d unreplayable, %d key commands" % (
+            name, stats["events"], stats["matches"], stats["coalesced"], stats["skipped"],
+            stats["unreplayable"], stats["keys"]
+        ),
+        "    throughput: %.0f events/s, %.0f matches/s, %.2fms per match" % (
+            stats["events"] / wall, stats["matches"] / wall,
+            stats["compute"] * 1000 / stats["matches"] if stats["matches"] else 0.0
+        )
+    ]
+    for kind, histogram in latency.items():
+        for field, label in ((0, "total"), (1, "queued"), (2, "compute")):
+            lines.append(
+                "    %-22s %-8s %s" % (
+                    kind if field == 0 else "", label,
+                    ", ".join(
+                        "%s: %s" % (k, "%.2fms" % v if v is not None else "-")
+                        for k, v in histogram.percentiles(field).items()
+                    )
+                )
+            )
+    return "\n".join(lines)
+
+
+def main(argv):
+    """Replay a recorded trace or synthetic traces from the command line."""
+
+    parser = argparse.ArgumentParser(prog="bench_replay", description="Replay listener event traces.")
+    parser.add_argument("--trace", help="A trace dumped by bh_dump_trace.")
+    parser.add_argument("--synthetic", default=",".join(TRACES), help="Comma separated synthetic traces.")
+    parser.add_argument("--corpus", default="nested", help="Corpus document for synthetic traces.")
+    parser.add_argument("--size", default="64k", help="Size of the corpus document.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the document and traces.")
+    args = parser.parse_args(argv)
+
+    harness.load()
+    if args.trace:
+        from BracketHighlighter.bh_trace import load_trace
+        header, events = load_trace(args.trace)
+        stats, latency = Replay(events).run()
+        print(report(args.trace, stats, latency))
+        return 0
+
+    doc = corpus.generate(args.corpus, args.size, args.seed)
+    for name in [n for n in args.synthetic.split(",") if n]:
+        if name not in TRACES:
+            parser.error("Unknown trace '%s'" % name)
+        header, events = TRACES[name](doc, seed=args.seed)
+        stats, latency = Replay(events).run()
+        print(report("%s (%s %s)" % (name, args.corpus, args.size), stats, latency))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,662 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+
+Synthetic documents for benchmarking the matcher.
+
+Each generator builds a document of roughly the requested size and
+records the bracket pairs it wrote, so benchmarks can check the matches
+they time.  A document is made of segments that can repeat, so even
+documents of hundreds of megabytes only hold one block of text and
+annotations until the text is asked for.
+"""
+from collections import namedtuple, OrderedDict
+import json
+import random
+import re
+import sys
+
+BLOCK_SIZE = 64 * 1024
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 * 1024, "g": 1024 * 1024 * 1024}
+SYNTAX = {
+    "javascript": "Packages/JavaScript/JavaScript.tmLanguage",
+    "json": "Packages/JavaScript/JSON.tmLanguage",
+    "html": "Packages/HTML/HTML.tmLanguage",
+    "ruby": "Packages/Ruby/Ruby.tmLanguage",
+    "lua": "Packages/Lua/Lua.tmLanguage",
+    "bash": "Packages/ShellScript/Shell-Unix-Generic.tmLanguage",
+    "latex": "Packages/LaTeX/LaTeX.tmLanguage",
+    "markdown": "Packages/Markdown/Markdown.tmLanguage",
+    "erlang": "Packages/Erlang/Erlang.tmLanguage",
+    "python": "Packages/Python/Python.tmLanguage"
+}
+WORDS = ("alpha", "beta", "gamma", "delta", "value", "item", "node", "count", "name", "data")
+
+# `left` and `right` are `(begin, end)` of the opening and closing bracket.
+Pair = namedtuple("Pair", ["name", "left", "right"])
+Segment = namedtuple("Segment", ["offset", "text", "count", "pairs", "unmatched"])
+
+
+def parse_size(size):
+    """Parse a size such as `64k` or `256m` into characters."""
+
+    if isinstance(size, int):
+        return size
+    m = re.match(r"^\s*(\d+)\s*([kmg]?)b?\s*$", size.lower())
+    if m is None:
+        raise ValueError("Invalid size '%s'" % size)
+    return int(m.group(1)) * SIZE_UNITS[m.group(2)]
+
+
+class Document(object):
+    """A generated document and its expected pairs."""
+
+    def __init__(self, name, syntax, segments, params):
+        """Setup the document."""
+
+        self.name = name
+        self.syntax = syntax
+        self.segments = segments
+        self.params = params
+        self.size = sum(len(s.text) * s.count for s in segments)
+
+    def text(self):
+        """Get the text of the document."""
+
+        return "".join(s.text * s.count for s in self.segments)
+
+    def pairs(self):
+        """Iterate the expected pairs."""
+
+        for segment in self.segments:
+            stride = len(segment.text)
+            for rep in range(segment.count):
+                shift = rep * stride
+                for name, left, right in segment.pairs:
+                    yield Pair(name, (left[0] + shift, left[1] + shift), (right[0] + shift, right[1] + shift))
+
+    def unmatched(self):
+        """Iterate the `(begin, end)` of brackets that have no partner."""
+
+        for segment in self.segments:
+            stride = len(segment.text)
+            for rep in range(segment.count):
+                shift = rep * stride
+                for begin, end in segment.unmatched:
+                    yield (begin + shift, end + shift)
+
+    def pair_count(self):
+        """Get the number of expected pairs."""
+
+        return sum(len(s.pairs) * s.count for s in self.segments)
+
+    def sample(self, count, seed=0, max_span=None):
+        """
+        Pick expected pairs spread over the document.
+
+        Pairs are picked from the first repetition of each segment and shifted
+        to a random repetition, so this stays cheap on huge documents.
+        """
+
+        rand = random.Random(seed)
+        choices = []
+        for segment in self.segments:
+            for pair in segment.pairs:
+                if max_span is None or pair.right[1] - pair.left[0] <= max_span:
+                    choices.append((segment, pair))
+        picked = []
+        for _ in range(min(count, len(choices)) if choices else 0):
+            segment, (name, left, right) = rand.choice(choices)
+            shift = rand.randrange(segment.count) * len(segment.text)
+            picked.append(Pair(name, (left[0] + shift, left[1] + shift), (right[0] + shift, right[1] + shift)))
+        return picked
+
+    def annotations(self):
+        """Get the annotations as a JSON serializable dictionary."""
+
+        return OrderedDict(
+            [
+                ("name", self.name),
+                ("syntax", self.syntax),
+                ("size", self.size),
+                ("params", self.params),
+                ("pairs", [[p.name, p.left[0], p.left[1], p.right[0], p.right[1]] for p in self.pairs()]),
+                ("unmatched", [list(u) for u in self.unmatched()])
+            ]
+        )
+
+
+class Builder(object):
+    """
+    Build a document and record its pairs.
+
+    Text is written to the current segment; `flush` ends the segment and
+    can repeat it.  A repeated segment must not close pairs opened before it.
+    """
+
+    def __init__(self):
+        """Setup the builder."""
+
+        self.segments = []
+        self.stack = []
+        self.offset = 0
+        self.reset()
+
+    def reset(self):
+        """Start a new segment."""
+
+        self.chunks = []
+        self.length = 0
+        self.pairs = []
+        self.unmatched = []
+        self.base = len(self.stack)
+        self.crossing = False
+
+    def pos(self):
+        """Get the current position."""
+
+        return self.offset + self.length
+
+    def write(self, text):
+        """Write text."""
+
+        self.chunks.append(text)
+        self.length += len(text)
+
+    def open(self, name, text):
+        """Write an opening bracket."""
+
+        begin = self.pos()
+        self.write(text)
+        self.stack.append((name, begin, self.pos()))
+
+    def close(self, text):
+        """Write the closing bracket of the last opened bracket."""
+
+        name, begin, end = self.stack.pop()
+        if len(self.stack) < self.base:
+            self.base = len(self.stack)
+            self.crossing = True
+        start = self.pos()
+        self.write(text)
+        self.pairs.append(Pair(name, (begin, end), (start, self.pos())))
+
+    def pair(self, name, left, content, right):
+        """Write a bracket pair around plain content."""
+
+        self.open(name, left)
+        self.write(content)
+        self.close(right)
+
+    def bad(self, text):
+        """Write a bracket that has no partner."""
+
+        begin = self.pos()
+        self.write(text)
+        self.unmatched.append((begin, self.pos()))
+
+    def flush(self, count=1):
+        """End the segment, repeating it `count` times."""
+
+        if count > 1 and (self.crossing or len(self.stack) != self.base):
+            raise ValueError("A repeated segment must contain its pairs")
+        if self.chunks:
+            self.segments.append(Segment(self.offset, "".join(self.chunks), count, self.pairs, self.unmatched))
+            self.offset += self.length * count
+        self.reset()
+
+    def fill(self, unit, size, tail=0):
+        """
+        Write units until the document reaches `size`.
+
+        One block of units is written and repeated; `tail` is the
+        size reserved for text written after the block.
+        """
+
+        target = max(size - self.offset - tail, 1)
+        while self.length < min(target, BLOCK_SIZE):
+            unit()
+        self.flush(max(1, target // self.length))
+
+    def document(self, name, syntax, params):
+        """Create the document."""
+
+        self.flush()
+        if self.stack:
+            raise ValueError("Unclosed brackets")
+        return Document(name, SYNTAX[syntax], self.segments, params)
+
+
+def nested(size, seed=0, depth=32):
+    """Deeply nested round, square, and curly brackets."""
+
+    rand = random.Random(seed)
+    b = Builder()
+    brackets = (("round", "(", ")"), ("square", "[", "]"), ("curly", "{", "}"))
+
+    def unit():
+        """Write one nest."""
+
+        levels = rand.randint(1, depth)
+        for i in range(levels):
+            name, left, right = brackets[i % 3]
+            b.open(name, left)
+            b.write("%s " % rand.choice(WORDS))
+        for i in reversed(range(levels)):
+            b.write(" %d" % i)
+            b.close(brackets[i % 3][2])
+        b.write(";\n")
+
+    b.fill(unit, size)
+    return b.document("nested", "javascript", {"depth": depth})
+
+
+def minified_json(size, seed=0):
+    """A single line of JSON."""
+
+    rand = random.Random(seed)
+    b = Builder()
+
+    def string(text):
+        """Write a JSON string."""
+
+        b.pair("double_quote", '"', text, '"')
+
+    def unit():
+        """Write one object."""
+
+        b.open("curly", "{")
+        string("id")
+        b.write(":%d," % rand.randint(0, 10000))
+        string("tags")
+        b.write(":")
+        b.open("square", "[")
+        for i in range(rand.randint(1, 4)):
+            if i:
+                b.write(",")
+            string(rand.choice(WORDS))
+        b.close("]")
+        b.write(",")
+        string("pos")
+        b.write(":")
+        b.open("curly", "{")
+        string("x")
+        b.write(":%d," % rand.randint(0, 99))
+        string("y")
+        b.write(":")
+        b.pair("square", "[", "%d,%d" % (rand.randint(0, 9), rand.randint(0, 9)), "]")
+        b.close("}")
+        b.close("}")
+        b.write(",")
+
+    b.open("square", "[")
+    b.flush()
+    b.fill(unit, size, 1)
+    b.close("]")
+    return b.document("minified_json", "json", {})
+
+
+def minified_js(size, seed=0):
+    """A single line of minified JavaScript."""
+
+    rand = random.Random(seed)
+    b = Builder()
+    count = [0]
+
+    def unit():
+        """Write one function."""
+
+        count[0] += 1
+        b.write("function f%d" % count[0])
+        b.pair("round", "(", "a,b", ")")
+        b.open("curly", "{")
+        b.write("var c=")
+        b.pair("single_quote", "'", rand.choice(WORDS), "'")
+        b.write(";if")
+        b.pair("round", "(", "a>b", ")")
+        b.open("curly", "{")
+        b.write("return ")
+        b.open("square", "[")
+        b.write("a,")
+        b.open("round", "(")
+        b.write("b+%d" % rand.randint(1, 9))
+        b.close(")")
+        b.write("*2,")
+        b.open("curly", "{")
+        b.write("k:c")
+        b.close("}")
+        b.close("]")
+        b.close("}")
+        b.write("return c")
+        b.close("}")
+
+    b.fill(unit, size)
+    return b.document("minified_js", "javascript", {})
+
+
+def html(size, seed=0, optional_close=True):
+    """HTML with tags whose close is optional."""
+
+    rand = random.Random(seed)
+    b = Builder()
+
+    def tag(name, attrs=""):
+        """Open a tag."""
+
+        b.open("tag", "<%s%s>" % (name, attrs))
+
+    def end(name):
+        """Close a tag."""
+
+        b.close("</%s>" % name)
+
+    def optional(name, content):
+        """Write a tag whose close is optional."""
+
+        if optional_close:
+            b.write("<%s>%s" % (name, content))
+        else:
+            tag(name)
+            b.write(content)
+            end(name)
+
+    def unit():
+        """Write one section."""
+
+        tag("div", ' class="%s"' % rand.choice(WORDS))
+        b.write("\n")
+        tag("ul")
+        b.write("\n")
+        for _ in range(rand.randint(1, 4)):
+            optional("li", rand.choice(WORDS))
+            b.write("\n")
+        end("ul")
+        b.write("\n")
+        optional("p", "Some ")
+        tag("b")
+        b.write(rand.choice(WORDS))
+        end("b")
+        b.write(" text<br>\n")
+        tag("table")
+        b.write("\n")
+        for _ in range(rand.randint(1, 3)):
+            tag("tr")
+            optional("td", rand.choice(WORDS))
+            optional("td", rand.choice(WORDS))
+            end("tr")
+            b.write("\n")
+        end("table")
+        b.write("\n")
+        end("div")
+        b.write("\n")
+
+    tag("html")
+    b.write("\n")
+    tag("body")
+    b.write("\n")
+    b.flush()
+    b.fill(unit, size, len("</body>\n</html>\n"))
+    end("body")
+    b.write("\n")
+    end("html")
+    b.write("\n")
+    return b.document("html", "html", {"optional_close": optional_close})
+
+
+def keywords(size, seed=0, language="ruby", depth=4):
+    """Keyword blocks of Ruby, Lua, or Bash."""
+
+    rand = random.Random(seed)
+    b = Builder()
+
+    def ruby(level, indent):
+        """Write a Ruby block."""
+
+        keyword = rand.choice(("if", "while", "def")) if level else "def"
+        head = {
+            "def": " f%d(x)" % rand.randint(0, 999),
+            "if": " x > %d" % rand.randint(0, 9),
+            "while": " x < %d" % rand.randint(0, 9)
+        }[keyword]
+        b.write(indent)
+        b.open("ruby", keyword)
+        b.write("%s\n" % head)
+        if level < depth and rand.random() < 0.7:
+            block(level + 1, indent + "  ")
+        b.write("%s  x += 1\n%s" % (indent, indent))
+        b.close("end")
+        b.write("\n")
+
+    def lua(level, indent):
+        """Write a Lua block; the `do` of a loop is what opens the block."""
+
+        keyword = rand.choice(("if", "for", "function")) if level else "function"
+        b.write(indent)
+        if keyword == "function":
+            b.open("lua", "function")
+            b.write(" f%d(x)\n" % rand.randint(0, 999))
+        elif keyword == "if":
+            b.open("lua", "if")
+            b.write(" x > %d then\n" % rand.randint(0, 9))
+        else:
+            b.write("for i = 1, %d " % rand.randint(1, 9))
+            b.open("lua", "do")
+            b.write("\n")
+        if level < depth and rand.random() < 0.7:
+            block(level + 1, indent + "  ")
+        b.write("%s  x = x + 1\n%s" % (indent, indent))
+        b.close("end")
+        b.write("\n")
+
+    def bash(level, indent):
+        """Write a Bash block."""
+
+        keyword = rand.choice(("if", "while", "for", "case"))
+        b.write(indent)
+        if keyword == "if":
+            b.open("bash", "if")
+            b.write(" [ $x -gt %d ]; then\n" % rand.randint(0, 9))
+            close = "fi"
+        elif keyword == "while":
+            b.open("bash", "while")
+            b.write(" [ $x -lt %d ]; do\n" % rand.randint(0, 9))
+            close = "done"
+        elif keyword == "for":
+            b.open("bash", "for")
+            b.write(" i in 1 2 3; do\n")
+            close = "done"
+        else:
+            b.open("bash", "case")
+            b.write(" $x in\n%s  (1) echo one;;\n" % indent)
+            close = "esac"
+        if level < depth and rand.random() < 0.7:
+            block(level + 1, indent + "  ")
+        b.write("%s  x=$((x + 1))\n%s" % (indent, indent))
+        b.close(close)
+        b.write("\n")
+
+    block, header = {"ruby": (ruby, "# ruby\n"), "lua": (lua, "-- lua\n"), "bash": (bash, "#!/bin/bash\n")}[language]
+    b.write(header)
+    b.flush()
+    b.fill(lambda: block(0, ""), size)
+    return b.document("keywords_%s" % language, language, {"language": language, "depth": depth})
+
+
+def latex(size, seed=0, depth=4):
+    """Nested LaTeX environments."""
+
+    rand = random.Random(seed)
+    b = Builder()
+    environments = ("itemize", "enumerate", "center", "quote", "minipage")
+
+    def environment(level):
+        """Write one environment."""
+
+        name = rand.choice(environments)
+        b.open("latexenv", "\\begin{%s}" % name)
+        b.write("\n\\item %s " % rand.choice(WORDS))
+        b.pair("curly", "{", rand.choice(WORDS), "}")
+        b.write("\n")
+        if level < depth and rand.random() < 0.7:
+            environment(level + 1)
+        b.close("\\end{%s}" % name)
+        b.write("\n")
+
+    b.fill(lambda: environment(0), size)
+    return b.document("latex", "latex", {"depth": depth})
+
+
+def markdown(size, seed=0):
+    """Markdown with fenced code blocks."""
+
+    rand = random.Random(seed)
+    b = Builder()
+
+    def unit():
+        """Write a paragraph and a code block."""
+
+        b.write("Some %s text about %s.\n\n" % (rand.choice(WORDS), rand.choice(WORDS)))
+        fence = "`" * rand.randint(3, 5)
+        b.open("mdcodeblock", fence)
+        b.write("python\nx = f(%d)\n" % rand.randint(0, 99))
+        b.close(fence)
+        b.write("\n\n")
+
+    b.fill(unit, size)
+    return b.document("markdown", "markdown", {})
+
+
+def erlang(size, seed=0, depth=3):
+    """Erlang functions with nested `case`, `if`, `begin`, and `fun` blocks."""
+
+    rand = random.Random(seed)
+    b = Builder()
+
+    def block(level, indent):
+        """Write one block."""
+
+        keyword = rand.choice(("case", "if", "begin", "fun"))
+        if keyword == "fun":
+            b.open("erlang", "fun")
+            b.write("(X) ->\n")
+        elif keyword == "case":
+            b.open("erlang", "case")
+            b.write(" X of\n%s  %d -> ok;\n%s  _ ->\n" % (indent, rand.randint(0, 9), indent))
+        elif keyword == "if":
+            b.open("erlang", "if")
+            b.write("\n%s  X > %d ->\n" % (indent, rand.randint(0, 9)))
+        else:
+            b.open("erlang", "begin")
+            b.write("\n")
+        b.write("%s    " % indent)
+        if level < depth and rand.random() < 0.7:
+            block(level + 1, indent + "    ")
+        else:
+            b.write("X")
+        b.write("\n%s" % indent)
+        b.close("end")
+
+    def unit():
+        """Write one function."""
+
+        b.write("f%d(X) ->\n    " % rand.randint(0, 999))
+        block(0, "    ")
+        b.write(".\n\n")
+
+    b.write("-module(bench).\n\n")
+    b.flush()
+    b.fill(unit, size)
+    return b.document("erlang", "erlang", {"depth": depth})
+
+
+def strings(size, seed=0):
+    """Code heavy with strings that contain escapes and brackets."""
+
+    rand = random.Random(seed)
+    b = Builder()
+
+    def unit():
+        """Write a few statements."""
+
+        b.write("x = f")
+        b.open("round", "(")
+        b.pair("py_double_quote", '"', 'a \\"%s\\" (b] {c' % rand.choice(WORDS), '"')
+        b.write(", ")
+        b.pair("py_single_quote", "'", "it\\'s [%d)" % rand.randint(0, 99), "'")
+        b.close(")")
+        b.write("\ny = ")
+        b.open("square", "[")
+        b.pair("py_double_quote", '"', "\\\\", '"')
+        b.write(", ")
+        b.pair("py_single_quote", "'", '"', "'")
+        b.write(", z")
+        b.close("]")
+        b.write("\n")
+
+    b.fill(unit, size)
+    return b.document("strings", "python", {})
+
+
+def unmatched(size, seed=0, run=256):
+    """Runs of unmatched brackets between matched ones."""
+
+    rand = random.Random(seed)
+    b = Builder()
+
+    def unit():
+        """Write a run of unmatched brackets and a matched pair."""
+
+        for _ in range(rand.randint(1, run)):
+            b.bad(rand.choice("([{"))
+        b.write(" ")
+        b.pair("round", "(", rand.choice(WORDS), ")")
+        b.write("\n")
+
+    b.fill(unit, size)
+    return b.document("unmatched", "javascript", {"run": run})
+
+
+GENERATORS = OrderedDict(
+    [
+        ("nested", nested),
+        ("minified_json", minified_json),
+        ("minified_js", minified_js),
+        ("html", html),
+        ("keywords_ruby", lambda size, seed=0, **kwargs: keywords(size, seed, "ruby", **kwargs)),
+        ("keywords_lua", lambda size, seed=0, **kwargs: keywords(size, seed, "lua", **kwargs)),
+        ("keywords_bash", lambda size, seed=0, **kwargs: keywords(size, seed, "bash", **kwargs)),
+        ("latex", latex),
+        ("markdown", markdown),
+        ("erlang", erlang),
+        ("strings", strings),
+        ("unmatched", unmatched)
+    ]
+)
+
+
+def generate(name, size, seed=0, **params):
+    """Generate a document by the generator's name."""
+
+    return GENERATORS[name](parse_size(size), seed, **params)
+
+
+def main(argv):
+    """Write a document and its annotations: `corpus.py NAME SIZE OUTPUT [SEED]`."""
+
+    if len(argv) < 3:
+        print(main.__doc__)
+        return 1
+    doc = generate(argv[0], argv[1], int(argv[3]) if len(argv) > 3 else 0)
+    with open(argv[2], "w") as f:
+        for segment in doc.segments:
+            for _ in range(segment.count):
+                f.write(segment.text)
+    with open(argv[2] + ".pairs.json", "w") as f:
+        json.dump(doc.annotations(), f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
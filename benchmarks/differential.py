@@ -0,0 +1,372 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+
+Differential verification of fast matching paths.
+
+A fast path (an index, a cache, or another scanner) is enabled by core
+settings and registered in `FAST_PATHS`.  The harness matches with two
+cores side by side, one with every registered fast path off and one with
+the candidate on, over random and corpus documents with random cursors and
+random edits.  Each match's resolved brackets and highlight regions must be
+the same.  The first divergence is minimized and reported so it can be
+replayed.
+
+Cores read their settings when created, so fast paths must be configured
+at setup.
+
+```
+python -m benchmarks.differential --cases 500
+python -m benchmarks.differential --soak 3600
+python -m benchmarks.differential --repro divergence.json
+```
+"""
+from collections import OrderedDict
+from time import time
+import argparse
+import json
+import random
+import sys
+from . import corpus, harness
+
+# Fast path name: the settings that turn it on.  The reference turns them all off.
+FAST_PATHS = OrderedDict(
+    [
+        ("literal_scanner", {"bracket_literal_scanner": True}),
+        ("numpy", {"bracket_literal_scanner": True, "bracket_numpy_threshold": 1}),
+        ("lazy_scan", {"bracket_lazy_scan": True}),
+        ("lazy_literal_scan", {"bracket_literal_scanner": True, "bracket_lazy_scan": True}),
+        ("keyword_scanner", {"bracket_keyword_scanner": True}),
+        ("keyword_literal_scanner", {"bracket_literal_scanner": True, "bracket_keyword_scanner": True}),
+        ("standard_regex", {"bracket_standard_regex": True}),
+        # Every fast path on at once as shipped, with NumPy used on any buffer so the test documents reach it.
+        (
+            "defaults", {
+                "bracket_literal_scanner": True,
+                "bracket_numpy_threshold": 1,
+                "bracket_lazy_scan": True,
+                "bracket_keyword_scanner": True,
+                "bracket_standard_regex": True
+            }
+        )
+    ]
+)
+
+SYNTAXES = OrderedDict(
+    [
+        ("javascript", ("(", ")", "[", "]", "{", "}", "'", '"', "\\", "/*", "*/", "//", " ", "\n", "a", "b1", ",")),
+        ("python", ("(", ")", "[", "]", "{", "}", "'", '"', "\\", "#", '"""', " ", "\n", "x", "u'", ",")),
+        ("html", ("<div>", "</div>", "<p>", "</p>", "<br>", "<b>", "</b>", "<!--", "-->", '="v"', " ", "\n", "t")),
+        ("ruby", ("def f\n", "if x\n", "do", "end", "\nend\n", "(", ")", "[", "]", "'", "#", " ", "\n", "y")),
+        ("latex", ("\\begin{a}", "\\end{a}", "\\begin{b}", "\\end{b}", "{", "}", "$", "%", " ", "\n", "z")),
+        ("lua", ("function", "do", "if", "repeat", "until", "end", "END", ";", "(", ")", "{", "}", " ", "\n", "x")),
+        ("bash", ("if", "then", "fi", "case", "esac", "do", "done", ";", "&", "|", "\\", " ", "\n", "for", "w")),
+        ("erlang", ("case", "of", "end", "End", "fun", "receive", "try", "(", ")", "{", "}", " ", "\n", "ca\u017fe"))
+    ]
+)
+CORPORA = (
+    "nested", "minified_json", "html", "keywords_ruby", "keywords_lua", "keywords_bash", "erlang", "latex",
+    "strings", "unmatched"
+)
+EDIT_PIECES = ("(", ")", "[", "]", "{", "}", "'", '"', "<b>", "</b>", "end", "\n", " ", "x", "\\")
+
+
+class Divergence(object):
+    """A case where the candidate's match is not the reference's."""
+
+    def __init__(self, case, step, reference, candidate):
+        """Setup the divergence."""
+
+        self.case = case
+        self.step = step
+        self.reference = reference
+        self.candidate = candidate
+
+    def repro(self):
+        """Get the reproduction as a JSON serializable dictionary."""
+
+        return OrderedDict(
+            [
+                ("candidate", self.case["candidate"]),
+                ("syntax", self.case["syntax"]),
+                ("text", self.case["text"]),
+                ("steps", self.case["steps"]),
+                ("divergent_step", self.step),
+                ("reference_result", self.reference),
+                ("candidate_result", self.candidate)
+            ]
+        )
+
+    def __str__(self):
+        """Describe the divergence."""
+
+        return "Divergence at step %d of %s (%d characters, %d steps):\n%s" % (
+            self.step, self.case["syntax"], len(self.case["text"]), len(self.case["steps"]),
+            json.dumps(self.repro(), indent=4)
+        )
+
+
+def recording_core(values):
+    """Create a core with the settings that records what each match resolves."""
+
+    bh_core = harness.load()
+
+    class RecordingCore(bh_core.BhCore):
+        """Core that records every resolved bracket pair."""
+
+        def queue_plugin(self, name, left, right, regions, finish):
+            """Record the resolved brackets before queuing them."""
+
+            self.resolved.append(
+                [
+                    name,
+                    [left.begin, left.end] if left is not None else None,
+                    [right.begin, right.end] if right is not None else None,
+                    self.bracket_style
+                ]
+            )
+            return bh_core.BhCore.queue_plugin(self, name, left, right, regions, finish)
+
+    with harness.overlay(values):
+        core = RecordingCore(keycommand=True)
+    core.resolved = []
+    return core
+
+
+def outcome(core, view):
+    """Match and get what was resolved and highlighted, or the error the match raised."""
+
+    core.resolved = []
+    try:
+        core.match(view)
+    except Exception as e:
+        return {"error": "%s: %s" % (type(e).__name__, e)}
+    regions = OrderedDict()
+    for key in sorted(view.regions):
+        found = [[r.begin(), r.end()] for r in view.get_regions(key)]
+        if found:
+            regions[key] = found
+    return {"resolved": core.resolved, "regions": regions}
+
+
+def apply_step(view, step):
+    """Apply an edit or move the cursors."""
+
+    if step[0] == "edit":
+        begin, end, text = step[1:]
+        size = view.size()
+        view.modify(min(begin, size), min(end, size), text, notify=False)
+    else:
+        harness.move_cursors(view, [min(pt, view.size()) for pt in step[1]])
+
+
+def run_case(case):
+    """Run a case; return the first divergence or `None`."""
+
+    syntax = corpus.SYNTAX[case["syntax"]]
+    reference = recording_core(reference_settings())
+    candidate = recording_core(case["candidate"])
+    ref_view = harness.open_view(case["text"], syntax, [0])
+    cand_view = harness.open_view(case["text"], syntax, [0])
+    for index, step in enumerate(case["steps"]):
+        apply_step(ref_view, step)
+        apply_step(cand_view, step)
+        if step[0] == "match":
+            expected = outcome(reference, ref_view)
+            found = outcome(candidate, cand_view)
+            if expected != found:
+                return Divergence(case, index, expected, found)
+    return None
+
+
+def reference_settings():
+    """Get the settings that turn off every registered fast path."""
+
+    values = {}
+    for settings in FAST_PATHS.values():
+        for key, value in settings.items():
+            values[key] = False if isinstance(value, bool) else None
+    return values
+
+
+def random_steps(rand, size, count, edits=True):
+    """Make random cursor moves and edits."""
+
+    steps = []
+    for _ in range(count):
+        if edits and steps and rand.random() < 0.4:
+            begin = rand.randint(0, size)
+            end = min(size, begin + rand.choice((0, 0, 1, 2, 5)))
+            text = "".join(rand.choice(EDIT_PIECES) for _ in range(rand.choice((0, 1, 1, 2))))
+            steps.append(["edit", begin, end, text])
+            size += len(text) - (end - begin)
+        steps.append(["match", sorted(rand.randint(0, size) for _ in range(rand.choice((1, 1, 1, 2, 3))))])
+    return steps
+
+
+def random_case(seed, candidate, use_corpus=False, steps=8):
+    """Make a random case from random text or a corpus document."""
+
+    rand = random.Random(seed)
+    if use_corpus:
+        doc = corpus.generate(rand.choice(CORPORA), rand.choice((512, 2048, 8192)), seed)
+        syntax = [k for k, v in corpus.SYNTAX.items() if v == doc.syntax][0]
+        text = doc.text()
+    else:
+        syntax = rand.choice(list(SYNTAXES))
+        text = "".join(rand.choice(SYNTAXES[syntax]) for _ in range(rand.randint(1, 120)))
+    return {
+        "candidate": candidate,
+        "syntax": syntax,
+        "text": text,
+        "steps": random_steps(rand, len(text), steps)
+    }
+
+
+def shift_steps(steps, begin, end):
+    """Adjust the steps to the text between `begin` and `end` being removed."""
+
+    removed = end - begin
+
+    def shift(pt):
+        """Move a point past the removed text."""
+
+        return pt - removed if pt >= end else min(pt, begin)
+
+    shifted = []
+    for step in steps:
+        if step[0] == "edit":
+            shifted.append(["edit", shift(step[1]), shift(step[2]), step[3]])
+        else:
+            shifted.append(["match", [shift(pt) for pt in step[1]]])
+    return shifted
+
+
+def minimize(divergence):
+    """Shrink a divergence: drop unneeded steps, cursors, and text while it still diverges."""
+
+    best = divergence
+    case = dict(best.case, steps=best.case["steps"][:best.step + 1])
+
+    # Drop steps, keeping the final match.
+    index = len(case["steps"]) - 2
+    while index >= 0:
+        trial = dict(case, steps=case["steps"][:index] + case["steps"][index + 1:])
+        found = run_case(trial)
+        if found is not None:
+            best = found
+            case = dict(trial, steps=trial["steps"][:found.step + 1])
+        index = min(index, len(case["steps"]) - 1) - 1
+
+    # Drop cursors from the matches.
+    for index in range(len(case["steps"])):
+        points = case["steps"][index][1] if case["steps"][index][0] == "match" else []
+        for pt in list(points):
+            if len(case["steps"][index][1]) > 1:
+                steps = list(case["steps"])
+                steps[index] = ["match", [p for p in steps[index][1] if p != pt]]
+                found = run_case(dict(case, steps=steps))
+                if found is not None:
+                    best = found
+                    case = found.case
+
+    # Apply the edits before the first match to the text.
+    while case["steps"][0][0] == "edit":
+        size = len(case["text"])
+        begin, end, text = case["steps"][0][1:]
+        trial = dict(
+            case,
+            text=case["text"][:min(begin, size)] + text + case["text"][min(end, size):],
+            steps=case["steps"][1:]
+        )
+        found = run_case(trial)
+        if found is None:
+            break
+        best = found
+        case = dict(trial, steps=trial["steps"][:found.step + 1])
+
+    # Remove chunks of text, from large to small.
+    chunk = len(case["text"]) // 2
+    while chunk >= 1:
+        begin = 0
+        while begin < len(case["text"]):
+            end = min(len(case["text"]), begin + chunk)
+            trial = dict(
+                case,
+                text=case["text"][:begin] + case["text"][end:],
+                steps=shift_steps(case["steps"], begin, end)
+            )
+            found = run_case(trial)
+            if found is not None:
+                best = found
+                case = trial
+            else:
+                begin = end
+        chunk //= 2
+    return best
+
+
+def check(name, cases=100, seed=0, use_corpus=False):
+    """Check a registered fast path, or settings, over random cases; return the minimized divergence or `None`."""
+
+    candidate = dict(reference_settings(), **(name if isinstance(name, dict) else FAST_PATHS[name]))
+    for index in range(cases):
+        divergence = run_case(random_case(seed + index, candidate, use_corpus))
+        if divergence is not None:
+            return minimize(divergence)
+    return None
+
+
+def main(argv):
+    """Check fast paths from the command line."""
+
+    parser = argparse.ArgumentParser(prog="differential", description="Check fast paths against the reference.")
+    parser.add_argument("--path", default=",".join(FAST_PATHS), help="Comma separated fast paths to check.")
+    parser.add_argument("--candidate", help="Settings to check instead of registered fast paths, as JSON.")
+    parser.add_argument("--cases", type=int, default=200, help="Random cases per fast path.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first case.")
+    parser.add_argument("--corpus", action="store_true", help="Use corpus documents instead of random text.")
+    parser.add_argument("--soak", type=float, default=0, help="Keep checking for this many seconds.")
+    parser.add_argument("--repro", help="Replay a reproduction written by a previous run.")
+    parser.add_argument("--output", default="divergence.json", help="Where to write a reproduction.")
+    args = parser.parse_args(argv)
+
+    if args.repro:
+        with open(args.repro, "r") as f:
+            repro = json.load(f)
+        divergence = run_case(repro)
+        print(divergence if divergence is not None else "No divergence.")
+        return 1 if divergence is not None else 0
+
+    if args.candidate:
+        candidates = [("candidate", json.loads(args.candidate))]
+    else:
+        candidates = [(name, name) for name in args.path.split(",") if name]
+    if not candidates:
+        print("No fast paths are registered.")
+        return 0
+
+    seed = args.seed
+    rounds = 0
+    deadline = time() + args.soak
+    while True:
+        # Soaking alternates random text with corpus documents.
+        use_corpus = args.corpus or bool(args.soak and rounds % 2)
+        for label, candidate in candidates:
+            divergence = check(candidate, args.cases, seed, use_corpus)
+            if divergence is not None:
+                print("%s: %s" % (label, divergence))
+                with open(args.output, "w") as f:
+                    json.dump(divergence.repro(), f, indent=4)
+                return 1
+            print("%s: %d cases from seed %d agree" % (label, args.cases, seed))
+        seed += args.cases
+        rounds += 1
+        if time() >= deadline:
+            return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,153 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+
+Helpers shared by the benchmarks.
+"""
+from contextlib import contextmanager
+from os import makedirs
+from os.path import basename, dirname, exists, join, splitext
+from time import perf_counter
+import json
+import headless
+
+BASELINES = join(dirname(__file__), "baselines")
+
+bh_core = None
+
+
+def load():
+    """Load the plugin with the headless API once."""
+
+    global bh_core
+    if bh_core is None:
+        bh_core = headless.load_plugin()
+    return bh_core
+
+
+def core_settings():
+    """Get the core settings."""
+
+    load()
+    import sublime
+    return sublime.load_settings("bh_core.sublime-settings")
+
+
+@contextmanager
+def overlay(values):
+    """Temporarily change core settings."""
+
+    settings = core_settings()
+    saved = dict((key, (settings.has(key), settings.get(key))) for key in values)
+    for key, value in values.items():
+        settings.set(key, value)
+    try:
+        yield
+    finally:
+        for key, (had, value) in saved.items():
+            if had:
+                settings.set(key, value)
+            else:
+                settings.erase(key)
+
+
+def scope_spans(text, syntax):
+    """Find the scope spans of the text once, so views of it can be recreated cheaply."""
+
+    import sublime
+    return sublime.ScopeModel.from_text(text, splitext(basename(syntax))[0].lower()).spans
+
+
+def open_view(text, syntax, sels, spans=None):
+    """Open a headless view of the text."""
+
+    return headless.new_view(text, syntax, sels, spans)
+
+
+def move_cursors(view, points):
+    """Replace the selections with cursors at the points."""
+
+    import sublime
+    view.sel().clear()
+    for pt in points:
+        view.sel().add(sublime.Region(pt))
+
+
+def matched_pairs(view):
+    """Get the `((begin, end), (begin, end))` pair matched for each selection, or `None`."""
+
+    record = load().BhCore.last_match.get(view.id())
+    if record is None:
+        return None
+    pairs = []
+    for tails in record[-1]:
+        pair = None
+        for name, left, right, regions, style, finish in tails:
+            if left is not None and right is not None:
+                pair = ((left.begin, left.end), (right.begin, right.end))
+        pairs.append(pair)
+    return pairs
+
+
+class CallTimer(object):
+    """Accumulate the calls and time of wrapped functions by key."""
+
+    def __init__(self):
+        """Setup the timer."""
+
+        self.stats = {}
+
+    def wrap(self, fn, key):
+        """Wrap the function, or the function a previous timer wrapped, to time its calls under the key."""
+
+        fn = getattr(fn, "wrapped", fn)
+        stats = self.stats
+
+        def timed(*args, **kwargs):
+            """Call the function and time it."""
+
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                entry = stats.get(key)
+                if entry is None:
+                    stats[key] = [1, perf_counter() - start]
+                else:
+                    entry[0] += 1
+                    entry[1] += perf_counter() - start
+        timed.wrapped = fn
+        return timed
+
+    def clear(self):
+        """Clear the stats."""
+
+        self.stats.clear()
+
+
+def baseline_path(name):
+    """Get the path of a stored baseline."""
+
+    return join(BASELINES, "%s.json" % name)
+
+
+def load_baseline(name):
+    """Load a stored baseline, or `None` if there isn't one."""
+
+    path = baseline_path(name)
+    if not exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_baseline(name, data):
+    """Store a baseline."""
+
+    if not exists(BASELINES):
+        makedirs(BASELINES)
+    with open(baseline_path(name), "w") as f:
+        json.dump(data, f, indent=4, sort_keys=True)
+        f.write("\n")
@@ -7,20 +7,29 @@ License: MIT
 import sublime
 import sublime_plugin
 from os.path import basename, splitext
-from time import time, sleep
+from time import time, sleep, perf_counter
+from collections import OrderedDict
+import json
 import threading
 import traceback
 import BracketHighlighter.bh_plugin as bh_plugin
 import BracketHighlighter.bh_search as bh_search
 import BracketHighlighter.bh_regions as bh_regions
+import BracketHighlighter.bh_tag_cache as bh_tag_cache
 import BracketHighlighter.bh_rules as bh_rules
-from BracketHighlighter.bh_logging import debug, log
+import BracketHighlighter.bh_perf as bh_perf
+import BracketHighlighter.bh_profile as bh_profile
+import BracketHighlighter.bh_trace as bh_trace
+from BracketHighlighter.bh_logging import debug, log, update_debug
 
 if 'bh_thread' not in globals():
     bh_thread = None
 
 bh_match = None
+key_cores = OrderedDict()
 
+KEY_CORE_CACHE_SIZE = 16
+THREAD_POLL = 0.5
 BH_MATCH_TYPE_NONE = 0
 BH_MATCH_TYPE_SELECTION = 1
 BH_MATCH_TYPE_EDIT = 2
@@ -35,6 +44,7 @@ class BhCore(object):
     """Bracket matching class."""
 
     plugin_reload = False
+    last_match = {}
 
     ####################
     # Match Setup
@@ -77,6 +87,12 @@ class BhCore(object):
         self.last_id_view = None
         self.last_id_sel = None
         self.view_tracker = (None, None)
+        self.plugin_queue = []
+        self.deferred = None
+        self.current_sel = None
+        self.scope_dir = bh_search.BH_ADJACENT_LEFT
+        self.skip_sub_search = False
+        self.tails = None
         self.ignore_threshold = override_thresh or bool(self.settings.get("ignore_threshold", False))
         self.adj_only = adj_only if adj_only is not None else bool(self.settings.get("match_only_adjacent", False))
         self.auto_selection_threshold = int(self.settings.get("auto_selection_threshold", 10))
@@ -93,7 +109,8 @@ class BhCore(object):
             self.settings.get("scope_brackets", []) + self.settings.get("user_scope_brackets", []),
             str(self.settings.get('bracket_string_escape_mode', "string")),
             False if no_outside_adj else self.settings.get("bracket_outside_adjacent", False),
-            block_cursor
+            block_cursor,
+            **bh_rules.scan_options(self.settings)
         )
 
         # Init selection params
@@ -115,9 +132,16 @@ class BhCore(object):
         # Region selection, highlight, managment
         self.regions = bh_regions.BhRegion(alter_select, count_lines)
 
+        # Plugin modules were (re)loaded, so the listener's core must reload as well
+        if self.keycommand:
+            BhCore.plugin_reload = True
+
     def refresh_rules(self, language):
         """Reload rules."""
 
+        if self.keycommand:
+            BhCore.plugin_reload = True
+
         loaded_modules = self.loaded_modules.copy()
 
         self.rules.load_rules(
@@ -150,29 +174,162 @@ class BhCore(object):
             is_unique = True
         return is_unique
 
+    def match_options(self):
+        """Get the options that must be equal for a match to be reused."""
+
+        return (
+            self.view_tracker[0], self.adj_only, self.rules.outside_adj,
+            self.rules.block_cursor, HIGH_VISIBILITY
+        )
+
+    def match_limits(self):
+        """Get the limits the selections are searched with."""
+
+        return None if self.ignore_threshold else (self.selection_threshold, self.auto_selection_threshold)
+
+    def save_last_match(self, view, sels, tails):
+        """Remember how the selections were resolved so key commands can reuse it."""
+
+        BhCore.last_match[view.id()] = (
+            view.change_count(),
+            [(sel.a, sel.b) for sel in sels],
+            self.match_options(),
+            self.match_limits(),
+            self.ignore_threshold or view.size() <= self.selection_threshold,
+            tails
+        )
+
+    def get_last_match(self, view, sels):
+        """
+        Get the listener's last match if it is valid for this match.
+
+        The buffer and selections must be unchanged and the options the same.
+        If the search limits differ, the last match is only used if it
+        searched the whole buffer for every selection.
+        """
+
+        last = BhCore.last_match.get(view.id())
+        if last is None:
+            return None
+        change_count, fingerprint, options, limits, whole_buffer, tails = last
+        if (
+            change_count != view.change_count() or
+            options != self.match_options() or
+            fingerprint != [(sel.a, sel.b) for sel in sels]
+        ):
+            return None
+        if limits != self.match_limits() and not (whole_buffer and len(tails) == len(fingerprint)):
+            return None
+        return tails
+
+    def replay_match(self, tails):
+        """Resolve a selection from the recorded matches instead of searching."""
+
+        self.search = None
+        self.recursive_guard = False
+        self.scope_dir = bh_search.BH_ADJACENT_LEFT
+        for name, left, right, regions, style, finish in tails:
+            self.bracket_style = style
+            self.queue_plugin(name, left, right, list(regions), getattr(self, finish))
+
     ####################
     # Plugin
     ####################
-    def run_plugin(self, name, left, right, regions):
-        """Run a bracket plugin."""
+    def queue_plugin(self, name, left, right, regions, finish):
+        """
+        Queue a match for the bracket plugin.
+
+        The plugin runs on all queued matches at once when the selections
+        have been processed.  `finish` is called with the plugin's results.
+        Matches the plugin does not target are finished immediately, and the
+        result of `finish` is returned; `None` is returned for queued matches.
+        """
 
-        lbracket = bh_plugin.BracketRegion(left.begin, left.end)
-        rbracket = bh_plugin.BracketRegion(right.begin, right.end)
-        nobracket = False
+        if self.tails is not None:
+            self.tails.append((name, left, right, regions, self.bracket_style, finish.__name__))
 
         if (
+            left is not None and right is not None and
             ("__all__" in self.plugin_targets or name in self.plugin_targets) and
             self.plugin is not None and
             self.plugin.is_enabled()
         ):
-            lbracket, rbracket, regions, nobracket, refresh_match = self.plugin.run_command(
-                self.view, name, lbracket, rbracket, regions
+            # Keep what is needed to match the selection again if the result can't be saved.
+            state = (self.current_sel, self.search, self.scope_dir, self.recursive_guard)
+            self.plugin_queue.append((name, left, right, regions, self.bracket_style, finish, state))
+            return None
+        return finish(left, right, regions, False)
+
+    def run_plugins(self):
+        """
+        Run the bracket plugin on all queued matches and finish them.
+
+        A match that can't be saved after the plugin ran falls back to the
+        matching that follows it, which can queue more matches for the plugin.
+        """
+
+        if not self.plugin_queue:
+            return
+
+        if bh_perf.timer is not None:
+            bh_perf.timer.begin("plugin")
+
+        while self.plugin_queue:
+            queue = self.plugin_queue
+            self.plugin_queue = []
+            results, refresh_match = self.plugin.run_command(
+                self.view,
+                [
+                    (
+                        entry[0],
+                        bh_plugin.BracketRegion(entry[1].begin, entry[1].end),
+                        bh_plugin.BracketRegion(entry[2].begin, entry[2].end),
+                        entry[3]
+                    ) for entry in queue
+                ]
             )
-            left = left.move(lbracket.begin, lbracket.end) if lbracket is not None else None
-            right = right.move(rbracket.begin, rbracket.end) if rbracket is not None else None
+
+            for entry, result in zip(queue, results):
+                left, right, style, finish, state = entry[1], entry[2], entry[4], entry[5], entry[6]
+                lbracket, rbracket, regions, nobracket = result
+                left = left.move(lbracket.begin, lbracket.end) if lbracket is not None else None
+                right = right.move(rbracket.begin, rbracket.end) if rbracket is not None else None
+                self.bracket_style = style
+                self.deferred = state
+                finish(left, right, regions, nobracket)
+                self.deferred = None
+
             if refresh_match:
                 self.refresh_match = True
-        return left, right, regions, nobracket
+
+        if bh_perf.timer is not None:
+            bh_perf.timer.end()
+
+    def retry_match(self, sub_search=False):
+        """
+        Match the selection of a finished plugin match again when its result can't be saved.
+
+        This is the matching that would have followed the match had it been
+        saved right away: a failed sub search falls back to its scope bracket
+        match, and a failed scope bracket match falls back to the bracket search.
+        """
+
+        sel, search, adj_dir, recursive_guard = self.deferred
+        self.deferred = None
+        self.current_sel = sel
+        self.search = search if search is not None else self.new_search(sel)
+        self.recursive_guard = recursive_guard
+        if sub_search:
+            self.skip_sub_search = True
+            handled = self.find_scopes(sel, adj_dir)
+            self.skip_sub_search = False
+            if handled:
+                return
+        self.sub_search_mode = False
+        if adj_dir == bh_search.BH_ADJACENT_RIGHT:
+            # The scope was searched from the bracket search, so resume the bracket search without it.
+            self.recursive_guard = True
+        self.find_matches(sel)
 
     def highlighting(self, left, right, scope_bracket=False):
         """
@@ -205,6 +362,8 @@ class BhCore(object):
             return left, right
 
         if bracket.highlighting is not None:
+            if bh_perf.timer is not None:
+                bh_perf.timer.begin("highlighting")
             lbracket, rbracket = bracket.highlighting(
                 self.view,
                 bracket.name,
@@ -212,6 +371,8 @@ class BhCore(object):
                 bh_plugin.BracketRegion(left.begin, left.end) if left is not None else None,
                 bh_plugin.BracketRegion(right.begin, right.end) if right is not None else None
             )
+            if bh_perf.timer is not None:
+                bh_perf.timer.end()
 
             if scope_bracket:
                 if lbracket is not None:
@@ -243,6 +404,8 @@ class BhCore(object):
 
         bracket = self.rules.scopes[b.scope]["brackets"][b.type] if scope_bracket else self.rules.brackets[b.type]
         if bracket.validate is not None:
+            if bh_perf.timer is not None:
+                bh_perf.timer.begin("callbacks")
             try:
                 match = bracket.validate(
                     bracket.name,
@@ -252,6 +415,8 @@ class BhCore(object):
                 )
             except Exception:
                 log("Plugin Bracket Find Error:\n%s" % str(traceback.format_exc()))
+            if bh_perf.timer is not None:
+                bh_perf.timer.end()
         return match
 
     def compare(self, first, second, scope_bracket=False):
@@ -270,6 +435,8 @@ class BhCore(object):
                 bracket = self.rules.scopes[first.scope]["brackets"][first.type]
             else:
                 bracket = self.rules.brackets[first.type]
+            if bh_perf.timer is not None:
+                bh_perf.timer.begin("callbacks")
             try:
                 if bracket.compare is not None and match:
                     match = bracket.compare(
@@ -280,6 +447,8 @@ class BhCore(object):
                     )
             except Exception:
                 log("Plugin Compare Error:\n%s" % str(traceback.format_exc()))
+            if bh_perf.timer is not None:
+                bh_perf.timer.end()
         return match
 
     def post_match(self, left, right, center, scope_bracket=False):
@@ -312,6 +481,8 @@ class BhCore(object):
             return left, right
 
         if bracket.post_match is not None:
+            if bh_perf.timer is not None:
+                bh_perf.timer.begin("callbacks")
             try:
                 lbracket, rbracket, self.bracket_style = bracket.post_match(
                     self.view,
@@ -344,6 +515,8 @@ class BhCore(object):
                         right = None
             except Exception:
                 log("Plugin Post Match Error:\n%s" % str(traceback.format_exc()))
+            if bh_perf.timer is not None:
+                bh_perf.timer.end()
 
         return left, right
 
@@ -351,25 +524,28 @@ class BhCore(object):
     # Matching
     ####################
     def match(self, view, force_match=True):
+        """Preform matching brackets surround the selection(s), profiling or tracing it if requested."""
+
+        if bh_profile.profiler is not None or bh_profile.tracing:
+            bh_profile.run(self.match_view, view, force_match)
+        else:
+            self.match_view(view, force_match)
+
+    def match_view(self, view, force_match=True):
         """Preform matching brackets surround the selection(s)."""
 
         if view is None:
             return
 
         # Ensure nothing else calls BH until done
-        view.settings().set("BracketHighlighterBusy", True)
+        bh_regions.set_busy(view, True)
 
         # Abort if disabled
         if not GLOBAL_ENABLE:
-            for region_key in view.settings().get("bh_regions", []):
-                view.erase_regions(region_key)
-            view.settings().set("BracketHighlighterBusy", False)
+            bh_regions.clear_regions(view)
+            bh_regions.set_busy(view, False)
             return
 
-        # Handle key command quirks
-        if self.keycommand:
-            BhCore.plugin_reload = True
-
         if not self.keycommand and BhCore.plugin_reload:
             self.setup()
             BhCore.plugin_reload = False
@@ -385,48 +561,85 @@ class BhCore(object):
             if self.use_selection_threshold and num_sels > self.auto_selection_threshold:
                 self.regions.reset(view, num_sels)
                 self.regions.highlight(HIGH_VISIBILITY)
-                view.settings().set("BracketHighlighterBusy", False)
-                return
-
-        # Initialize
-        if self.unique(sels) or force_match:
-            # Prepare for match
-            self.init_match(num_sels)
-
-            # Nothing to search for
-            if not self.rules.enabled:
-                view.settings().set("BracketHighlighterBusy", False)
+                bh_regions.set_busy(view, False)
                 return
 
-            # Process selections.
-            multi_select_count = 0
-            for sel in sels:
-                if not self.ignore_threshold and multi_select_count >= self.auto_selection_threshold:
-                    # Exceeded threshold, only what must be done
-                    # and break
-                    if not self.regions.alter_select:
-                        break
-                    self.regions.store_sel([sel])
-                    continue
-
-                # Subsearch guard for recursive matching of scopes
-                self.recursive_guard = False
-
-                # Prepare for search
-                self.bracket_style = None
-                self.search = bh_search.Search(
-                    view, self.rules,
-                    sel, self.selection_threshold if not self.ignore_threshold else None
-                )
-
-                # Find and match
-                if not self.find_scopes(sel):
-                    self.sub_search_mode = False
-                    self.find_matches(sel)
-                multi_select_count += 1
-
-        # Highlight, focus, and display lines etc.
-        self.regions.highlight(HIGH_VISIBILITY)
+        try:
+            # Initialize
+            if self.unique(sels) or force_match:
+                bh_perf.begin_match()
+                self.view = view = bh_perf.account_view(view)
+
+                # Prepare for match
+                self.init_match(num_sels)
+
+                # Nothing to search for
+                if not self.rules.enabled:
+                    bh_regions.set_busy(view, False)
+                    return
+
+                # Key commands reuse the listener's match if nothing changed since,
+                # and the listener records its match for them.
+                if self.keycommand:
+                    replay = self.get_last_match(view, sels)
+                    recorded = None
+                else:
+                    BhCore.last_match.pop(view.id(), None)
+                    replay = None
+                    recorded = []
+
+                # Process selections.
+                multi_select_count = 0
+                self.plugin_queue = []
+                for sel in sels:
+                    if not self.ignore_threshold and multi_select_count >= self.auto_selection_threshold:
+                        # Exceeded threshold, only what must be done
+                        # and break
+                        if not self.regions.alter_select:
+                            break
+                        self.regions.store_sel([sel])
+                        continue
+
+                    if replay is not None:
+                        self.current_sel = sel
+                        self.replay_match(replay[multi_select_count])
+                        multi_select_count += 1
+                        continue
+
+                    # Subsearch guard for recursive matching of scopes
+                    self.recursive_guard = False
+                    if recorded is not None:
+                        self.tails = []
+                        recorded.append(self.tails)
+
+                    # Prepare for search
+                    self.bracket_style = None
+                    self.current_sel = sel
+                    self.search = self.new_search(sel)
+
+                    # Find and match
+                    if not self.find_scopes(sel):
+                        self.sub_search_mode = False
+                        self.find_matches(sel)
+                    multi_select_count += 1
+                self.tails = None
+
+                if recorded is not None:
+                    self.save_last_match(view, sels, recorded)
+
+                # Run the plugin on all matches at once
+                self.run_plugins()
+
+            # Highlight, focus, and display lines etc.
+            if bh_perf.timer is not None:
+                bh_perf.timer.begin("render")
+            self.regions.highlight(HIGH_VISIBILITY)
+            if bh_perf.timer is not None:
+                bh_perf.timer.end()
+                bh_perf.end_match(view, self.view_tracker[0])
+        finally:
+            # Don't leave the timer set for the next match if this one returned early or failed.
+            bh_perf.cancel_match()
 
         # Free up BH
         self.search = None
@@ -438,7 +651,20 @@ class BhCore(object):
             bh_thread.modified = True
             bh_thread.time = time()
 
-        view.settings().set("BracketHighlighterBusy", False)
+        bh_regions.set_busy(view, False)
+
+    def new_search(self, sel):
+        """Read the buffer around the selection for searching."""
+
+        if bh_perf.timer is not None:
+            bh_perf.timer.begin("snapshot")
+        search = bh_search.Search(
+            self.view, self.rules,
+            sel, self.selection_threshold if not self.ignore_threshold else None
+        )
+        if bh_perf.timer is not None:
+            bh_perf.timer.end()
+        return search
 
     def sub_search(self, sel, scope=None):
         """Search a scope bracket match for bracekts within."""
@@ -447,48 +673,77 @@ class BhCore(object):
         self.recursive_guard = True
 
         # Find brackets inside scope
-        bracket = None
         left, right = self.match_brackets(sel, scope)[:2]
 
         regions = [sublime.Region(sel.a, sel.b)]
 
         if left is not None and right is not None:
             bracket = self.rules.brackets[left.type]
-            left, right, regions, nobracket = self.run_plugin(bracket.name, left, right, regions)
-            if nobracket:
-                return True
+            handled = self.queue_plugin(bracket.name, left, right, regions, self.finish_sub_search)
+            return (not HIGH_VISIBILITY) if handled is None else handled
+        return False
+
+    def finish_sub_search(self, left, right, regions, nobracket):
+        """Save the bracket match found inside a scope bracket match."""
+
+        if nobracket:
+            return True
 
         # Matched brackets
-        if left is not None and right is not None and bracket is not None and not HIGH_VISIBILITY:
+        if left is not None and right is not None and not HIGH_VISIBILITY:
             left, right = self.highlighting(left, right)
             self.regions.save_complete_regions(left, right, regions, self.bracket_style, HIGH_VISIBILITY)
             return True
+
+        # The plugin ran after the selection was handled, so fall back to the scope match here.
+        if self.deferred is not None and not HIGH_VISIBILITY:
+            self.retry_match(sub_search=True)
         return False
 
     def find_scopes(self, sel, adj_dir=bh_search.BH_ADJACENT_LEFT):
         """Find brackets by scope definition."""
 
+        self.scope_dir = adj_dir
+
         # Search buffer
+        if bh_perf.timer is not None:
+            bh_perf.timer.begin("scope")
         left, right, bracket, sub_matched = self.match_scope_brackets(sel, adj_dir)
+        if bh_perf.timer is not None:
+            bh_perf.timer.end()
         if sub_matched:
             return True
         regions = [sublime.Region(sel.a, sel.b)]
 
         if left is not None and right is not None:
-            left, right, regions, _ = self.run_plugin(bracket.name, left, right, regions)
-            if left is None and right is None:
-                self.regions.store_sel(regions)
-                return True
+            handled = self.queue_plugin(bracket.name, left, right, regions, self.finish_scopes)
+            return True if handled is None else handled
 
-        if not HIGH_VISIBILITY:
-            left, right = self.highlighting(left, right, scope_bracket=True)
+        return self.queue_plugin(None, left, right, regions, self.finish_scope_matches)
 
-        return self.regions.save_regions(left, right, regions, self.bracket_style, HIGH_VISIBILITY)
+    def finish_scopes(self, left, right, regions, nobracket):
+        """Save the scope bracket match."""
+
+        if left is None and right is None:
+            self.regions.store_sel(regions)
+            return True
+
+        if self.save_matches(left, right, regions, scope_bracket=True):
+            return True
+
+        # The plugin ran after the selection was handled, so fall back to the bracket search here.
+        if self.deferred is not None:
+            self.retry_match()
+        return False
+
+    def finish_scope_matches(self, left, right, regions, nobracket):
+        """Save the incomplete scope bracket match."""
+
+        return self.save_matches(left, right, regions, scope_bracket=True)
 
     def find_matches(self, sel):
         """Find bracket matches."""
 
-        bracket = None
         left, right, adj_scope = self.match_brackets(sel)
         if adj_scope:
             return
@@ -497,14 +752,24 @@ class BhCore(object):
 
         if left is not None and right is not None:
             bracket = self.rules.brackets[left.type]
-            left, right, regions, _ = self.run_plugin(bracket.name, left, right, regions)
+            self.queue_plugin(bracket.name, left, right, regions, self.finish_matches)
+        else:
+            self.queue_plugin(None, left, right, regions, self.finish_matches)
 
-        if not HIGH_VISIBILITY:
-            left, right = self.highlighting(left, right)
+    def finish_matches(self, left, right, regions, nobracket):
+        """Save the bracket match."""
 
-        if not self.regions.save_regions(left, right, regions, self.bracket_style, HIGH_VISIBILITY):
+        if not self.save_matches(left, right, regions):
             self.regions.store_sel(regions)
 
+    def save_matches(self, left, right, regions, scope_bracket=False):
+        """Adjust the highlight regions of the match and save them."""
+
+        if not HIGH_VISIBILITY:
+            left, right = self.highlighting(left, right, scope_bracket=scope_bracket)
+
+        return self.regions.save_regions(left, right, regions, self.bracket_style, HIGH_VISIBILITY)
+
     def match_scope_brackets(self, sel, adj_dir):
         """
         Perform match for scope brackets.
@@ -597,8 +862,8 @@ class BhCore(object):
             if bracket.sub_search:
                 self.sub_search_mode = True
                 self.search.set_search_window((left.begin, right.end))
-                if self.sub_search(sel, scope):
-                    return left, right, self.rules.brackets[left.type], True
+                if not self.skip_sub_search and self.sub_search(sel, scope):
+                    return left, right, bracket, True
                 elif bracket.sub_search_only:
                     left, right, bracket = None, None, None
 
@@ -788,19 +1053,16 @@ class BhKeyCommand(sublime_plugin.WindowCommand):
         if plugin is None:
             plugin = {}
 
+        if bh_perf.enabled:
+            bh_perf.note_event("key", replace=True)
+        view = self.window.active_view()
+        if bh_trace.recorder is not None and view is not None:
+            bh_trace.recorder.record("key", view, plugin.get("command"))
+
         # Override events
         bh_thread.ignore_all = True
         bh_thread.modified = False
-        self.bh = BhCore(
-            threshold,
-            lines,
-            adjacent,
-            no_outside_adj,
-            no_block_mode,
-            ignore,
-            plugin,
-            True
-        )
+        self.bh = get_key_core(threshold, lines, adjacent, no_outside_adj, no_block_mode, ignore, plugin)
         self.view = self.window.active_view()
         self.execute()
 
@@ -808,7 +1070,11 @@ class BhKeyCommand(sublime_plugin.WindowCommand):
         """Trigger actual BH command."""
 
         debug("Key Event")
+        if bh_perf.enabled:
+            bh_perf.begin_event()
         self.bh.match(self.view)
+        if bh_perf.enabled:
+            bh_perf.end_event()
         bh_thread.ignore_all = False
         bh_thread.time = time()
 
@@ -825,11 +1091,40 @@ class BhAsyncKeyCommand(BhKeyCommand):
         """Trigger actual BH command."""
 
         debug("Async Key Event")
+        if bh_perf.enabled:
+            bh_perf.begin_event()
         self.bh.match(self.view)
+        if bh_perf.enabled:
+            bh_perf.end_event()
         bh_thread.ignore_all = False
         bh_thread.time = time()
 
 
+def get_key_core(*args):
+    """
+    Get a configured `BhCore` for the key command arguments.
+
+    Cores are cached by their arguments so that repeated key commands
+    don't have to reload settings, compile rules, and load plugins.
+    """
+
+    key = json.dumps(args, sort_keys=True)
+    bh = key_cores.pop(key, None)
+    if bh is None:
+        bh = BhCore(*args, keycommand=True)
+        if len(key_cores) >= KEY_CORE_CACHE_SIZE:
+            key_cores.popitem(last=False)
+    key_cores[key] = bh
+    return bh
+
+
+def clear_key_cores():
+    """Clear the cached key command cores and the last matches they reuse."""
+
+    key_cores.clear()
+    BhCore.last_match.clear()
+
+
 ####################
 # Debug
 ####################
@@ -877,16 +1172,24 @@ class BhListenerCommand(sublime_plugin.EventListener):
     def on_load(self, view):
         """Search brackets on view load."""
 
+        if bh_trace.recorder is not None:
+            bh_trace.recorder.event("on_load", view)
         if self.ignore_event(view):
             return
+        if bh_perf.enabled:
+            bh_perf.note_event("on_load")
         bh_thread.type = BH_MATCH_TYPE_SELECTION
         sublime.set_timeout(bh_thread.payload, 0)
 
     def on_modified(self, view):
         """Update highlighted brackets when the text changes."""
 
+        if bh_trace.recorder is not None:
+            bh_trace.recorder.event("on_modified", view)
         if self.ignore_event(view):
             return
+        if bh_perf.enabled:
+            bh_perf.note_event("on_modified")
         bh_thread.type = BH_MATCH_TYPE_EDIT
         bh_thread.modified = True
         bh_thread.time = time()
@@ -894,16 +1197,24 @@ class BhListenerCommand(sublime_plugin.EventListener):
     def on_activated(self, view):
         """Highlight brackets when the view gains focus again."""
 
+        if bh_trace.recorder is not None:
+            bh_trace.recorder.event("on_activated", view)
         if self.ignore_event(view):
             return
+        if bh_perf.enabled:
+            bh_perf.note_event("on_activated")
         bh_thread.type = BH_MATCH_TYPE_SELECTION
         sublime.set_timeout(bh_thread.payload, 0)
 
     def on_selection_modified(self, view):
         """Highlight brackets when the selections change."""
 
+        if bh_trace.recorder is not None:
+            bh_trace.recorder.event("on_selection_modified", view)
         if self.ignore_event(view):
             return
+        if bh_perf.enabled:
+            bh_perf.note_event("on_selection_modified")
         if bh_thread.type != BH_MATCH_TYPE_EDIT:
             bh_thread.type = BH_MATCH_TYPE_SELECTION
         now = time()
@@ -913,6 +1224,13 @@ class BhListenerCommand(sublime_plugin.EventListener):
             bh_thread.modified = True
             bh_thread.time = now
 
+    def on_close(self, view):
+        """Forget the last match, regions, and tag trees of the view."""
+
+        BhCore.last_match.pop(view.id(), None)
+        bh_regions.forget_view(view)
+        bh_tag_cache.forget_view(view)
+
     def ignore_event(self, view):
         """
         Ignore highlight request.
@@ -950,8 +1268,15 @@ class BhThread(threading.Thread):
         window = sublime.active_window()
         view = window.active_view() if window is not None else None
         self.ignore_all = True
+        if bh_perf.enabled:
+            bh_perf.begin_event()
+        start = perf_counter() if bh_trace.recorder is not None else None
         if bh_match is not None:
             bh_match(view, self.type == BH_MATCH_TYPE_EDIT)
+        if start is not None and view is not None:
+            bh_trace.recorder.match(view, perf_counter() - start, BhCore.last_match.get(view.id()))
+        if bh_perf.enabled:
+            bh_perf.end_event()
         self.ignore_all = False
         self.time = time()
 
@@ -963,13 +1288,18 @@ class BhThread(threading.Thread):
             pass
         self.reset()
 
+    def check(self):
+        """Schedule a match if the view was modified and has been idle long enough."""
+
+        if self.modified is True and time() - self.time > self.wait_time:
+            sublime.set_timeout(self.payload, 0)
+
     def run(self):
         """Thread loop."""
 
         while not self.abort:
-            if self.modified is True and time() - self.time > self.wait_time:
-                sublime.set_timeout(self.payload, 0)
-            sleep(0.5)
+            self.check()
+            sleep(THREAD_POLL)
 
 
 ####################
@@ -982,6 +1312,11 @@ def init_bh_match():
     bh_match = BhCore().match
     debug("Match object loaded.")
 
+    clear_key_cores()
+    settings = sublime.load_settings("bh_core.sublime-settings")
+    settings.clear_on_change('reload_key_cores')
+    settings.add_on_change('reload_key_cores', clear_key_cores)
+
 
 def plugin_loaded():
     """
@@ -994,6 +1329,8 @@ def plugin_loaded():
     global HIGH_VISIBILITY
     global bh_thread
 
+    # Rules are parsed right away, so make sure debug logging is current
+    update_debug()
     init_bh_match()
 
     global HIGH_VISIBILITY
@@ -6,6 +6,9 @@ License: MIT
 """
 import sublime
 
+# Cached `debug_enable` setting, updated when the settings change.
+debug_enabled = False
+
 
 def log(msg):
     """Standard log."""
@@ -13,8 +16,33 @@ def log(msg):
     print("BracketHighlighter: %s" % msg)
 
 
-def debug(msg):
-    """Debug log."""
+def debug(msg, *args):
+    """
+    Debug log.
+
+    The message is only built when debugging is enabled: it is formatted
+    with `args` if any are given, and called if it is a callable.
+    """
 
-    if sublime.load_settings("bh_core.sublime-settings").get('debug_enable', False):
+    if debug_enabled:
+        if callable(msg):
+            msg = msg()
+        elif args:
+            msg = msg % args
         log(msg)
+
+
+def update_debug():
+    """Update the cached debug setting."""
+
+    global debug_enabled
+    debug_enabled = bool(sublime.load_settings("bh_core.sublime-settings").get('debug_enable', False))
+
+
+def plugin_loaded():
+    """Track the debug setting."""
+
+    settings = sublime.load_settings("bh_core.sublime-settings")
+    update_debug()
+    settings.clear_on_change('bh_logging')
+    settings.add_on_change('bh_logging', update_debug)
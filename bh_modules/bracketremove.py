@@ -12,6 +12,13 @@ import sublime
 class BracketRemove(bh_plugin.BracketPluginCommand):
     """Bracket remove plugin."""
 
+    shares_results = True
+
+    def edits_inside(self, remove_content=False, remove_indent=False, remove_block=False):
+        """Removing the block removes the lines of the brackets, which can reach outside of them."""
+
+        return not remove_block
+
     def decrease_indent_level(self, edit, row_first, row_last):
         """Decrease indent level on removal."""
 
@@ -34,14 +41,17 @@ class BracketRemove(bh_plugin.BracketPluginCommand):
             row_first = self.view.rowcol(self.left.end)[0] + 1
             row_last = self.view.rowcol(self.right.begin)[0] - 1
             self.single_line = not row_first <= row_last
+            # A bracket on a line that another match's block removal already removed is left alone.
             if remove_block and not self.single_line:
-                self.view.replace(edit, self.view.full_line(self.right.toregion()), "")
+                if self.right.size():
+                    self.view.replace(edit, self.view.full_line(self.right.toregion()), "")
             else:
                 self.view.replace(edit, self.right.toregion(), "")
             if remove_indent:
                 self.decrease_indent_level(edit, row_first, row_last)
             if remove_block and not self.single_line:
-                self.view.replace(edit, self.view.full_line(self.left.toregion()), "")
+                if self.left.size():
+                    self.view.replace(edit, self.view.full_line(self.left.toregion()), "")
             else:
                 self.view.replace(edit, self.left.toregion(), "")
 
@@ -13,6 +13,8 @@ DEFAULT_TAGS = ["cfml", "html", "angle"]
 class SelectBracket(bh_plugin.BracketPluginCommand):
     """Select Bracket plugin."""
 
+    read_only = True
+
     def run(self, edit, name, select='', tags=None, always_include_brackets=False, alternate=False):
         """
         Select the content between brackets.
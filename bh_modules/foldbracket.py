@@ -11,6 +11,9 @@ import sublime
 class FoldBrackets(bh_plugin.BracketPluginCommand):
     """Fold bracket plugin."""
 
+    read_only = True
+    shares_results = True
+
     def run(self, edit, name):
         """Fold the content between the bracket."""
 
@@ -11,6 +11,13 @@ import sublime
 class SwapQuotes(bh_plugin.BracketPluginCommand):
     """Swap quotes plugin."""
 
+    shares_results = True
+
+    def edits_inside(self, **kwargs):
+        """Only the quotes and the content between them are edited."""
+
+        return True
+
     def escaped(self, idx):
         """Check if character is an escape char."""
 
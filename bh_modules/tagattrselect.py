@@ -13,6 +13,8 @@ tags = import_module("bh_modules.tags")
 class SelectAttr(bh_plugin.BracketPluginCommand):
     """Select attribute plugin."""
 
+    read_only = True
+
     def run(self, edit, name, direction='right'):
         """
         Select next attribute in the given direction.
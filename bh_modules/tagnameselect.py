@@ -13,6 +13,8 @@ tags = import_module("bh_modules.tags")
 class TagNameSelect(bh_plugin.BracketPluginCommand):
     """Tag name select plugin."""
 
+    read_only = True
+
     def run(self, edit, name):
         """Select tag name."""
 
@@ -5,14 +5,14 @@ Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
 License: MIT
 """
 import re
+from bisect import bisect_right
+from heapq import merge
 from collections import namedtuple
 import sublime
 from os.path import basename, splitext
+import BracketHighlighter.bh_tag_cache as bh_tag_cache
 
-TAG_OPEN = 0
-TAG_CLOSE = 1
-
-last_mode = None
+TagPatterns = namedtuple('TagPatterns', ['tag_open', 'tag_close', 'self_closing_tags', 'single_tags', 'scope_exclude'])
 
 
 def process_tag_pattern(pattern, variables=None):
@@ -26,7 +26,7 @@ def process_tag_pattern(pattern, variables=None):
     return pattern
 
 
-class TagEntry(namedtuple('TagEntry', ['begin', 'end', 'name', 'self_closing', 'single'], verbose=False)):
+class TagEntry(namedtuple('TagEntry', ['begin', 'end', 'name', 'self_closing', 'single'])):
     """Tag entry tuple."""
 
     def move(self, begin, end):
@@ -61,9 +61,10 @@ def get_tag_mode(view, tag_mode_config):
 def highlighting(view, name, style, left, right):
     """Highlight only the tag name."""
     tag_settings = sublime.load_settings("bh_tag.sublime-settings")
-    match_style = tag_settings.get("tag_style", {}).get(last_mode, None)
+    tag_mode = get_tag_mode(view, tag_settings.get("tag_mode", {}))
+    match_style = tag_settings.get("tag_style", {}).get(tag_mode, None)
     if match_style is not None and style == match_style:
-        tag_name = tag_settings.get('tag_name', {}).get(last_mode, '[\w\:\.\-]+')
+        tag_name = tag_settings.get('tag_name', {}).get(tag_mode, '[\w\:\.\-]+')
         if left is not None:
             region = view.find(tag_name, left.begin)
             left = left.move(region.begin(), region.end())
@@ -82,14 +83,12 @@ def post_match(view, name, style, first, second, center, bfr, threshold):
     """
 
     # We need to know the mode during the highlight event, so track the last mode.
-    global last_mode
     left, right = first, second
     threshold = [0, len(bfr)] if threshold is None else threshold
     bh_settings = sublime.load_settings("bh_core.sublime-settings")
     tag_settings = sublime.load_settings("bh_tag.sublime-settings")
     tag_mode = get_tag_mode(view, tag_settings.get("tag_mode", {}))
     tag_style = tag_settings.get("tag_style", {}).get(tag_mode, '?')
-    last_mode = tag_mode
     outside_adj = bh_settings.get("bracket_outside_adjacent", False)
 
     bracket_style = style
@@ -103,85 +102,335 @@ def post_match(view, name, style, first, second, center, bfr, threshold):
     return left, right, bracket_style
 
 
-class TagSearch(object):
-    """Searches for tags."""
+class TagNode(object):
+    """Tag node tracking an opening tag and the tag that closed it."""
 
-    def __init__(
-        self, view, bfr, window, center, pattern,
-        match_type, mode, self_closing_tags, single_tags
-    ):
-        """Prepare tag search object."""
+    def __init__(self, tag, parent, depth):
+        """Setup the tag node."""
 
-        self.start = int(window[0])
-        self.end = int(window[1])
-        self.self_closing_tags = self_closing_tags
-        self.single_tags = single_tags
-        self.center = center
-        self.pattern = pattern
-        self.match_type = match_type
-        self.mode = mode
-        self.bfr = bfr
-        self.prev_match = None
-        self.return_prev = False
-        self.done = False
-        self.view = view
-        settings = sublime.load_settings("bh_tag.sublime-settings")
-        try:
-            self.scope_exclude = settings.get("tag_scope_exclude", {}).get(mode, ['string', 'comment'])
-        except Exception:
-            self.scope_exclude = ['string', 'comment']
+        self.open = tag
+        self.close = None
+        self.parent = parent
+        self.depth = depth
+        self.index = len(parent.children) if parent is not None else 0
+        self.children = []
+        self.implied = False
+        self.begin = tag.begin if tag is not None else None
+        self.end = None
 
-    def scope_check(self, pt):
-        """Check if scope is good."""
+    def closed(self, tag):
+        """Close the node with an explicit closing tag."""
 
-        illegal_scope = False
-        for exclude in self.scope_exclude:
-            illegal_scope |= bool(self.view.score_selector(pt, exclude))
-        return illegal_scope
+        self.close = tag
+        self.end = tag.end
 
-    def reset_end_state(self):
-        """Reset and end the current state."""
+    def close_implied(self, pt):
+        """
+        Close the node without a closing tag.
 
-        self.done = False
-        self.prev_match = None
-        self.return_prev = False
+        Only tags that allow their closing tag to be omitted are considered properly closed.
+        """
+
+        self.implied = self.open.self_closing
+        self.end = pt
+
+
+class TagTree(object):
+    """
+    Tree of the tags found in a window of the buffer.
 
-    def remember(self):
-        """Instruct object to return the last tag."""
+    Closing tags are resolved in a single pass using per-name stacks
+    of open tags, so tags with optional closing tags are resolved without
+    re-walking the stack for every closing tag.  The tree is built lazily:
+    tags are only read as far as a query needs them, and the rest of the
+    tags are read by later queries.
+    """
 
-        self.return_prev = True
+    def __init__(self, window, tags=()):
+        """Setup the tree."""
+
+        self.window = window
+        self.root = TagNode(None, None, 0)
+        self.root.begin = window[0]
+        self.root.end = window[1]
+        self.nodes = []
+        self.opens = {}
+        self.closes = {}
+        self.unmatched = []
+        self.tags = iter(tags)
+        self.stack = [self.root]
+        # Index of the last tag on the stack that requires an explicit close.
+        self.hard = [0]
+        self.names = {}
+        self.last = None
         self.done = False
+        self._starts = None
 
-    def get_tags(self):
-        """Find all the tags."""
+    @property
+    def starts(self):
+        """Get the start of each tag node in document order."""
 
-        if self.done:
-            return
-        if self.return_prev:
-            self.return_prev = False
-            yield self.prev_match
-        for m in self.pattern.finditer(self.bfr, self.start, self.end):
-            name = m.group(1).lower()
-            if not self.match_type:
-                single = bool(m.group(2) != "")
-                if not single and self.single_tags is not None:
-                    single = self.single_tags.match(name) is not None
-                if self.self_closing_tags is not None:
-                    self_closing = self.self_closing_tags.match(name) is not None
-                else:
-                    self_closing = False
+        self.build()
+        if self._starts is None:
+            self._starts = [node.begin for node in self.nodes]
+        return self._starts
+
+    def build(self, tags=None, pt=None):
+        """
+        Build the tree from the tags in document order.
+
+        Tags are tuples of the tag entry and whether it is a closing tag.
+        If a point is given, only the tags that begin at or before it are
+        read.
+        """
+
+        if tags is not None:
+            self.tags = iter(tags)
+        while not self.done and (pt is None or self.last is None or self.last <= pt):
+            self.add_next()
+        return self
+
+    def add_next(self):
+        """Add the next tag to the tree; close the remaining tags when there are none left."""
+
+        entry = next(self.tags, None)
+        if entry is None:
+            self.unwind(1, self.window[1])
+            self.done = True
+            self.tags = iter(())
+        else:
+            self.add(*entry)
+            self.last = entry[0].begin
+
+    def add(self, tag, is_close):
+        """Add an opening or closing tag."""
+
+        stack, hard, names = self.stack, self.hard, self.names
+        if not is_close:
+            if tag.self_closing:
+                # An optional close tag closes the previous tag of the same name
+                # as long as only optional close tags were opened after it.
+                opened = names.get(tag.name)
+                if opened and hard[-1] < opened[-1].depth:
+                    self.unwind(opened[-1].depth, tag.begin)
+
+            node = TagNode(tag, stack[-1], len(stack))
+            stack[-1].children.append(node)
+            self.nodes.append(node)
+            self.opens[tag.begin] = node
+            if tag.single:
+                node.closed(tag)
             else:
-                if self.single_tags is not None and self.single_tags.match(name) is not None:
-                    continue
-                single = False
-                self_closing = False
-            start = m.start(0)
-            end = m.end(0)
-            if not self.scope_check(start):
-                self.prev_match = TagEntry(start, end, name, self_closing, single)
-                self.start = end
-                yield self.prev_match
-        self.done = True
+                stack.append(node)
+                hard.append(hard[-1] if tag.self_closing else node.depth)
+                names.setdefault(tag.name, []).append(node)
+        else:
+            opened = names.get(tag.name)
+            if opened:
+                node = opened[-1]
+                self.unwind(node.depth + 1, tag.begin)
+                stack.pop()
+                hard.pop()
+                opened.pop()
+                node.closed(tag)
+                self.closes[tag.begin] = node
+            else:
+                self.unmatched.append(tag)
+
+    def opening(self, pt, limit=None):
+        """
+        Get the node of the opening tag at the point once it is closed.
+
+        With a limit, tags are not read past it, and the node is left open
+        if it is not closed before then.
+        """
+
+        self.build(pt=pt)
+        node = self.opens.get(pt)
+        while node is not None and node.end is None and not self.done and (limit is None or self.last <= limit):
+            self.add_next()
+        return node
+
+    def closing(self, pt):
+        """Get the node closed by the closing tag at the point."""
+
+        self.build(pt=pt)
+        return self.closes.get(pt)
+
+    def unwind(self, depth, pt):
+        """Implicitly close all tags on the stack at or above the given depth."""
+
+        stack = self.stack
+        while len(stack) > depth:
+            node = stack.pop()
+            self.hard.pop()
+            self.names[node.open.name].pop()
+            node.close_implied(pt)
+
+    def node_at(self, pt):
+        """
+        Get the innermost tag node that contains the point.
+
+        The last tag opened before the point is found with a binary search
+        and the innermost enclosing tag is one of its ancestors.
+        """
+
+        starts = self.starts
+        idx = bisect_right(starts, pt) - 1
+        node = self.nodes[idx] if idx >= 0 else self.root
+        while node is not self.root and not (node.begin < pt < node.end):
+            node = node.parent
+        return node
+
+    def ancestors(self, pt):
+        """Get the tag nodes enclosing the point, outermost first."""
+
+        nodes = []
+        node = self.node_at(pt)
+        while node is not self.root:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+    def path(self, pt):
+        """Get the names of the tags enclosing the point, outermost first."""
+
+        return [node.open.name for node in self.ancestors(pt)]
+
+    def siblings(self, node):
+        """Get the tag nodes sharing the node's parent (including the node)."""
+
+        self.build()
+        return node.parent.children
+
+    def next_sibling(self, node):
+        """Get the sibling after the node."""
+
+        self.build()
+        children = node.parent.children
+        return children[node.index + 1] if node.index + 1 < len(children) else None
+
+    def previous_sibling(self, node):
+        """Get the sibling before the node."""
+
+        self.build()
+        return node.parent.children[node.index - 1] if node.index > 0 else None
+
+
+def load_tag_patterns(mode):
+    """Load the tag patterns for the given mode."""
+
+    tag_settings = sublime.load_settings('bh_tag.sublime-settings')
+    tag_open = process_tag_pattern(
+        tag_settings.get("start_tag")[mode],
+        {
+            "attributes": tag_settings.get('attributes', {}).get(mode, ''),
+            "tag_name": tag_settings.get('tag_name', {}).get(mode, '')
+        }
+    )
+
+    tag_close = process_tag_pattern(
+        tag_settings.get("end_tag")[mode]
+    )
+
+    try:
+        self_closing_tags = re.compile(tag_settings.get('self_closing_patterns')[mode], re.I)
+    except Exception:
+        self_closing_tags = None
+
+    try:
+        single_tags = re.compile(tag_settings.get('single_tag_patterns')[mode], re.I)
+    except Exception:
+        single_tags = None
+
+    try:
+        scope_exclude = tag_settings.get("tag_scope_exclude", {}).get(mode, ['string', 'comment'])
+    except Exception:
+        scope_exclude = ['string', 'comment']
+
+    return TagPatterns(tag_open, tag_close, self_closing_tags, single_tags, scope_exclude)
+
+
+def find_tags(view, bfr, window, patterns):
+    """
+    Find all opening and closing tags in the window and yield them in document order.
+
+    Tags are found as they are asked for, and tags in excluded scopes are skipped.
+    """
+
+    start, end = int(window[0]), int(window[1])
+    single_tags = patterns.single_tags
+    self_closing_tags = patterns.self_closing_tags
+    scope_exclude = patterns.scope_exclude
+
+    # An opening and a closing tag can't start at the same point, so the matches are never compared.
+    opens = ((m.start(0), False, m) for m in patterns.tag_open.finditer(bfr, start, end))
+    closes = ((m.start(0), True, m) for m in patterns.tag_close.finditer(bfr, start, end))
+
+    for begin, is_close, m in merge(opens, closes):
+        name = m.group(1).lower()
+        if is_close:
+            if single_tags is not None and single_tags.match(name) is not None:
+                continue
+            tag = TagEntry(begin, m.end(0), name, False, False)
+        else:
+            single = bool(m.group(2) != "")
+            if not single and single_tags is not None:
+                single = single_tags.match(name) is not None
+            self_closing = self_closing_tags is not None and self_closing_tags.match(name) is not None
+            tag = TagEntry(begin, m.end(0), name, self_closing, single)
+        if not scope_check(view, begin, scope_exclude):
+            yield tag, is_close
+
+
+def scope_check(view, pt, scope_exclude):
+    """Check if the tag is in an excluded scope."""
+
+    illegal_scope = False
+    for exclude in scope_exclude:
+        illegal_scope |= bool(view.score_selector(pt, exclude))
+    return illegal_scope
+
+
+def find_cached_tag_tree(view, window, mode):
+    """Get a cached tag tree covering the window of the view's buffer."""
+
+    return bh_tag_cache.find_tree(view, window, mode)
+
+
+def get_tag_tree(view, bfr, window, mode, patterns=None):
+    """
+    Get a tag tree covering the window of the view's buffer.
+
+    Trees are cached per view until the buffer changes.  If no buffer
+    is given, it is only read from the view when the tree must be built.
+    """
+
+    tree = bh_tag_cache.find_tree(view, window, mode)
+    if tree is None:
+        if patterns is None:
+            patterns = load_tag_patterns(mode)
+        if bfr is None:
+            bfr = view.substr(sublime.Region(0, view.size()))
+        window = (int(window[0]), int(window[1]))
+        tree = TagTree(window, find_tags(view, bfr, window, patterns))
+        bh_tag_cache.store_tree(view, window, mode, tree)
+    return tree
+
+
+def get_view_tag_tree(view, mode=None):
+    """
+    Get the tag tree for the entire view.
+
+    Returns `None` if the view's syntax has no tag mode.
+    """
+
+    if mode is None:
+        mode = get_tag_mode(view, sublime.load_settings("bh_tag.sublime-settings").get("tag_mode", {}))
+    if mode is None:
+        return None
+    return get_tag_tree(view, None, (0, view.size()), mode).build()
 
 
 class TagMatch(object):
@@ -190,35 +439,18 @@ class TagMatch(object):
     def __init__(self, view, bfr, threshold, first, second, center, outside_adj, mode):
         """Prepare tag match object."""
 
-        tag_settings = sublime.load_settings('bh_tag.sublime-settings')
         self.view = view
         self.bfr = bfr
         self.mode = mode
-        self.tag_open = process_tag_pattern(
-            tag_settings.get("start_tag")[mode],
-            {
-                "attributes": tag_settings.get('attributes', {}).get(mode, ''),
-                "tag_name": tag_settings.get('tag_name', {}).get(mode, '')
-            }
-        )
-
-        self.tag_close = process_tag_pattern(
-            tag_settings.get("end_tag")[mode]
-        )
-
-        try:
-            self.self_closing_tags = re.compile(tag_settings.get('self_closing_patterns')[self.mode], re.I)
-        except Exception:
-            self.self_closing_tags = None
-
-        try:
-            self.single_tags = re.compile(tag_settings.get('single_tag_patterns')[self.mode], re.I)
-        except Exception:
-            self.single_tags = None
+        self.threshold = (0, len(bfr)) if threshold is None else threshold
+        self.patterns = load_tag_patterns(mode)
+        self.tag_open = self.patterns.tag_open
+        self.tag_close = self.patterns.tag_close
+        self.self_closing_tags = self.patterns.self_closing_tags
+        self.single_tags = self.patterns.single_tags
 
         tag, tag_type, tag_end = self.get_first_tag(first[0])
         self.left, self.right = None, None
-        self.window = None
         self.no_tag = False
         if outside_adj:
             if first[0] == center:
@@ -232,10 +464,8 @@ class TagMatch(object):
             else:
                 if tag_type == "open":
                     self.left = tag
-                    self.window = (tag_end, len(bfr) if threshold is None else threshold[1])
                 else:
                     self.right = tag
-                    self.window = (0 if threshold is None else threshold[0], first[0])
         else:
             self.left = first
             self.right = second
@@ -275,32 +505,6 @@ class TagMatch(object):
                 self.center = offset
         return tag, tag_type, end
 
-    def compare_tags(self, left, right):
-        """Check if tags share the same name."""
-
-        return left.name == right.name
-
-    def resolve_self_closing(self, stack, c):
-        """Handle self closing tags."""
-
-        found_tag = None
-        b = stack[-1]
-        if self.compare_tags(b, c):
-            found_tag = b
-            stack.pop()
-        else:
-            while b is not None and b.self_closing:
-                stack.pop()
-                if len(stack):
-                    b = stack[-1]
-                    if self.compare_tags(b, c):
-                        found_tag = b
-                        stack.pop()
-                        break
-                else:
-                    b = None
-        return found_tag
-
     def match(self):
         """
         Find the corresponding open or close.
@@ -308,68 +512,24 @@ class TagMatch(object):
         Match only if either the close or open is already found.
         """
 
-        stack = []
-
         # No tags to search for
         if self.no_tag or (self.left and self.right):
             return self.left, self.right
 
-        # Init tag matching objects
-        osearch = TagSearch(
-            self.view, self.bfr, self.window,
-            self.center, self.tag_open,
-            0, self.mode,
-            self.self_closing_tags,
-            self.single_tags
-        )
-        csearch = TagSearch(
-            self.view, self.bfr, self.window,
-            self.center, self.tag_close,
-            1, self.mode,
-            self.self_closing_tags,
-            self.single_tags
-        )
-
-        # Searching for opening or closing tag to match
-        match_type = TAG_OPEN if self.right else TAG_CLOSE
-
-        # Match the tags
-        for c in csearch.get_tags():
-            if len(stack) and osearch.done:
-                if self.resolve_self_closing(stack, c):
-                    continue
-            for o in osearch.get_tags():
-                if o.end <= c.begin:
-                    if not o.single:
-                        stack.append(o)
-                    continue
-                else:
-                    osearch.remember()
-                    break
-
-            if len(stack):
-                if self.resolve_self_closing(stack, c):
-                    continue
-            elif match_type == TAG_OPEN and not osearch.done:
-                continue
-            if match_type == TAG_CLOSE:
-                if self.left is None or self.compare_tags(self.left, c):
-                    self.right = c
-                elif self.left.self_closing:
-                    self.right = self.left
-            break
+        tree = get_tag_tree(self.view, self.bfr, self.threshold, self.mode, self.patterns)
 
-        if match_type == TAG_OPEN:
-            # Find the rest of the the unmatched left side open brackets
-            # approaching the cursor if all closing brackets were matched
-            # Select the most recent open bracket on the stack.
-            for o in osearch.get_tags():
-                if not o.single:
-                    stack.append(o)
-            if len(stack):
-                self.left = self.resolve_self_closing(stack, self.right)
-        elif self.right is None and self.left is not None and self.left.self_closing:
-            # Account for the opening tag that was found being a self closing
-            self.right = self.left
+        # The tree may end after the threshold, so only take tags inside of it.
+        if self.right:
+            # Find the opening tag that the closing tag closed
+            node = tree.closing(self.right.begin)
+            if node is not None and node.begin >= self.threshold[0]:
+                self.left = node.open
+        else:
+            node = tree.opening(self.left.begin, self.threshold[1])
+            if node is not None and node.close is not None and node.end <= self.threshold[1]:
+                self.right = node.close
+            elif self.left.self_closing:
+                # Account for the opening tag that was found being a self closing
+                self.right = self.left
 
         return self.left, self.right
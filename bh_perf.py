@@ -0,0 +1,429 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+"""
+import sublime
+import sublime_plugin
+from collections import deque, OrderedDict
+from os import makedirs
+from os.path import exists, join
+from time import perf_counter, strftime
+import json
+from BracketHighlighter.bh_logging import debug, log
+
+PERF_HISTORY = 100
+PERF_KEYS = 50
+PERF_API_TOP = 10
+LATENCY_SAMPLES = 1000
+LATENCY_BUCKETS = (0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+PERCENTILES = (50, 95, 99)
+PHASES = ("snapshot", "findall", "scope", "match", "callbacks", "highlighting", "plugin", "render")
+
+# Timer of the match in progress.  It is only ever set when the timers are enabled,
+# so instrumented code only needs to check it against `None`.
+timer = None
+enabled = False
+count_api_calls = False
+view_stats = OrderedDict()
+language_stats = OrderedDict()
+api_stats = {}
+last_api_calls = {}
+latency_stats = OrderedDict()
+pending_event = None
+event_start = None
+
+
+class PhaseTimer(object):
+    """
+    Time the phases of a match.
+
+    Phases can nest; the time of a nested phase is only charged to it,
+    not to the phase it was started in.
+    """
+
+    def __init__(self):
+        """Start timing the match."""
+
+        self.phases = {}
+        self.calls = {}
+        self.stack = ["match"]
+        self.start = self.last = perf_counter()
+
+    def charge(self, now):
+        """Charge the time since the last change to the current phase."""
+
+        phase = self.stack[-1]
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def begin(self, phase):
+        """Begin a phase."""
+
+        self.charge(perf_counter())
+        self.stack.append(phase)
+
+    def end(self):
+        """End the current phase."""
+
+        self.charge(perf_counter())
+        self.stack.pop()
+
+    def stop(self):
+        """Stop timing and return the total time."""
+
+        now = perf_counter()
+        self.charge(now)
+        return now - self.start
+
+
+class ViewProxy(object):
+    """Count and time the Sublime API calls made through a view."""
+
+    def __init__(self, view, calls):
+        """Wrap the view and record the calls in the given dictionary."""
+
+        self._view = view
+        self._calls = calls
+
+    def __getattr__(self, name):
+        """Get the view attribute, wrapping methods to account for them."""
+
+        attr = getattr(self._view, name)
+        if not callable(attr):
+            return attr
+
+        calls = self._calls
+
+        def call(*args, **kwargs):
+            """Call the view method and account for it."""
+
+            start = perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                entry = calls.get(name)
+                if entry is None:
+                    calls[name] = [1, elapsed]
+                else:
+                    entry[0] += 1
+                    entry[1] += elapsed
+        return call
+
+
+def account_view(view):
+    """Wrap the view to account for its API calls if enabled."""
+
+    if timer is not None and count_api_calls:
+        return ViewProxy(view, timer.calls)
+    return view
+
+
+def worst_calls(calls, count=PERF_API_TOP):
+    """Get the API methods that took the most time."""
+
+    return sorted(calls.items(), key=lambda c: c[1][1], reverse=True)[:count]
+
+
+class LatencyHistogram(object):
+    """Latency of an event type, split into the time queued and the time computing."""
+
+    def __init__(self):
+        """Setup the histogram."""
+
+        self.count = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, queued, compute):
+        """Add an event's latency in milliseconds."""
+
+        total = queued + compute
+        index = 0
+        for bound in LATENCY_BUCKETS:
+            if total <= bound:
+                break
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.samples.append((total, queued, compute))
+
+    def percentiles(self, field):
+        """Get the percentiles of the recent samples of a field (0: total, 1: queued, 2: compute)."""
+
+        values = sorted(sample[field] for sample in self.samples)
+        result = OrderedDict()
+        for pct in PERCENTILES:
+            rank = max(0, -(-pct * len(values) // 100) - 1)
+            result["p%d" % pct] = round(values[rank], 3) if values else None
+        return result
+
+    def export(self):
+        """Export the histogram as a dictionary."""
+
+        buckets = OrderedDict()
+        for bound, count in zip(LATENCY_BUCKETS + (None,), self.buckets):
+            buckets["<=%gms" % bound if bound is not None else ">%gms" % LATENCY_BUCKETS[-1]] = count
+        return OrderedDict(
+            [
+                ("count", self.count),
+                ("total", self.percentiles(0)),
+                ("queued", self.percentiles(1)),
+                ("compute", self.percentiles(2)),
+                ("buckets", buckets)
+            ]
+        )
+
+
+def note_event(kind, replace=False):
+    """Note an event that will lead to a match, unless one is already waiting."""
+
+    global pending_event
+    if pending_event is None or replace:
+        pending_event = (kind, perf_counter())
+
+
+def begin_event():
+    """The match for the waiting event is starting."""
+
+    global event_start
+    if pending_event is not None:
+        event_start = perf_counter()
+
+
+def end_event():
+    """The match for the waiting event is done; record the latency."""
+
+    global pending_event
+    global event_start
+    if pending_event is not None and event_start is not None:
+        kind, queued = pending_event
+        histogram = latency_stats.get(kind)
+        if histogram is None:
+            histogram = LatencyHistogram()
+            latency_stats[kind] = histogram
+        histogram.add((event_start - queued) * 1000, (perf_counter() - event_start) * 1000)
+    pending_event = None
+    event_start = None
+
+
+def latency_report():
+    """Get all the latency histograms."""
+
+    report = OrderedDict()
+    for kind, histogram in latency_stats.items():
+        report[kind] = histogram.export()
+    return report
+
+
+def cache_file(name, ext):
+    """Get a new time stamped file path in BracketHighlighter's cache directory."""
+
+    folder = join(sublime.cache_path(), "BracketHighlighter")
+    if not exists(folder):
+        makedirs(folder)
+    return join(folder, "%s-%s.%s" % (name, strftime("%Y%m%d-%H%M%S"), ext))
+
+
+def export_latency():
+    """Write the latency histograms to a JSON file in the cache directory and return its path."""
+
+    path = cache_file("latency", "json")
+    data = OrderedDict(
+        [
+            ("version", sublime.version()),
+            ("platform", sublime.platform()),
+            ("arch", sublime.arch()),
+            ("time", strftime("%Y-%m-%dT%H:%M:%S")),
+            ("events", latency_report())
+        ]
+    )
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+    return path
+
+
+def begin_match():
+    """Start timing a match if the timers are enabled."""
+
+    global timer
+    timer = PhaseTimer() if enabled else None
+
+
+def cancel_match():
+    """Stop timing a match without recording it."""
+
+    global timer
+    timer = None
+
+
+def end_match(view, language):
+    """Stop timing the match and record the phases."""
+
+    global timer
+    if timer is None:
+        return
+    total = timer.stop()
+    phases = timer.phases
+    calls = dict((name, list(entry)) for name, entry in timer.calls.items())
+    timer = None
+
+    if calls:
+        last_api_calls.clear()
+        last_api_calls.update(calls)
+        for name, (count, elapsed) in calls.items():
+            entry = api_stats.get(name)
+            if entry is None:
+                api_stats[name] = [count, elapsed]
+            else:
+                entry[0] += count
+                entry[1] += elapsed
+
+    for stats, key in ((view_stats, view.id()), (language_stats, language)):
+        history = stats.get(key)
+        if history is None:
+            if len(stats) >= PERF_KEYS:
+                stats.popitem(last=False)
+            history = deque(maxlen=PERF_HISTORY)
+            stats[key] = history
+        history.append((total, phases))
+
+    debug(
+        lambda: "Match %.2fms (%s)" % (
+            total * 1000,
+            ", ".join("%s %.2fms" % (p, phases[p] * 1000) for p in PHASES if p in phases)
+        )
+    )
+    if calls:
+        debug(
+            lambda: "API calls: %s" % ", ".join(
+                "%s %dx %.2fms" % (name, count, elapsed * 1000) for name, (count, elapsed) in worst_calls(calls, 3)
+            )
+        )
+
+
+def summarize(history):
+    """Summarize the recorded matches."""
+
+    count = len(history)
+    totals = [total for total, phases in history]
+    lines = [
+        "    matches: %d, mean: %.2fms, max: %.2fms" % (
+            count, sum(totals) * 1000 / count, max(totals) * 1000
+        )
+    ]
+    for phase in PHASES:
+        times = [phases[phase] for total, phases in history if phase in phases]
+        if times:
+            lines.append(
+                "    %-12s mean: %.2fms, max: %.2fms" % (
+                    phase, sum(times) * 1000 / count, max(times) * 1000
+                )
+            )
+    return lines
+
+
+def perf_report():
+    """Create the report of the recorded matches."""
+
+    text = []
+    for label, stats in (("Language", language_stats), ("View", view_stats)):
+        for key, history in stats.items():
+            if history:
+                text.append("%s %s (last %d matches):" % (label, key, len(history)))
+                text.extend(summarize(history))
+                text.append("")
+    for label, calls in (("API calls of the last match", last_api_calls), ("API calls of all matches", api_stats)):
+        if calls:
+            text.append("%s (worst %d):" % (label, PERF_API_TOP))
+            for name, (count, elapsed) in worst_calls(calls):
+                text.append("    %-16s calls: %d, time: %.2fms" % (name, count, elapsed * 1000))
+            text.append("")
+    for kind, histogram in latency_stats.items():
+        text.append("Event %s (%d events):" % (kind, histogram.count))
+        for field, label in ((0, "total"), (1, "queued"), (2, "compute")):
+            text.append(
+                "    %-8s %s" % (
+                    label,
+                    ", ".join(
+                        "%s: %s" % (k, "%.2fms" % v if v is not None else "-")
+                        for k, v in histogram.percentiles(field).items()
+                    )
+                )
+            )
+        text.append("")
+    if not text:
+        text.append(
+            "No matches recorded." if enabled else "Performance timers are disabled; enable \"perf_enable\"."
+        )
+    return "\n".join(text) + "\n"
+
+
+def clear_stats():
+    """Clear the recorded matches."""
+
+    view_stats.clear()
+    language_stats.clear()
+    api_stats.clear()
+    last_api_calls.clear()
+    latency_stats.clear()
+
+
+def show_report(window, name, text):
+    """Show a debug report in a new scratch view."""
+
+    view = window.new_file()
+    view.run_command("bh_debug_rule_edit", {"text": text})
+    view.set_name("[bh_debug] %s" % name)
+    view.set_read_only(True)
+    view.set_scratch(True)
+
+
+class BhShowPerfCommand(sublime_plugin.WindowCommand):
+    """Show the match timings."""
+
+    def run(self, clear=False):
+        """Show the timings in a new view, or clear them."""
+
+        if clear:
+            clear_stats()
+            return
+
+        show_report(self.window, "Performance", perf_report())
+
+
+class BhExportLatencyCommand(sublime_plugin.ApplicationCommand):
+    """Export the latency histograms."""
+
+    def run(self):
+        """Write the histograms to the cache directory."""
+
+        if not latency_stats:
+            sublime.status_message("BracketHighlighter: no latency recorded")
+            return
+        path = export_latency()
+        log("Latency exported to %s" % path)
+        sublime.status_message("BracketHighlighter: latency exported to %s" % path)
+
+
+def update_settings():
+    """Update whether the timers are enabled."""
+
+    global enabled
+    global count_api_calls
+    settings = sublime.load_settings("bh_core.sublime-settings")
+    enabled = bool(settings.get("perf_enable", False))
+    count_api_calls = bool(settings.get("perf_api_calls", False))
+    if not enabled:
+        clear_stats()
+
+
+def plugin_loaded():
+    """Setup the timers."""
+
+    settings = sublime.load_settings("bh_core.sublime-settings")
+    update_settings()
+    settings.clear_on_change('bh_perf')
+    settings.add_on_change('bh_perf', update_settings)
@@ -21,6 +21,8 @@ class Payload(object):
     status = False
     plugin = None
     args = None
+    entries = None
+    results = None
 
     @classmethod
     def clear(cls):
@@ -29,9 +31,11 @@ class Payload(object):
         cls.status = False
         cls.plugin = None
         cls.args = None
+        cls.entries = None
+        cls.results = None
 
 
-class BracketRegion (namedtuple('BracketRegion', ['begin', 'end'], verbose=False)):
+class BracketRegion (namedtuple('BracketRegion', ['begin', 'end'])):
     """Bracket Regions for plugins."""
 
     def move(self, begin, end):
@@ -120,18 +124,30 @@ def import_module(module, attribute=None):
     return getattr(mod, attribute) if attribute is not None else mod
 
 
+def run_batch(plugin, edit, entries, args):
+    """Run the plugin on all of the matches; `None` is returned if it fails."""
+
+    try:
+        return plugin.run_batch(edit, entries, **args)
+    except Exception:
+        print("BracketHighlighter: Plugin Run Error:\n%s" % str(traceback.format_exc()))
+        return None
+
+
+def run_payload(edit):
+    """Run the payload's plugin on all of the matches."""
+
+    Payload.results = run_batch(Payload.plugin, edit, Payload.entries, Payload.args)
+    Payload.status = Payload.results is not None
+
+
 class BracketPluginRunCommand(sublime_plugin.TextCommand):
     """Sublime run command to run BH plugins."""
 
     def run(self, edit):
         """Run the plugin."""
 
-        try:
-            Payload.args["edit"] = edit
-            Payload.plugin.run(**Payload.args)
-            Payload.status = True
-        except Exception:
-            print("BracketHighlighter: Plugin Run Error:\n%s" % str(traceback.format_exc()))
+        run_payload(edit)
 
 
 class BracketPlugin(object):
@@ -158,40 +174,219 @@ class BracketPlugin(object):
 
         return self.enabled
 
-    def run_command(self, view, name, left, right, selection):
-        """Load arguments into plugin and run."""
+    def run_command(self, view, entries):
+        """
+        Load arguments into plugin and run.
+
+        `entries` is a list of `(name, left, right, selection)` matches.
+        A list of `(left, right, selection, nobracket)` results in the same order
+        is returned along with whether the plugin requested a refresh of the match.
+        """
 
-        nobracket = False
+        results = [(left, right, selection, False) for name, left, right, selection in entries]
         refresh_match = False
-        Payload.status = False
-        Payload.plugin = self.plugin()
-        setattr(Payload.plugin, "left", left)
-        setattr(Payload.plugin, "right", right)
-        setattr(Payload.plugin, "view", view)
-        setattr(Payload.plugin, "selection", selection)
-        setattr(Payload.plugin, "nobracket", False)
-        setattr(Payload.plugin, "refresh_match", False)
-        self.args["edit"] = None
-        self.args["name"] = name
-        Payload.args = self.args
-
-        # Call a TextCommand to run the plugin so it can feed in the Edit object
-        view.run_command("bracket_plugin_run")
-
-        if Payload.status:
-            left = Payload.plugin.left
-            right = Payload.plugin.right
-            selection = Payload.plugin.selection
-            nobracket = Payload.plugin.nobracket
-            refresh_match = Payload.plugin.refresh_match
-        Payload.clear()
-
-        return left, right, selection, nobracket, refresh_match
+        plugin = self.plugin()
+        setattr(plugin, "view", view)
+        setattr(plugin, "refresh_match", False)
+
+        if self.plugin.read_only:
+            # Plugin never edits the buffer, so call it directly without an Edit object
+            batch = run_batch(plugin, None, entries, self.args)
+        else:
+            # Call a TextCommand to run the plugin so it can feed in the Edit object
+            Payload.status = False
+            Payload.plugin = plugin
+            Payload.args = self.args
+            Payload.entries = entries
+            view.run_command("bracket_plugin_run")
+            batch = Payload.results if Payload.status else None
+            Payload.clear()
+
+        if batch is not None:
+            results = batch
+            refresh_match = plugin.refresh_match
+
+        return results, refresh_match
+
+
+def shift_result(result, offset):
+    """Shift the regions of a plugin result by the given offset."""
+
+    left, right, selection, nobracket = result
+    if left is not None:
+        left = left.move(left.begin + offset, left.end + offset)
+    if right is not None:
+        right = right.move(right.begin + offset, right.end + offset)
+    selection = [sublime.Region(sel.a + offset, sel.b + offset) for sel in selection]
+    return left, right, selection, nobracket
 
 
 class BracketPluginCommand(object):
     """Bracket Plugin base class."""
 
+    # Plugins that never insert or remove text can set this to be run
+    # directly instead of through a `TextCommand`.
+    read_only = False
+
+    # Plugins whose result doesn't depend on the selection they are given can
+    # set this so selections sharing a bracket pair only run the plugin once.
+    shares_results = False
+
+    def edits_inside(self, **kwargs):
+        """
+        Check if the plugin's edits stay between the start and end of the brackets.
+
+        Matches that don't overlap are then run without tracking their regions
+        through the edits.  The arguments are the plugin's arguments.
+        """
+
+        return False
+
+    def run_batch(self, edit, entries, **kwargs):
+        """
+        Run the plugin on all of the matches under one edit.
+
+        Matches are processed from the end of the buffer to the start, so
+        the edits of one match never move the brackets of the matches still
+        waiting to be processed; the results of the processed matches are
+        shifted by the size change of the edits made before them.
+        If the plugin shares its results, selections sharing the same bracket
+        pair run the plugin only once; if the plugin leaves the selection as
+        it was, each of them keeps its own selection.  Overlapping pairs, and
+        plugins whose edits may reach outside of the brackets, fall back to
+        letting Sublime track the regions.
+        """
+
+        unique = []
+        groups = []
+        index = {}
+        for name, left, right, selection in entries:
+            key = (left, right)
+            if not self.shares_results:
+                key += tuple((sel.a, sel.b) for sel in selection)
+            if key not in index:
+                index[key] = len(unique)
+                unique.append((name, left, right, selection))
+                groups.append([])
+            else:
+                groups[index[key]].append(selection)
+
+        order = sorted(range(len(unique)), key=lambda i: unique[i][1].begin)
+        overlapping = not self.read_only and (
+            not self.edits_inside(**kwargs) or
+            any(unique[a][2].end > unique[b][1].begin for a, b in zip(order[:-1], order[1:]))
+        )
+        if overlapping:
+            results, shared = self.run_tracked(edit, unique, order, groups, kwargs)
+        else:
+            results = [None] * len(unique)
+            shifts = [0] * len(unique)
+            kept = [False] * len(unique)
+            total = 0
+            for i in reversed(order):
+                size = self.view.size()
+                results[i] = self.run_entry(edit, unique[i], kwargs)
+                kept[i] = results[i][2] is unique[i][3]
+                total += self.view.size() - size
+                shifts[i] = total
+            shared = []
+            for i, result in enumerate(results):
+                offset = total - shifts[i]
+                if offset:
+                    results[i] = shift_result(result, offset)
+                shared.append(
+                    [
+                        [sublime.Region(sel.a + offset, sel.b + offset) for sel in selection]
+                        for selection in groups[i]
+                    ] if kept[i] else []
+                )
+
+        batch = []
+        for name, left, right, selection in entries:
+            key = (left, right)
+            if not self.shares_results:
+                key += tuple((sel.a, sel.b) for sel in selection)
+            i = index[key]
+            result = results[i]
+            if selection is not unique[i][3] and shared[i]:
+                # Give a selection sharing the pair its own selection back.
+                result = result[:2] + (shared[i].pop(0),) + result[3:]
+            batch.append(result)
+        return batch
+
+    def run_tracked(self, edit, entries, order, groups, kwargs):
+        """
+        Run the plugin on overlapping matches, letting Sublime track the regions through the edits.
+
+        The selections sharing each match are tracked too, and are returned
+        for the matches whose plugin run left the selection as it was.
+        """
+
+        view = self.view
+        keys = [
+            ("bh_plugin_left_%d" % i, "bh_plugin_right_%d" % i, "bh_plugin_sel_%d" % i) for i in range(len(entries))
+        ]
+        flags = sublime.HIDDEN
+
+        for (name, left, right, selection), (lkey, rkey, skey), group in zip(entries, keys, groups):
+            view.add_regions(lkey, [left.toregion()], "", "", flags)
+            view.add_regions(rkey, [right.toregion()], "", "", flags)
+            view.add_regions(skey, selection, "", "", flags)
+            for j, shared in enumerate(group):
+                view.add_regions("%s_%d" % (skey, j), shared, "", "", flags)
+
+        missing = set()
+        kept = [False] * len(entries)
+        for i in reversed(order):
+            name, left, right, selection = entries[i]
+            lkey, rkey, skey = keys[i]
+            lregion = view.get_regions(lkey)[0]
+            rregion = view.get_regions(rkey)[0]
+            selection = view.get_regions(skey)
+            entry = (
+                name,
+                left.move(lregion.begin(), lregion.end()),
+                right.move(rregion.begin(), rregion.end()),
+                selection
+            )
+            left, right, result_selection, nobracket = self.run_entry(edit, entry, kwargs)
+            kept[i] = result_selection is selection
+            for key, bracket in ((lkey, left), (rkey, right)):
+                if bracket is None:
+                    missing.add(key)
+                else:
+                    view.add_regions(key, [bracket.toregion()], "", "", flags)
+            view.add_regions(skey, result_selection, "", "", flags)
+            entries[i] = (name, left, right, nobracket)
+
+        results = []
+        shared = []
+        for (name, left, right, nobracket), (lkey, rkey, skey), group, keep in zip(entries, keys, groups, kept):
+            if lkey not in missing:
+                lregion = view.get_regions(lkey)[0]
+                left = left.move(lregion.begin(), lregion.end())
+            if rkey not in missing:
+                rregion = view.get_regions(rkey)[0]
+                right = right.move(rregion.begin(), rregion.end())
+            results.append((left, right, view.get_regions(skey), nobracket))
+            shared.append([view.get_regions("%s_%d" % (skey, j)) for j in range(len(group))] if keep else [])
+            for key in (lkey, rkey, skey):
+                view.erase_regions(key)
+            for j in range(len(group)):
+                view.erase_regions("%s_%d" % (skey, j))
+        return results, shared
+
+    def run_entry(self, edit, entry, kwargs):
+        """Run the plugin on one match and return the result."""
+
+        name, left, right, selection = entry
+        self.left = left
+        self.right = right
+        self.selection = selection
+        self.nobracket = False
+        self.run(edit, name, **kwargs)
+        return self.left, self.right, self.selection, self.nobracket
+
     def run(self, bracket, content, selection):
         """Run the plugin class."""
 
@@ -0,0 +1,237 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+"""
+import sublime
+import sublime_plugin
+from collections import deque
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+import sys
+import BracketHighlighter.bh_perf as bh_perf
+import BracketHighlighter.bh_regions as bh_regions
+import BracketHighlighter.bh_tag_cache as bh_tag_cache
+from BracketHighlighter.bh_logging import log
+try:
+    import cProfile
+    import pstats
+    PROFILE_AVAILABLE = True
+except ImportError:
+    PROFILE_AVAILABLE = False
+try:
+    import tracemalloc
+    TRACE_AVAILABLE = True
+except ImportError:
+    # Not available before Python 3.4
+    TRACE_AVAILABLE = False
+
+PROFILE_SUMMARY_LINES = 60
+TRACE_TOP = 15
+SKIP_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+
+# Profiler for the next matches; `None` when no capture was requested.
+profiler = None
+remaining = 0
+
+# Whether allocations of matches are traced, and the net and peak allocation of the last match.
+tracing = False
+last_trace = None
+
+
+def run(fn, *args):
+    """Run the match, tracing its allocations and profiling it as requested."""
+
+    global last_trace
+    if tracing:
+        # Only the match's allocations are kept, which also resets the peak on every version of Python.
+        tracemalloc.clear_traces()
+    try:
+        if profiler is not None:
+            return profile(fn, *args)
+        return fn(*args)
+    finally:
+        if tracing:
+            last_trace = tracemalloc.get_traced_memory()
+
+
+def profile(fn, *args):
+    """Run the function under the profiler and save the capture once enough matches are profiled."""
+
+    global profiler
+    global remaining
+    profiler.enable()
+    try:
+        return fn(*args)
+    finally:
+        profiler.disable()
+        remaining -= 1
+        if remaining <= 0:
+            capture = profiler
+            profiler = None
+            save_profile(capture)
+
+
+def save_profile(capture):
+    """Write the capture to a `pstats` file and a sorted text summary."""
+
+    path = bh_perf.cache_file("profile", "pstats")
+    capture.dump_stats(path)
+    summary = path[:-len("pstats")] + "txt"
+    with open(summary, "w") as f:
+        stats = pstats.Stats(path, stream=f)
+        stats.sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+        stats.sort_stats("tottime").print_stats(PROFILE_SUMMARY_LINES)
+    log("Profile written to %s" % path)
+    sublime.status_message("BracketHighlighter: profile written to %s" % summary)
+
+
+class BhProfileMatchesCommand(sublime_plugin.ApplicationCommand):
+    """Profile the next matches."""
+
+    def run(self, count=10):
+        """Profile the next `count` matches."""
+
+        global profiler
+        global remaining
+        if not PROFILE_AVAILABLE:
+            log("cProfile is not available")
+            return
+        profiler = cProfile.Profile()
+        remaining = count
+        sublime.status_message("BracketHighlighter: profiling the next %d matches" % count)
+
+
+def deep_size(obj, seen=None):
+    """
+    Get the size of an object and everything it references.
+
+    Modules, classes, and functions are not followed.
+    """
+
+    if seen is None:
+        seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SKIP_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        elif not isinstance(obj, (str, bytes, int, float)):
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return size
+
+
+def format_size(size):
+    """Format a size in bytes."""
+
+    return "%.1f KiB" % (size / 1024.0) if size >= 1024 else "%d B" % size
+
+
+def view_names():
+    """Get the names of the open views by id."""
+
+    names = {}
+    for window in sublime.windows():
+        for view in window.views():
+            names[view.id()] = view.file_name() or view.name() or "untitled"
+    return names
+
+
+def memory_report():
+    """Create the report of the memory held by BracketHighlighter."""
+
+    import BracketHighlighter.bh_core as bh_core
+
+    caches = []
+    views = {}
+    if bh_core.bh_match is not None:
+        caches.append(("Listener core", deep_size(bh_core.bh_match.__self__)))
+    caches.append(("Key command cores (%d)" % len(bh_core.key_cores), deep_size(bh_core.key_cores)))
+    caches.append(("Gutter icons", deep_size(bh_regions.icon_cache)))
+    caches.append(
+        (
+            "Performance records",
+            deep_size(
+                [bh_perf.view_stats, bh_perf.language_stats, bh_perf.api_stats, bh_perf.latency_stats]
+            )
+        )
+    )
+
+    per_view = [
+        ("Last match", bh_core.BhCore.last_match),
+        ("Region keys", bh_regions.view_regions),
+        ("Tag trees", bh_tag_cache.tag_tree_cache)
+    ]
+    for label, cache in per_view:
+        caches.append((label, deep_size(cache)))
+        for view_id, value in cache.items():
+            views.setdefault(view_id, []).append((label, deep_size(value)))
+
+    text = ["Caches:"]
+    for label, size in caches:
+        text.append("    %-40s %s" % (label, format_size(size)))
+    text.append("")
+
+    names = view_names()
+    for view_id, entries in sorted(views.items()):
+        text.append("View %d: %s" % (view_id, names.get(view_id, "(closed)")))
+        for label, size in entries:
+            text.append("    %-40s %s" % (label, format_size(size)))
+        text.append("")
+
+    if not TRACE_AVAILABLE:
+        text.append("Allocation tracing is not available in this version of Python.")
+    elif not tracing:
+        text.append("Allocation tracing is off; run the command with \"trace\": true to start it.")
+    else:
+        if last_trace is None:
+            text.append("No match has run since tracing started.")
+        else:
+            net, peak = last_trace
+            text.append("Last match: net allocation %s, peak allocation %s" % (format_size(net), format_size(peak)))
+        text.append("")
+        text.append("Largest allocations of the last match still held by BracketHighlighter:")
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(True, "*BracketHighlighter*"),
+                tracemalloc.Filter(True, "bh_modules.*")
+            ]
+        )
+        for stat in snapshot.statistics("lineno")[:TRACE_TOP]:
+            text.append("    %s" % stat)
+    return "\n".join(text) + "\n"
+
+
+class BhMemoryReportCommand(sublime_plugin.WindowCommand):
+    """Report the memory held by BracketHighlighter."""
+
+    def run(self, trace=None):
+        """Show the report, or start or stop tracing allocations."""
+
+        global tracing
+        global last_trace
+        if trace is not None:
+            if not TRACE_AVAILABLE:
+                log("tracemalloc is not available")
+            elif trace and not tracing:
+                tracemalloc.start()
+                tracing = True
+            elif not trace and tracing:
+                tracing = False
+                last_trace = None
+                tracemalloc.stop()
+            return
+
+        bh_perf.show_report(self.window, "Memory", memory_report())
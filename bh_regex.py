@@ -0,0 +1,62 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+"""
+from backrefs import bre
+import re
+
+# Escapes and character classes only `backrefs` understands.  Escaped backslashes are matched
+# as pairs so `\\p` is not taken for `\p`.
+RE_BACKREFS = re.compile(r'\\(.)|\[:\^?[A-Za-z]+:\]', re.DOTALL)
+BACKREFS_ESCAPES = frozenset("cCehlLmMNpPQRX")
+# Escapes that can stand for a letter or a group, other escapes, group names, and letters.
+RE_CASED = re.compile(
+    r'(\\[xuUN0-9]|\(\?P=)|\\.|\(\?(?:P<|\()[A-Za-z_]\w*|([A-Za-z]|[^\x00-\x7f])', re.DOTALL
+)
+
+
+def needs_backrefs(pattern):
+    """Check if a pattern uses syntax of `backrefs` that `re` does not have."""
+
+    for m in RE_BACKREFS.finditer(pattern):
+        if m.group(1) is None or m.group(1) in BACKREFS_ESCAPES:
+            return True
+    return False
+
+
+def uses_case(pattern):
+    """
+    Check if matching a pattern can depend on case.
+
+    Letters, characters outside of ASCII, escapes of characters by code, and
+    references to groups, which are matched again ignoring case, can.  The
+    names of named groups can't.
+    """
+
+    for m in RE_CASED.finditer(pattern):
+        if m.group(1) is not None or m.group(2) is not None:
+            return True
+    return False
+
+
+def compile_search(pattern, flags, select=True):
+    """
+    Compile a rule pattern.
+
+    Patterns are compiled with `backrefs`, but with `select`, patterns that
+    use none of its syntax are compiled with `re`, which skips processing the
+    pattern, and `IGNORECASE` is dropped from patterns whose matches do not
+    depend on case.
+    """
+
+    if not select or needs_backrefs(pattern):
+        return bre.compile_search(pattern, flags)
+    try:
+        if flags & re.IGNORECASE and not uses_case(pattern):
+            flags &= ~re.IGNORECASE
+        return re.compile(pattern, flags)
+    except re.error:
+        # Syntax `re` is missing in this version of Python.
+        return bre.compile_search(pattern, flags)
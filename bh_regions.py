@@ -21,6 +21,16 @@ DEFAULT_STYLES = {
 }
 HV_RSVD_VALUES = ["__default__", "__bracket__"]
 
+icon_cache = {}
+icon_styles = None
+
+# Views being matched and the region keys applied to each view, by view id.
+# Kept across reloads so regions applied before a reload can still be cleared.
+if 'busy_views' not in globals():
+    busy_views = set()
+if 'view_regions' not in globals():
+    view_regions = {}
+
 
 def underline(regions):
     """Convert sublime regions into underline regions."""
@@ -35,13 +45,42 @@ def underline(regions):
     return r
 
 
+def set_busy(view, busy):
+    """Flag whether the view is currently being matched."""
+
+    if busy:
+        busy_views.add(view.id())
+    else:
+        busy_views.discard(view.id())
+
+
+def is_busy(view):
+    """Check if the view is currently being matched."""
+
+    return view.id() in busy_views
+
+
+def clear_regions(view):
+    """Clear the regions applied to the view."""
+
+    for region_key in view_regions.pop(view.id(), []):
+        view.erase_regions(region_key)
+
+
+def forget_view(view):
+    """Forget the state of a closed view."""
+
+    busy_views.discard(view.id())
+    view_regions.pop(view.id(), None)
+
+
 def clear_all_regions():
     """Clear all regions."""
 
     for window in sublime.windows():
         for view in window.views():
-            for region_key in view.settings().get("bh_regions", []):
-                view.erase_regions(region_key)
+            if view.id() in view_regions:
+                clear_regions(view)
 
 
 def select_bracket_style(option, minimap):
@@ -72,6 +111,27 @@ def select_bracket_style(option, minimap):
 
 
 def select_bracket_icons(option, icon_path):
+    """Get the gutter icons of the option, locating them only the first time."""
+
+    key = (icon_path, option)
+    icons = icon_cache.get(key)
+    if icons is None:
+        icons = find_bracket_icons(option, icon_path)
+        icon_cache[key] = icons
+    return icons
+
+
+def clear_icon_cache():
+    """Clear the located icons if the bracket styles have changed."""
+
+    global icon_styles
+    styles = sublime.load_settings("bh_core.sublime-settings").get("bracket_styles", DEFAULT_STYLES)
+    if styles != icon_styles:
+        icon_styles = styles
+        icon_cache.clear()
+
+
+def find_bracket_icons(option, icon_path):
     """Configure custom gutter icons if they can be located."""
 
     icon = ""
@@ -489,8 +549,7 @@ class BhRegion(object):
 
         self.change_sel()
 
-        for region_key in self.view.settings().get("bh_regions", []):
-            self.view.erase_regions(region_key)
+        clear_regions(self.view)
 
         regions = []
         icon_type = "no_icon"
@@ -517,7 +576,16 @@ class BhRegion(object):
                 "bh_" + name + "_content", "no_icon", "content_selections", r, regions, high_visibility
             )
         # Track which regions were set in the view so that they can be cleaned up later.
-        self.view.settings().set("bh_regions", regions)
+        view_regions[self.view.id()] = regions
 
         if self.count_lines:
             sublime.status_message('In Block: Lines ' + str(self.lines) + ', Chars ' + str(self.chars))
+
+
+def plugin_loaded():
+    """Setup icon cache invalidation."""
+
+    settings = sublime.load_settings("bh_core.sublime-settings")
+    clear_icon_cache()
+    settings.clear_on_change('bh_icon_cache')
+    settings.add_on_change('bh_icon_cache', clear_icon_cache)
@@ -6,6 +6,8 @@ License: MIT
 """
 from backrefs import bre
 import BracketHighlighter.bh_plugin as bh_plugin
+import BracketHighlighter.bh_regex as bh_regex
+import BracketHighlighter.bh_scanner as bh_scanner
 from BracketHighlighter.bh_logging import debug, log
 from operator import itemgetter
 import sublime
@@ -59,6 +61,18 @@ def exclude_bracket(enabled, filter_type, language_list, language):
     return exclude
 
 
+def scan_options(settings):
+    """Get the scanner options of the search rules from the settings."""
+
+    return {
+        "literal_scan": bool(settings.get("bracket_literal_scanner", True)),
+        "vector_threshold": int(settings.get("bracket_numpy_threshold", 100000) or 0),
+        "lazy_scan": bool(settings.get("bracket_lazy_scan", True)),
+        "keyword_scan": bool(settings.get("bracket_keyword_scanner", True)),
+        "standard_regex": bool(settings.get("bracket_standard_regex", True))
+    }
+
+
 def process_overrides(rules):
     """Walk the list and merge override rules."""
 
@@ -154,15 +168,15 @@ class BracketDefinition(object):
 class ScopeDefinition(object):
     """Scope bracket definition."""
 
-    def __init__(self, bracket):
+    def __init__(self, bracket, standard_regex=False):
         """Setup the bracket object by reading the passed in dictionary."""
 
         self.style = bracket.get("style", BH_STYLE)
-        self.open = bre.compile_search(
-            "\\A" + bracket.get("open", ""), bre.MULTILINE | bre.IGNORECASE
+        self.open = bh_regex.compile_search(
+            "\\A" + bracket.get("open", ""), bre.MULTILINE | bre.IGNORECASE, standard_regex
         )
-        self.close = bre.compile_search(
-            bracket.get("close", "") + "\\Z", bre.MULTILINE | bre.IGNORECASE
+        self.close = bh_regex.compile_search(
+            bracket.get("close", "") + "\\Z", bre.MULTILINE | bre.IGNORECASE, standard_regex
         )
         self.name = bracket["name"]
         sub_search = bracket.get("sub_bracket_search", BH_SUB_BRACKET)
@@ -181,7 +195,10 @@ class ScopeDefinition(object):
 class SearchRules(object):
     """Search rule object."""
 
-    def __init__(self, brackets, scopes, string_escape_mode, outside_adj, block_cursor):
+    def __init__(
+        self, brackets, scopes, string_escape_mode, outside_adj, block_cursor, *,
+        literal_scan=False, vector_threshold=0, lazy_scan=False, keyword_scan=False, standard_regex=False
+    ):
         """Setup search rulel object."""
 
         self.bracket_rules = process_overrides(brackets)
@@ -190,8 +207,15 @@ class SearchRules(object):
         self.string_escape_mode = string_escape_mode
         self.outside_adj = outside_adj and not block_cursor
         self.block_cursor = block_cursor
+        self.literal_scan = literal_scan
+        self.vector_threshold = vector_threshold
+        self.lazy_scan = lazy_scan
+        self.keyword_scan = keyword_scan
+        self.standard_regex = standard_regex
         self.sub_pattern = None
         self.pattern = None
+        self.sub_scanner = None
+        self.scanner = None
 
     def load_rules(self, language, modules):
         """Load teh search rules."""
@@ -217,6 +241,8 @@ class SearchRules(object):
         sub_find_regex = []
         self.sub_pattern = None
         self.pattern = None
+        self.sub_scanner = None
+        self.scanner = None
 
         for params in self.bracket_rules:
             if is_valid_definition(params, language):
@@ -253,15 +279,15 @@ class SearchRules(object):
         if len(self.brackets):
             self.brackets = tuple(self.brackets)
             debug(
-                "Bracket Pattern: (%s)\n" % ','.join(names) +
+                lambda: "Bracket Pattern: (%s)\n" % ','.join(names) +
                 "    (Opening|Closing):     (?:%s)\n" % '|'.join(find_regex)
             )
             debug(
-                "SubBracket Pattern: (%s)\n" % ','.join(subnames) +
+                lambda: "SubBracket Pattern: (%s)\n" % ','.join(subnames) +
                 "    (Opening|Closing): (?:%s)\n" % '|'.join(sub_find_regex)
             )
-            self.sub_pattern = bre.compile_search("(?:%s)" % '|'.join(sub_find_regex), bre.MULTILINE | bre.IGNORECASE)
-            self.pattern = bre.compile_search("(?:%s)" % '|'.join(find_regex), bre.MULTILINE | bre.IGNORECASE)
+            self.sub_pattern = self.compile_pattern(sub_find_regex)
+            self.pattern = self.compile_pattern(find_regex)
             if (
                 self.sub_pattern.groups != len(sub_find_regex) or
                 self.pattern.groups != len(find_regex)
@@ -287,6 +313,24 @@ class SearchRules(object):
                 self.brackets = []
                 self.sub_pattern = None
                 self.pattern = None
+            else:
+                self.sub_scanner = bh_scanner.scanner(
+                    sub_find_regex, self.sub_pattern, self.compile_pattern,
+                    literal_scan=self.literal_scan, vector_threshold=self.vector_threshold,
+                    keyword_scan=self.keyword_scan
+                )
+                self.scanner = bh_scanner.scanner(
+                    find_regex, self.pattern, self.compile_pattern,
+                    literal_scan=self.literal_scan, vector_threshold=self.vector_threshold,
+                    keyword_scan=self.keyword_scan
+                )
+
+    def compile_pattern(self, find_regex):
+        """Compile the open and close patterns of the rules into one pattern."""
+
+        return bh_regex.compile_search(
+            "(?:%s)" % '|'.join(find_regex), bre.MULTILINE | bre.IGNORECASE, self.standard_regex
+        )
 
     def parse_scope_definition(self, language, loaded_modules):
         """Parse the scope defintion."""
@@ -297,7 +341,7 @@ class SearchRules(object):
             if is_valid_definition(params, language):
                 try:
                     bh_plugin.load_modules(params, loaded_modules)
-                    entry = ScopeDefinition(params)
+                    entry = ScopeDefinition(params, self.standard_regex)
                     if not entry.enabled:
                         log(
                             SCOPE_ERROR % (
@@ -323,9 +367,8 @@ class SearchRules(object):
                         else:
                             self.scopes[scopes[x]]["brackets"].append(entry)
                     debug(
-                        "Scope Regex (%s)\n    Opening: %s\n    Closing: %s\n" % (
-                            entry.name, entry.open.pattern, entry.close.pattern
-                        )
+                        "Scope Regex (%s)\n    Opening: %s\n    Closing: %s\n",
+                        entry.name, entry.open.pattern, entry.close.pattern
                     )
                 except Exception as e:
                     log(e)
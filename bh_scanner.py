@@ -0,0 +1,479 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+"""
+from bisect import bisect_left
+import re
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    # NumPy is not part of Sublime's Python and is not a dependency of the package,
+    # so it is only used if it has already been made available some other way.
+    NUMPY_AVAILABLE = False
+
+# A rule that is a single literal character in a capturing group: `(\{)`, `(')`, etc.
+RE_LITERAL = re.compile(r'^\((?:\\([^\w\s])|([^\\.^$*+?{}\[\]|()\s]))\)$')
+NEVER = r"([^\s\S])"
+RE_WORD_CHAR = re.compile(r'\w')
+# Case insensitive translation of the buffer for finding keywords; made when first needed.
+FOLD = None
+
+
+def literal(regex):
+    """Get the character a rule pattern matches if it is a single literal character, else `None`."""
+
+    m = RE_LITERAL.match(regex)
+    if m is None:
+        return None
+    char = m.group(1) or m.group(2)
+    # Patterns are compiled case insensitive, so only characters without case are literal.
+    return char if char.lower() == char.upper() else None
+
+
+class RegexScanner(object):
+    """Scan for brackets with the combined pattern of the rules."""
+
+    def __init__(self, pattern):
+        """Setup the scanner."""
+
+        self.pattern = pattern
+
+    def scan(self, bfr, start, end):
+        """Yield `(group, begin, end)` of each bracket found between the points."""
+
+        for m in self.pattern.finditer(bfr, start, end):
+            g = m.lastindex
+            try:
+                yield g, m.start(g), m.end(g)
+            except Exception:
+                continue
+
+
+class LiteralScanner(RegexScanner):
+    """
+    Scan for single character rules with `str.find` and the rest with a regex.
+
+    The regex only has the rules that are not single characters, and
+    `groups` maps its groups to the groups of the combined pattern.  The two
+    streams are merged as the combined pattern would find them: the earliest
+    match wins, a tie goes to the rule that comes first, and characters inside
+    a regex match are skipped.
+    """
+
+    def __init__(self, pattern, literals, rest, groups, vector_threshold=0):
+        """
+        Setup the scanner.
+
+        Takes the combined pattern, the `(char, group)` literals, the other
+        rules' pattern, and how many characters must be scanned to find the
+        literals with NumPy (`0` to never use it).
+        """
+
+        RegexScanner.__init__(self, pattern)
+        self.literals = literals
+        self.rest = rest
+        self.groups = groups
+        self.width = max(groups + [group for char, group in literals]) + 1
+        self.vector_threshold = vector_threshold if NUMPY_AVAILABLE else 0
+        if self.vector_threshold:
+            ordered = sorted((ord(char), group) for char, group in literals)
+            self.codes = numpy.array([code for code, group in ordered], dtype=numpy.uint32)
+            self.code_groups = numpy.array([group for code, group in ordered], dtype=numpy.int64)
+
+    def vectorize(self, start, end):
+        """Check if the literals between the points should be found with NumPy."""
+
+        return bool(self.vector_threshold) and end - start >= self.vector_threshold
+
+    def find_literal_arrays(self, bfr, start, end):
+        """Find the points and groups of the literal characters between the points as NumPy arrays."""
+
+        codes = numpy.frombuffer(bfr[start:end].encode("utf-32-le", "surrogatepass"), dtype=numpy.uint32)
+        points = numpy.flatnonzero(numpy.isin(codes, self.codes))
+        groups = self.code_groups[numpy.searchsorted(self.codes, codes[points])]
+        return points + start, groups
+
+    def find_literals(self, bfr, start, end):
+        """
+        Find the literal characters between the points.
+
+        Each is encoded as `begin * width + group` so they sort by point and
+        can be searched with `bisect`.
+        """
+
+        width = self.width
+        if self.vectorize(start, end):
+            points, groups = self.find_literal_arrays(bfr, start, end)
+            return (points * width + groups).tolist()
+
+        hits = []
+        append = hits.append
+        find = bfr.find
+        for char, group in self.literals:
+            pt = find(char, start, end)
+            while pt != -1:
+                append(pt * width + group)
+                pt = find(char, pt + 1, end)
+        hits.sort()
+        return hits
+
+    def scan(self, bfr, start, end):
+        """Yield `(group, begin, end)` of each bracket found between the points."""
+
+        width = self.width
+        hits = self.find_literals(bfr, start, end)
+        if self.rest is None:
+            for hit in hits:
+                pt, group = divmod(hit, width)
+                yield group, pt, pt + 1
+            return
+
+        groups = self.groups
+        count = len(hits)
+        index = 0
+        pos = start
+        restart = True
+        while restart:
+            restart = False
+            for m in self.rest.finditer(bfr, pos, end):
+                begin = m.start()
+                stop = bisect_left(hits, begin * width, index)
+                if begin == m.end() or m.lastindex is None:
+                    # Empty matches and matches without a group are left to the combined pattern.
+                    for hit in hits[index:stop]:
+                        pt, group = divmod(hit, width)
+                        pos = pt + 1
+                        yield group, pt, pos
+                    for found in RegexScanner.scan(self, bfr, pos, end):
+                        yield found
+                    return
+                # Characters before the match
+                for hit in hits[index:stop]:
+                    pt, group = divmod(hit, width)
+                    yield group, pt, pt + 1
+                index = stop
+                g = groups[m.lastindex]
+                if index < count and hits[index] < begin * width + g:
+                    # A character of an earlier rule at the same point wins, and the search resumes after it.
+                    yield hits[index] - begin * width, begin, begin + 1
+                    pos = begin + 1
+                    index += 1
+                    restart = True
+                    break
+                g = m.lastindex
+                yield groups[g], m.start(g), m.end(g)
+                pos = m.end()
+                index = bisect_left(hits, pos * width, index)
+        for hit in hits[index:]:
+            pt, group = divmod(hit, width)
+            yield group, pt, pt + 1
+
+
+def fold_table():
+    """
+    Get the translation table that folds case the way `re` does for ASCII letters.
+
+    ASCII capitals become lowercase, and the few other characters that
+    `IGNORECASE` matches to an ASCII letter (like the Kelvin sign) become that
+    letter.  Everything else is left as is.
+    """
+
+    global FOLD
+    if FOLD is None:
+        table = dict((code, code + 32) for code in range(ord("A"), ord("Z") + 1))
+        text = "".join(chr(code) for code in range(0x80, 0x10000) if not 0xd800 <= code < 0xe000)
+        for char in set(re.findall("[a-z]", text, re.IGNORECASE)):
+            for letter in "abcdefghijklmnopqrstuvwxyz":
+                if re.match(letter, char, re.IGNORECASE):
+                    table[ord(char)] = ord(letter)
+                    break
+        FOLD = table
+    return FOLD
+
+
+def never(items):
+    r"""Check if a character set is `[^\s\S]`, which matches nothing."""
+
+    return (
+        len(items) == 3 and items[0][0] == sre_constants.NEGATE and
+        set(av for op, av in items[1:]) == set([sre_constants.CATEGORY_SPACE, sre_constants.CATEGORY_NOT_SPACE])
+    )
+
+
+def prefix_set(items):
+    """
+    Get a character set's characters as the contents of a regex character class.
+
+    Returns `None` if the set can match word characters.
+    """
+
+    chars = []
+    for op, av in items:
+        if op == sre_constants.LITERAL:
+            if RE_WORD_CHAR.match(chr(av)):
+                return None
+            chars.append(re.escape(chr(av)))
+        elif op == sre_constants.CATEGORY and av in (
+            sre_constants.CATEGORY_SPACE, sre_constants.CATEGORY_LINEBREAK
+        ):
+            chars.append(r"\s")
+        else:
+            return None
+    return "".join(chars)
+
+
+def leading_words(items, prefix="", bounded=False):
+    r"""
+    Get the words every match of a parsed pattern starts with.
+
+    Returns a set of `(prefix, word, before, after)`, where `prefix` is a
+    character class (without brackets) of the characters that can come
+    before the word in a match, like the `\s` of `\s*\b(end)\b`, and
+    `before` and `after` are whether the pattern checks for a word boundary
+    right before and after the word.  Returns `None` if the pattern's matches
+    do not all start with, or after such characters before, a literal.
+    Other assertions are skipped as they match nothing.
+    """
+
+    items = list(items)
+    for index, (op, av) in enumerate(items):
+        rest = items[index + 1:]
+        if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if op == sre_constants.AT and av == sre_constants.AT_BOUNDARY:
+                bounded = True
+            continue
+        if op == sre_constants.LITERAL:
+            word = []
+            after = False
+            for op, av in items[index:]:
+                if op == sre_constants.LITERAL and not after:
+                    word.append(chr(av))
+                elif op == sre_constants.AT and av == sre_constants.AT_BOUNDARY:
+                    after = True
+                elif op not in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                    break
+            word = "".join(word)
+            return set([(prefix, word, bounded, after)]) if all(ord(char) < 0x80 for char in word) else None
+        if op == sre_constants.SUBPATTERN:
+            return leading_words(list(av[-1]) + rest, prefix, bounded)
+        if op == sre_constants.BRANCH:
+            words = set()
+            for branch in av[1]:
+                found = leading_words(list(branch) + rest, prefix, bounded)
+                if found is None:
+                    return None
+                words |= found
+            return words
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            words = leading_words(list(av[2]) + rest, prefix, bounded)
+            if words is not None and av[0] == 0:
+                skipped = leading_words(rest, prefix, bounded)
+                words = words | skipped if skipped is not None else None
+            return words
+        if op == sre_constants.IN:
+            if never(av):
+                return set()
+            chars = prefix_set(av)
+            if chars is not None:
+                prefix += chars
+                bounded = False
+                continue
+            if all(kind == sre_constants.LITERAL and code < 0x80 for kind, code in av):
+                return set((prefix, chr(code), bounded, False) for kind, code in av)
+        return None
+    # The rest of the pattern can match nothing.
+    return None
+
+
+def unique(items):
+    """Get the items without repeats, in order."""
+
+    seen = set()
+    return [item for item in items if not (item in seen or seen.add(item))]
+
+
+def references(tree):
+    """Check if a parsed pattern, or a part of one, refers back to a group."""
+
+    if isinstance(tree, tuple) and len(tree) == 2 and tree[0] in (
+        sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS
+    ):
+        return True
+    if isinstance(tree, (tuple, list, sre_parse.SubPattern)):
+        return any(references(item) for item in tree)
+    return False
+
+
+class KeywordPattern(object):
+    """
+    Find a pattern's matches by only trying it where the words its matches start with are.
+
+    Every match of the pattern starts with one of its leading words, or in a
+    run of the characters that can come before one.  The words are found
+    with a regex of just the words and the word boundaries the pattern
+    checks around them, in a case folded copy of the buffer if the pattern
+    ignores case; for a word that can come after other characters, the run
+    of them before it is walked back.  The pattern is only matched at those
+    points, and the matches are the ones `finditer` would find, as no match
+    can start anywhere else.
+    """
+
+    def __init__(self, pattern, words):
+        """Setup the keyword pattern from the compiled pattern and its `leading_words`."""
+
+        self.pattern = pattern
+        self.groups = pattern.groups
+        self.fold = pattern.flags & re.IGNORECASE
+        alternatives = []
+        prefixes = []
+        self.prefixed = {}
+        for prefix, word, before, after in sorted(words, key=lambda w: (-len(w[1]), w)):
+            if self.fold:
+                word = word.lower()
+            alternatives.append(
+                re.escape(word) +
+                # A boundary before a word that starts with a word character, checked after it.
+                (r"(?<!\w%s)" % re.escape(word) if before and RE_WORD_CHAR.match(word) else "") +
+                (r"\b" if after else "")
+            )
+            if prefix:
+                self.prefixed.setdefault(word[0], []).append((word, re.compile("[%s]" % prefix).match))
+                prefixes.append(prefix)
+        self.candidates = re.compile("|".join(unique(alternatives)) if alternatives else NEVER)
+        # Try the points of a run before a word in one match: the pattern's start is the first group.
+        self.run = None
+        if prefixes and not references(sre_parse.parse(pattern.pattern, pattern.flags)):
+            try:
+                self.run = re.compile("[%s]*?(%s)" % ("".join(unique(prefixes)), pattern.pattern), pattern.flags)
+            except re.error:
+                pass
+
+    def finditer(self, string, pos=0, endpos=None):
+        """Find the matches between the points like the compiled pattern's `finditer`."""
+
+        if endpos is None:
+            endpos = len(string)
+        if self.fold:
+            text = string[pos:endpos].translate(fold_table())
+            offset = pos
+        else:
+            text = string
+            offset = 0
+        search = self.candidates.search
+        match = self.pattern.match
+        prefixed = self.prefixed
+        run = self.run.match if self.run is not None else None
+        pt = pos
+        while pt < endpos:
+            found = search(text, pt - offset, endpos - offset)
+            if found is None:
+                return
+            end = found.start() + offset
+            begin = end
+            for word, in_prefix in prefixed.get(text[end - offset], ()):
+                if text.startswith(word, end - offset):
+                    index = end
+                    while index > pt and in_prefix(string, index - 1):
+                        index -= 1
+                    begin = min(begin, index)
+            if begin == end:
+                m = match(string, end, endpos)
+            elif run is not None:
+                m = run(string, begin, endpos)
+                if m is not None:
+                    m = match(string, m.start(1), endpos)
+            else:
+                for index in range(begin, end + 1):
+                    m = match(string, index, endpos)
+                    if m is not None:
+                        break
+            if m is None:
+                pt = end + 1
+            else:
+                # Matches have a word, so they are never empty.
+                yield m
+                pt = m.end()
+
+
+def keywords(pattern):
+    """Get a keyword pattern for the compiled pattern, or `None` if its matches can start anywhere."""
+
+    try:
+        words = leading_words(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception:
+        words = None
+    return KeywordPattern(pattern, words) if words is not None else None
+
+
+def first_unmatched(pushes, types):
+    """
+    Find the first bracket with nothing left to match, using running depth.
+
+    The brackets are NumPy arrays in the order they are walked from the
+    cursor: `pushes` marks the brackets that open a level (closing brackets
+    when walking left) and `types` are their rules.  Returns the index of
+    the first bracket that would close a level that was never opened, or
+    `-1` if there is none or a bracket closes a level of another type first.
+    """
+
+    depth = numpy.cumsum(numpy.where(pushes, 1, -1))
+    under = numpy.flatnonzero(depth < 0)
+    if not len(under):
+        return -1
+    first = int(under[0])
+    if first:
+        # Within a level, the brackets alternate between opening and closing it.
+        pushes = pushes[:first]
+        levels = numpy.where(pushes, depth[:first], depth[:first] + 1)
+        order = numpy.argsort(levels, kind="stable")
+        ordered_types = types[:first][order]
+        pops = numpy.flatnonzero(~pushes[order])
+        if len(pops) and numpy.any(ordered_types[pops] != ordered_types[pops - 1]):
+            return -1
+    return first
+
+
+def scanner(find_regex, pattern, compile_pattern, *, literal_scan=False, vector_threshold=0, keyword_scan=False):
+    """
+    Create the scanner for the rules' patterns.
+
+    `find_regex` are the open and close patterns of the rules in order,
+    `pattern` is their combined pattern, and `compile_pattern` compiles a
+    combined pattern from a list like `find_regex`.  `vector_threshold` is
+    passed to the literal scanner.  With `keyword_scan`, the regex is only
+    tried where its leading words are when they can be found.
+    """
+
+    def search_pattern(pattern):
+        """Get the pattern to scan with."""
+
+        return (keywords(pattern) or pattern) if keyword_scan else pattern
+
+    if literal_scan:
+        literals = []
+        seen = set()
+        rest = []
+        groups = [0]
+        for index, regex in enumerate(find_regex):
+            char = literal(regex)
+            if char is None:
+                if regex != NEVER:
+                    rest.append(regex)
+                    groups.append(index + 1)
+            elif char not in seen:
+                # When rules share a character, the first one wins.
+                seen.add(char)
+                literals.append((char, index + 1))
+        if literals:
+            return LiteralScanner(
+                pattern, literals, search_pattern(compile_pattern(rest)) if rest else None, groups, vector_threshold
+            )
+    return RegexScanner(search_pattern(pattern))
@@ -5,6 +5,8 @@ Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
 License: MIT
 """
 import sublime
+import BracketHighlighter.bh_perf as bh_perf
+import BracketHighlighter.bh_scanner as bh_scanner
 from collections import namedtuple
 
 BH_SEARCH_LEFT = 0
@@ -13,6 +15,7 @@ BH_SEARCH_OPEN = 0
 BH_SEARCH_CLOSE = 1
 BH_ADJACENT_LEFT = 0
 BH_ADJACENT_RIGHT = 1
+LAZY_CHUNK = 256
 
 
 class BhEntry(object):
@@ -34,13 +37,13 @@ class BhEntry(object):
         return sublime.Region(self.begin, self.end)
 
 
-class BracketEntry(namedtuple('BracketEntry', ['begin', 'end', 'type'], verbose=False), BhEntry):
+class BracketEntry(namedtuple('BracketEntry', ['begin', 'end', 'type']), BhEntry):
     """Bracket object."""
 
     pass
 
 
-class ScopeEntry(namedtuple('ScopeEntry', ['begin', 'end', 'scope', 'type'], verbose=False), BhEntry):
+class ScopeEntry(namedtuple('ScopeEntry', ['begin', 'end', 'scope', 'type']), BhEntry):
     """Scope bracket object."""
 
     pass
@@ -200,9 +203,9 @@ class BracketSearch(object):
         self.scope = scope
         self.sub_search = sub_search
         if sub_search:
-            self.pattern = search.rules.sub_pattern
+            self.scanner = search.rules.sub_scanner
         else:
-            self.pattern = search.rules.pattern
+            self.scanner = search.rules.scanner
         if search.rules.outside_adj:
             self.bracket_sort = self.sort_brackets_adj
         elif search.rules.block_cursor:
@@ -217,7 +220,9 @@ class BracketSearch(object):
         self.right = [[], []]
         self.touch_left = False
         self.touch_right = False
-        if self.pattern:
+        self.lazy = False
+        self.sources = None
+        if self.scanner is not None:
             self.findall()
 
     def escaped(self, pt, ignore_string_escape, scope):
@@ -373,25 +378,184 @@ class BracketSearch(object):
             # Sort bracket to right
             self.right[match_type].append(BracketEntry(start, end, bracket_id))
 
+    def brackets(self, start, end):
+        """Yield the brackets between the points that are not in illegal scopes as `(start, end, type, id)`."""
+
+        for g, b_start, b_end in self.scanner.scan(self.search.get_buffer(), start, end):
+            match_type = int(not bool(g % 2))
+            bracket_id = int((g / 2) - match_type)
+
+            if not self.is_illegal_scope(b_start, bracket_id, self.scope):
+                yield b_start, b_end, match_type, bracket_id
+
+    def brackets_before(self, start, end):
+        """Yield the brackets between the points from last to first, scanning back in chunks that double in size."""
+
+        size = LAZY_CHUNK
+        while end > start:
+            begin = max(start, end - size)
+            for bracket in reversed(list(self.brackets(begin, end))):
+                yield bracket
+            end = begin
+            size *= 2
+
+    def brackets_after(self, start, end):
+        """Yield the brackets between the points, scanning forward in chunks that double in size."""
+
+        size = LAZY_CHUNK
+        while start < end:
+            stop = min(end, start + size)
+            for bracket in self.brackets(start, stop):
+                yield bracket
+            start = stop
+            size *= 2
+
     def findall(self):
-        """Find all of the brackets."""
+        """Find all of the brackets, or the ones by the cursor if the rest are found lazily."""
+
+        if bh_perf.timer is not None:
+            bh_perf.timer.begin("findall")
 
         window_start = int(self.search.search_window[0])
         window_end = int(self.search.search_window[1])
+        literal_only = isinstance(self.scanner, bh_scanner.LiteralScanner) and self.scanner.rest is None
+
+        if (
+            literal_only and self.scope is None and not self.sub_search and
+            self.scanner.vectorize(window_start, window_end)
+        ):
+            self.findall_vectorized(window_start, window_end)
+        elif self.search.rules.lazy_scan:
+            self.findall_lazy(window_start, window_end, literal_only)
+        else:
+            for bracket in self.brackets(window_start, window_end):
+                self.bracket_sort(*bracket)
+
+        if bh_perf.timer is not None:
+            bh_perf.timer.end()
+
+    def findall_lazy(self, window_start, window_end, literal_only):
+        """
+        Find the brackets by the cursor; the rest are found as the match walks out to them.
+
+        Brackets of single character rules are found outward from the cursor
+        in both directions in chunks that double in size.  Other brackets
+        depend on where the search starts, so the ones before the cursor are
+        all found from the start of the window, and only the ones after the
+        cursor are found lazily.  Either way, the brackets are sorted in the
+        same order as when all are found, and the sides' lists are kept in
+        the order they are walked.
+        """
+
+        self.lazy = True
+        center = self.center
+        if literal_only:
+            near_start = min(max(window_start, center - 1), window_end)
+            near_end = min(max(window_start, center + 1), window_end)
+            for bracket in self.brackets(near_start, near_end):
+                self.bracket_sort(*bracket)
+            self.sources = [
+                self.brackets_before(window_start, near_start),
+                self.brackets_after(near_end, window_end)
+            ]
+        else:
+            after = self.brackets(window_start, window_end)
+            for bracket in after:
+                self.bracket_sort(*bracket)
+                if bracket[0] >= center:
+                    break
+            self.sources = [iter(()), after]
+        self.left[BH_SEARCH_OPEN].reverse()
+        self.left[BH_SEARCH_CLOSE].reverse()
+
+    def pull(self, bracket_code):
+        """Sort the next bracket out from the cursor on the side; return `False` if there are no more."""
+
+        for bracket in self.sources[bracket_code]:
+            self.bracket_sort(*bracket)
+            return True
+        return False
 
-        for m in self.pattern.finditer(self.search.get_buffer(), window_start, window_end):
-            g = m.lastindex
-            try:
-                start = m.start(g)
-                end = m.end(g)
-            except Exception:
+    def in_selector(self, points, selector, cache):
+        """Check which points of a NumPy array are in regions of the selector."""
+
+        found = cache.get(selector)
+        if found is None:
+            numpy = bh_scanner.numpy
+            regions = self.search.view.find_by_selector(selector)
+            begins = numpy.array([r.begin() for r in regions], dtype=numpy.int64)
+            ends = numpy.array([r.end() for r in regions], dtype=numpy.int64)
+            index = numpy.searchsorted(begins, points, "right") - 1
+            found = (index >= 0) & (points < ends[numpy.maximum(index, 0)]) if len(regions) else points < 0
+            cache[selector] = found
+        return found
+
+    def illegal_scopes(self, points, bracket_ids):
+        """Find the brackets in excluded scopes, as `is_illegal_scope` does for one, with NumPy."""
+
+        numpy = bh_scanner.numpy
+        illegal = numpy.zeros(len(points), dtype=bool)
+        cache = {}
+        for bracket_id in numpy.unique(bracket_ids).tolist():
+            bracket = self.search.rules.brackets[bracket_id]
+            if not len(bracket.scope_exclude):
                 continue
+            mask = self.in_selector(points, ", ".join(bracket.scope_exclude), cache)
+            if len(bracket.scope_exclude_exceptions):
+                mask = mask & ~self.in_selector(points, ", ".join(bracket.scope_exclude_exceptions), cache)
+            illegal |= mask & (bracket_ids == bracket_id)
+        return illegal
 
-            match_type = int(not bool(g % 2))
-            bracket_id = int((g / 2) - match_type)
+    def findall_vectorized(self, window_start, window_end):
+        """
+        Find all of the brackets of single character rules with NumPy.
 
-            if not self.is_illegal_scope(start, bracket_id, self.scope):
-                self.bracket_sort(start, end, match_type, bracket_id)
+        The brackets in excluded scopes are dropped as arrays.  If no rule has
+        a `compare` or `validate` callback, the brackets are sorted to either
+        side of the cursor as arrays, and the brackets the match will settle
+        on are found from the running depth on each side, so only those are
+        kept; otherwise all of them are sorted.
+        """
+
+        numpy = bh_scanner.numpy
+        points, groups = self.scanner.find_literal_arrays(self.search.get_buffer(), window_start, window_end)
+        match_types = (groups % 2 == 0).astype(numpy.int64)
+        bracket_ids = groups // 2 - match_types
+        keep = ~self.illegal_scopes(points, bracket_ids)
+        points, match_types, bracket_ids = points[keep], match_types[keep], bracket_ids[keep]
+
+        if any(b.compare is not None or b.validate is not None for b in self.search.rules.brackets):
+            for pt, match_type, bracket_id in zip(points.tolist(), match_types.tolist(), bracket_ids.tolist()):
+                self.bracket_sort(pt, pt + 1, match_type, bracket_id)
+            return
+
+        center = self.center
+        closes = match_types == BH_SEARCH_CLOSE
+        left = numpy.where(closes, points + 1 <= center, points < center)
+        if self.bracket_sort == self.sort_brackets_adj:
+            # A bracket ending at the cursor touches it, and a closing one is sorted right.
+            touching = numpy.flatnonzero(points == center - 1)
+            if len(touching):
+                self.touch_right = True
+                left[touching] = ~closes[touching]
+        if self.bracket_sort != self.sort_brackets and not self.touch_right:
+            # Otherwise an opening bracket after the cursor touches it and is sorted left.
+            touching = numpy.flatnonzero((points == center) & ~closes)
+            if len(touching):
+                left[touching] = True
+                self.touch_left = BracketEntry(center, center + 1, int(bracket_ids[touching[0]]))
+
+        # Walking left, closing brackets open a level; walking right, opening brackets do.
+        walk = numpy.flatnonzero(left)[::-1]
+        index = bh_scanner.first_unmatched(closes[walk], bracket_ids[walk])
+        if index >= 0:
+            pt = int(points[walk[index]])
+            self.left[BH_SEARCH_OPEN].append(BracketEntry(pt, pt + 1, int(bracket_ids[walk[index]])))
+        walk = numpy.flatnonzero(~left)
+        index = bh_scanner.first_unmatched(~closes[walk], bracket_ids[walk])
+        if index >= 0:
+            pt = int(points[walk[index]])
+            self.right[BH_SEARCH_CLOSE].append(BracketEntry(pt, pt + 1, int(bracket_ids[walk[index]])))
 
     def get_open(self, bracket_code):
         """
@@ -434,7 +598,19 @@ class BracketSearch(object):
         if self.return_prev[match_type]:
             self.return_prev[match_type] = False
             yield self.prev_match[match_type]
-        if bracket_code == BH_SEARCH_LEFT:
+        if self.lazy:
+            # Lists are in walk order and grow as brackets are pulled from the side.
+            entries = (self.left if bracket_code == BH_SEARCH_LEFT else self.right)[match_type]
+            if self.start[match_type] is None:
+                self.start[match_type] = 0
+            while self.start[match_type] < len(entries) or self.pull(bracket_code):
+                if self.start[match_type] == len(entries):
+                    continue
+                b = entries[self.start[match_type]]
+                self.prev_match[match_type] = b
+                self.start[match_type] += 1
+                yield b
+        elif bracket_code == BH_SEARCH_LEFT:
             if self.start[match_type] is None:
                 self.start[match_type] = len(self.left[match_type])
             for x in reversed(range(0, self.start[match_type])):
@@ -7,6 +7,7 @@ License: MIT
 import sublime
 import sublime_plugin
 import BracketHighlighter.bh_wrapping as bh_wrapping
+import BracketHighlighter.bh_regions as bh_regions
 
 
 class SwapBrackets(bh_wrapping.WrapBrackets):
@@ -35,7 +36,7 @@ class SwapBracketsCommand(sublime_plugin.WindowCommand):
         """Execute post wrap callback."""
 
         if self.view is not None:
-            if not self.view.settings().get("BracketHighlighterBusy", False):
+            if not bh_regions.is_busy(self.view):
                 callback()
             else:
                 sublime.set_timeout(lambda: self.finalize(callback), 100)
@@ -0,0 +1,61 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+"""
+from collections import OrderedDict
+
+TAG_TREE_CACHE_SIZE = 4
+
+# Tag trees by view id: the change count they were built at and the trees by `(mode, begin, end)`.
+# Plugin modules are run again by every core that loads them, so the trees are kept
+# here where the matcher and the tag path share them, and across reloads.
+if 'tag_tree_cache' not in globals():
+    tag_tree_cache = {}
+
+
+def find_tree(view, window, mode):
+    """
+    Get a cached tag tree covering the window of the view's buffer.
+
+    Tags are paired from the start of the window, so tags before it would
+    change how the tags inside of it pair up.  Only trees that start where
+    the window does and end at or after it are used; they pair the tags in
+    the window the same way.  A tree that is fully built is preferred, then
+    the tree of the smallest window as it has the fewest tags to read.
+    """
+
+    trees = tag_tree_cache.get(view.id())
+    if trees is None or trees[0] != view.change_count():
+        return None
+    begin, end = int(window[0]), int(window[1])
+    found = None
+    for key, tree in trees[1].items():
+        if key[0] == mode and key[1] == begin and end <= key[2]:
+            rank = (not tree.done, key[2] - key[1])
+            if found is None or rank < found[0]:
+                found = (rank, key, tree)
+    if found is None:
+        return None
+    trees[1].move_to_end(found[1])
+    return found[2]
+
+
+def store_tree(view, window, mode, tree):
+    """Cache the tag tree of the window, dropping the least recently used trees."""
+
+    change_count = view.change_count()
+    trees = tag_tree_cache.get(view.id())
+    if trees is None or trees[0] != change_count:
+        trees = (change_count, OrderedDict())
+        tag_tree_cache[view.id()] = trees
+    trees[1][(mode, int(window[0]), int(window[1]))] = tree
+    while len(trees[1]) > TAG_TREE_CACHE_SIZE:
+        trees[1].popitem(last=False)
+
+
+def forget_view(view):
+    """Forget the tag trees of a closed view."""
+
+    tag_tree_cache.pop(view.id(), None)
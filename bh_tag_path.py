@@ -0,0 +1,109 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+"""
+import sublime
+import sublime_plugin
+from BracketHighlighter.bh_plugin import import_module
+
+BREADCRUMB_KEY = "bh_tag_breadcrumb"
+BREADCRUMB_SEPARATOR = " > "
+BREADCRUMB_DELAY = 300
+
+tags = None
+
+
+def get_tag_mode(view):
+    """Get the tag mode of the view."""
+
+    return tags.get_tag_mode(view, sublime.load_settings("bh_tag.sublime-settings").get("tag_mode", {}))
+
+
+def breadcrumb_enabled(mode):
+    """Check if the breadcrumb is enabled for the tag mode."""
+
+    return bool(sublime.load_settings("bh_tag.sublime-settings").get("tag_breadcrumb", {}).get(mode, False))
+
+
+class BhTagPathCommand(sublime_plugin.TextCommand):
+    """Show the tags enclosing the cursor and select the chosen one."""
+
+    def run(self, edit):
+        """Show the enclosing tags in a quick panel."""
+
+        mode = get_tag_mode(self.view)
+        tree = tags.get_view_tag_tree(self.view, mode) if mode is not None else None
+        if tree is None or not len(self.view.sel()):
+            return
+
+        self.nodes = tree.ancestors(self.view.sel()[0].b)
+        if not self.nodes:
+            sublime.status_message("No enclosing tags")
+            return
+
+        items = []
+        for node in self.nodes:
+            items.append(
+                [
+                    "%s<%s>" % ("    " * (node.depth - 1), node.open.name),
+                    "Line %d" % (self.view.rowcol(node.begin)[0] + 1)
+                ]
+            )
+        self.view.window().show_quick_panel(items, self.select, 0, len(items) - 1)
+
+    def select(self, value):
+        """Select the chosen tag."""
+
+        if value < 0:
+            return
+        node = self.nodes[value]
+        region = sublime.Region(node.begin, node.end)
+        self.view.sel().clear()
+        self.view.sel().add(region)
+        self.view.show(region)
+
+
+class BhTagBreadcrumbListener(sublime_plugin.EventListener):
+    """Show the tags enclosing the cursor in the status bar."""
+
+    def on_selection_modified(self, view):
+        """Update the breadcrumb when the cursor moves."""
+
+        if view.settings().get('is_widget') or tags is None:
+            return
+
+        mode = get_tag_mode(view)
+        if mode is None or not breadcrumb_enabled(mode):
+            view.erase_status(BREADCRUMB_KEY)
+            return
+
+        # Reuse the tree if the buffer has not changed, otherwise wait for the edits to settle.
+        if tags.find_cached_tag_tree(view, (0, view.size()), mode) is not None:
+            self.update(view, mode)
+        else:
+            change_count = view.change_count()
+            sublime.set_timeout(lambda: self.update_idle(view, mode, change_count), BREADCRUMB_DELAY)
+
+    def update_idle(self, view, mode, change_count):
+        """Update the breadcrumb if the view was not changed in the meantime."""
+
+        if view.is_valid() and view.change_count() == change_count:
+            self.update(view, mode)
+
+    def update(self, view, mode):
+        """Show the enclosing tags of the first cursor."""
+
+        sels = view.sel()
+        if not len(sels):
+            return
+        tree = tags.get_view_tag_tree(view, mode)
+        view.set_status(BREADCRUMB_KEY, BREADCRUMB_SEPARATOR.join(tree.path(sels[0].b)))
+
+
+def plugin_loaded():
+    """Load the tag module."""
+
+    global tags
+    tags = import_module("bh_modules.tags")
@@ -0,0 +1,184 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+"""
+import sublime
+import sublime_plugin
+from collections import deque
+from time import perf_counter
+import json
+from BracketHighlighter.bh_logging import log
+from BracketHighlighter.bh_perf import cache_file
+
+TRACE_VERSION = 1
+TRACE_TEXT_LIMIT = 1024
+
+# Events are only recorded when `recorder` is set.
+recorder = None
+
+
+class TraceRecorder(object):
+    """
+    Keep the last events in a ring buffer.
+
+    Each event is a compact list:
+    `[kind, time, view id, change count, selections, data]`.
+    `selections` is a flat list of `a, b` points.  `data` depends on the kind:
+
+    - `snapshot`: `[syntax, text]`, the buffer when the view was first seen, or when it is
+      loaded or activated after it changed or its last snapshot left the ring buffer.
+    - `on_modified`: the edited spans `[begin, old end, new end, inserted text]` (approximated).
+    - `match`: `[milliseconds, pairs]` where each pair is `[left begin, left end, right begin, right end]` or `None`.
+    - `key`: the key command's plugin command, if any.
+    """
+
+    def __init__(self, size, snapshot_limit):
+        """Setup the ring buffer."""
+
+        self.events = deque(maxlen=size)
+        self.snapshot_limit = snapshot_limit
+        self.views = {}
+        # The change count of each view's last snapshot and the number of events recorded before it.
+        self.snapshots = {}
+        self.count = 0
+        self.start = perf_counter()
+
+    def record(self, kind, view, data=None):
+        """Record an event."""
+
+        sels = []
+        for sel in view.sel():
+            sels.append(sel.a)
+            sels.append(sel.b)
+        self.events.append(
+            [kind, round(perf_counter() - self.start, 4), view.id(), view.change_count(), sels, data]
+        )
+        self.views[view.id()] = (sels, view.size())
+        self.count += 1
+
+    def snapshot(self, view):
+        """Record the view's buffer so replays have something to start from."""
+
+        size = view.size()
+        text = view.substr(sublime.Region(0, size)) if size <= self.snapshot_limit else None
+        self.snapshots[view.id()] = (view.change_count(), self.count)
+        self.record("snapshot", view, [view.settings().get("syntax"), text])
+
+    def needs_snapshot(self, kind, view):
+        """Check if the view's buffer is unknown to the events in the ring buffer."""
+
+        last = self.snapshots.get(view.id())
+        if last is None or self.count - last[1] >= self.events.maxlen:
+            return True
+        return kind in ("on_load", "on_activated") and last[0] != view.change_count()
+
+    def event(self, kind, view):
+        """Record a listener event."""
+
+        if view.settings().get('is_widget'):
+            return
+        snapshot = self.needs_snapshot(kind, view)
+        if snapshot:
+            self.snapshot(view)
+        if kind == "on_modified" and not snapshot:
+            self.record(kind, view, self.edited_spans(view))
+        else:
+            self.record(kind, view)
+
+    def edited_spans(self, view):
+        """
+        Approximate the edited spans from the selections before and after the edit.
+
+        Each selection is assumed to have changed the buffer by the same amount.
+        """
+
+        prev_sels, prev_size = self.views[view.id()]
+        delta = view.size() - prev_size
+        sels = view.sel()
+        count = len(sels)
+        if count == 0 or count * 2 != len(prev_sels) or delta % count:
+            return None
+        delta //= count
+        spans = []
+        for i, sel in enumerate(sels):
+            shift = i * delta
+            prev_begin = min(prev_sels[i * 2], prev_sels[i * 2 + 1]) + shift
+            prev_end = max(prev_sels[i * 2], prev_sels[i * 2 + 1]) + shift
+            begin = min(prev_begin, sel.begin())
+            old_end = max(prev_end, sel.end() - delta)
+            new_end = old_end + delta
+            text = view.substr(sublime.Region(begin, new_end)) if new_end - begin <= TRACE_TEXT_LIMIT else None
+            spans.append([begin, old_end, new_end, text])
+        return spans
+
+    def match(self, view, elapsed, last_match):
+        """Record the outcome of a match."""
+
+        pairs = None
+        if last_match is not None:
+            pairs = []
+            for tails in last_match[-1]:
+                pair = None
+                for name, left, right, regions, style, finish in tails:
+                    if left is not None and right is not None:
+                        pair = [left.begin, left.end, right.begin, right.end]
+                pairs.append(pair)
+        self.record("match", view, [round(elapsed * 1000, 3), pairs])
+
+    def dump(self):
+        """Write the events to a file in the cache directory and return its path."""
+
+        path = cache_file("trace", "jsonl")
+        with open(path, "w") as f:
+            f.write(json.dumps({"version": TRACE_VERSION, "events": len(self.events)}) + "\n")
+            for event in self.events:
+                f.write(json.dumps(event, separators=(',', ':')) + "\n")
+        return path
+
+
+def load_trace(path):
+    """Load a dumped trace as a header and a list of events."""
+
+    with open(path, "r") as f:
+        header = json.loads(f.readline())
+        events = [json.loads(line) for line in f if line.strip()]
+    return header, events
+
+
+class BhDumpTraceCommand(sublime_plugin.ApplicationCommand):
+    """Dump the event trace."""
+
+    def run(self):
+        """Write the recorded events to the cache directory."""
+
+        if recorder is None:
+            log("Event trace is disabled; enable \"trace_enable\".")
+            return
+        path = recorder.dump()
+        log("Trace written to %s" % path)
+        sublime.status_message("BracketHighlighter: trace written to %s" % path)
+
+
+def update_settings():
+    """Start or stop the recorder."""
+
+    global recorder
+    settings = sublime.load_settings("bh_core.sublime-settings")
+    if settings.get("trace_enable", False):
+        size = int(settings.get("trace_size", 5000))
+        limit = int(settings.get("trace_snapshot_limit", 1000000))
+        if recorder is None or recorder.events.maxlen != size or recorder.snapshot_limit != limit:
+            recorder = TraceRecorder(size, limit)
+    else:
+        recorder = None
+
+
+def plugin_loaded():
+    """Setup the recorder."""
+
+    settings = sublime.load_settings("bh_core.sublime-settings")
+    update_settings()
+    settings.clear_on_change('bh_trace')
+    settings.add_on_change('bh_trace', update_settings)
@@ -0,0 +1,109 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+
+Run BracketHighlighter without Sublime Text.
+
+`install` puts the headless `sublime` and `sublime_plugin` modules in place
+and makes the package importable as `BracketHighlighter`;  `load_plugin`
+then imports the plugin modules and runs their `plugin_loaded` the way
+Sublime would, except that the event thread is never started.
+
+```
+import headless
+headless.load_plugin()
+view = headless.new_view("(a [b] c)", "Packages/Python/Python.tmLanguage", [4])
+headless.bh_core.bh_match(view)
+```
+"""
+from os.path import dirname
+import sys
+import types
+
+ROOT = dirname(dirname(__file__))
+PLUGIN_MODULES = (
+    "bh_core",
+    "bh_logging",
+    "bh_perf",
+    "bh_profile",
+    "bh_regions",
+    "bh_remove",
+    "bh_tag_path",
+    "bh_trace",
+    "bh_wrapping"
+)
+
+bh_core = None
+
+
+def install():
+    """Install the headless Sublime modules and the `BracketHighlighter` package."""
+
+    from . import sublime, sublime_plugin
+
+    sys.modules["sublime"] = sublime
+    sys.modules["sublime_plugin"] = sublime_plugin
+    if "BracketHighlighter" not in sys.modules:
+        package = types.ModuleType("BracketHighlighter")
+        package.__path__ = [ROOT]
+        sys.modules["BracketHighlighter"] = package
+
+
+def load_plugin():
+    """
+    Import the plugin modules and run their `plugin_loaded`.
+
+    `bh_swapping` is left out as it uses `async` as a name,
+    which newer versions of Python don't allow.
+    """
+
+    global bh_core
+    install()
+    import sublime_plugin
+    import importlib
+
+    modules = [importlib.import_module("BracketHighlighter.%s" % name) for name in PLUGIN_MODULES]
+    bh_core = modules[0]
+
+    class HeadlessThread(bh_core.BhThread):
+        """Event thread that is never started; call `payload` or `sublime.advance` instead."""
+
+        def start(self):
+            """Don't start the thread."""
+
+    bh_core.BhThread = HeadlessThread
+    for module in modules:
+        plugin_loaded = getattr(module, "plugin_loaded", None)
+        if plugin_loaded is not None:
+            plugin_loaded()
+
+    del sublime_plugin.all_listeners[:]
+    for module in modules:
+        for obj in vars(module).values():
+            if (
+                isinstance(obj, type) and issubclass(obj, sublime_plugin.EventListener) and
+                obj.__module__ == module.__name__
+            ):
+                sublime_plugin.all_listeners.append(obj())
+    return bh_core
+
+
+def new_view(text, syntax=None, sels=None, scopes=None):
+    """
+    Create a view in the active window and make it the active view.
+
+    `sels` are points or `(a, b)` pairs, and `scopes` are optional
+    `(begin, end, scope)` spans replacing the syntax's scope model.
+    """
+
+    import sublime
+
+    window = sublime.active_window()
+    view = sublime.View(text, syntax, window, scopes)
+    window.view_list.append(view)
+    window.focus_view(view)
+    for sel in (sels if sels is not None else [0]):
+        view.sel().add(sublime.Region(*sel) if isinstance(sel, (tuple, list)) else sublime.Region(sel))
+    return view
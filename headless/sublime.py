@@ -0,0 +1,913 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+
+Headless stand-in for the subset of the `sublime` API that BracketHighlighter uses.
+"""
+from os.path import basename, dirname, exists, join, normpath, splitext
+import heapq
+import json
+import re
+import tempfile
+
+ROOT = dirname(dirname(__file__))
+
+HIDDEN = 128
+PERSISTENT = 16
+DRAW_EMPTY = 1
+HIDE_ON_MINIMAP = 2
+DRAW_EMPTY_AS_OVERWRITE = 4
+DRAW_NO_FILL = 32
+DRAW_NO_OUTLINE = 256
+DRAW_SOLID_UNDERLINE = 512
+DRAW_STIPPLED_UNDERLINE = 1024
+DRAW_SQUIGGLY_UNDERLINE = 2048
+LITERAL = 1
+IGNORECASE = 2
+
+# Base scope of the syntaxes known to the scope model, and the patterns
+# of the string and comment scopes found on top of it.
+STRING_DOUBLE = (r'"(?:\\.|[^"\\\n])*"', "string.quoted.double")
+STRING_SINGLE = (r"'(?:\\.|[^'\\\n])*'", "string.quoted.single")
+COMMENT_BLOCK = (r"/\*[\s\S]*?\*/", "comment.block")
+COMMENT_SLASH = (r"//[^\n]*", "comment.line.double-slash")
+COMMENT_HASH = (r"#[^\n]*", "comment.line.number-sign")
+SYNTAXES = {
+    "plain text": ("text.plain", []),
+    "python": (
+        "source.python",
+        [(r'"""[\s\S]*?"""', "string.quoted.double.block"), COMMENT_HASH, STRING_DOUBLE, STRING_SINGLE]
+    ),
+    "javascript": ("source.js", [COMMENT_BLOCK, COMMENT_SLASH, STRING_DOUBLE, STRING_SINGLE]),
+    "json": ("source.json", [STRING_DOUBLE]),
+    "c": ("source.c", [COMMENT_BLOCK, COMMENT_SLASH, STRING_DOUBLE, STRING_SINGLE]),
+    "ruby": ("source.ruby", [COMMENT_HASH, STRING_DOUBLE, STRING_SINGLE]),
+    "lua": ("source.lua", [(r"--[^\n]*", "comment.line.double-dash"), STRING_DOUBLE, STRING_SINGLE]),
+    "shell-unix-generic": ("source.shell", [COMMENT_HASH, STRING_DOUBLE, STRING_SINGLE]),
+    "html": (
+        "text.html.basic",
+        [(r"<!--[\s\S]*?-->", "comment.block.html"), (r'(?<==)"[^"]*"', "string.quoted.double")]
+    ),
+    "xml": ("text.xml", [(r"<!--[\s\S]*?-->", "comment.block.xml"), (r'(?<==)"[^"]*"', "string.quoted.double")]),
+    "markdown": ("text.html.markdown", [(r"(?P<fence>`{3,})[\s\S]*?(?P=fence)", "markup.raw.block.markdown.fenced")]),
+    "erlang": ("source.erlang", [(r"%[^\n]*", "comment.line.percentage"), STRING_DOUBLE]),
+    "latex": ("text.tex.latex", [(r"%[^\n]*", "comment.line.percentage"), (r"\$[^$\n]*\$", "string.other.math.tex")]),
+}
+
+settings_cache = {}
+resource_paths = {"Packages/BracketHighlighter": ROOT}
+status = []
+clock = [0.0]
+timeouts = []
+timeout_count = [0]
+window_list = []
+view_count = [0]
+
+
+class Region(object):
+    """Region."""
+
+    __slots__ = ("a", "b", "xpos")
+
+    def __init__(self, a, b=None, xpos=-1):
+        """Setup the region."""
+
+        self.a = a
+        self.b = a if b is None else b
+        self.xpos = xpos
+
+    def __repr__(self):
+        """Represent the region."""
+
+        return "(%d, %d)" % (self.a, self.b)
+
+    def __len__(self):
+        """Get the size of the region."""
+
+        return self.size()
+
+    def __eq__(self, other):
+        """Compare regions."""
+
+        return isinstance(other, Region) and self.a == other.a and self.b == other.b
+
+    def __ne__(self, other):
+        """Compare regions."""
+
+        return not self == other
+
+    def __hash__(self):
+        """Hash the region."""
+
+        return hash((self.a, self.b))
+
+    def __lt__(self, other):
+        """Order regions by their start."""
+
+        return self.begin() < other.begin()
+
+    def empty(self):
+        """Check if the region is empty."""
+
+        return self.a == self.b
+
+    def begin(self):
+        """Get the start of the region."""
+
+        return min(self.a, self.b)
+
+    def end(self):
+        """Get the end of the region."""
+
+        return max(self.a, self.b)
+
+    def size(self):
+        """Get the size of the region."""
+
+        return abs(self.a - self.b)
+
+    def contains(self, x):
+        """Check if the point or region is within the region."""
+
+        if isinstance(x, Region):
+            return self.begin() <= x.begin() and x.end() <= self.end()
+        return self.begin() <= x <= self.end()
+
+    def cover(self, other):
+        """Get the region covering both regions."""
+
+        if self.a > self.b:
+            return Region(max(self.a, other.end()), min(self.b, other.begin()))
+        return Region(min(self.a, other.begin()), max(self.b, other.end()))
+
+    def intersection(self, other):
+        """Get the intersection of the regions."""
+
+        if not self.intersects(other):
+            return Region(0, 0)
+        return Region(max(self.begin(), other.begin()), min(self.end(), other.end()))
+
+    def intersects(self, other):
+        """Check if the regions intersect."""
+
+        return (
+            self.begin() < other.end() and other.begin() < self.end() or
+            self.begin() == other.begin() or self.end() == other.end()
+        )
+
+
+class Selection(object):
+    """Selections of a view, kept sorted and merged like Sublime does."""
+
+    def __init__(self):
+        """Setup the selection."""
+
+        self.regions = []
+
+    def __iter__(self):
+        """Iterate the selections."""
+
+        return iter(list(self.regions))
+
+    def __len__(self):
+        """Get the number of selections."""
+
+        return len(self.regions)
+
+    def __getitem__(self, index):
+        """Get a selection."""
+
+        return self.regions[index]
+
+    def __repr__(self):
+        """Represent the selections."""
+
+        return repr(self.regions)
+
+    def clear(self):
+        """Remove all selections."""
+
+        self.regions = []
+
+    def add(self, region):
+        """Add a selection, merging it with the selections it overlaps."""
+
+        if not isinstance(region, Region):
+            region = Region(region)
+        regions = []
+        for r in self.regions:
+            if r == region or r.begin() < region.end() and region.begin() < r.end():
+                region = region.cover(r)
+            else:
+                regions.append(r)
+        regions.append(region)
+        regions.sort(key=lambda r: (r.begin(), r.end()))
+        self.regions = regions
+
+    def add_all(self, regions):
+        """Add the selections."""
+
+        for region in regions:
+            self.add(region)
+
+    def subtract(self, region):
+        """Remove a selection."""
+
+        self.regions = [r for r in self.regions if r != region]
+
+    def contains(self, region):
+        """Check if a selection contains the region."""
+
+        return any(r.contains(region) for r in self.regions)
+
+
+class Settings(object):
+    """Settings."""
+
+    def __init__(self, values=None):
+        """Setup the settings."""
+
+        self.values = dict(values) if values is not None else {}
+        self.callbacks = {}
+
+    def get(self, key, default=None):
+        """Get a setting."""
+
+        return self.values.get(key, default)
+
+    def has(self, key):
+        """Check if the setting exists."""
+
+        return key in self.values
+
+    def set(self, key, value):
+        """Set a setting and notify the change listeners."""
+
+        self.values[key] = value
+        self.changed()
+
+    def erase(self, key):
+        """Erase a setting and notify the change listeners."""
+
+        self.values.pop(key, None)
+        self.changed()
+
+    def changed(self):
+        """Notify the change listeners."""
+
+        for callback in list(self.callbacks.values()):
+            callback()
+
+    def add_on_change(self, key, callback):
+        """Add a change listener."""
+
+        self.callbacks[key] = callback
+
+    def clear_on_change(self, key):
+        """Remove a change listener."""
+
+        self.callbacks.pop(key, None)
+
+
+class Edit(object):
+    """Edit token."""
+
+
+class ScopeModel(object):
+    """
+    Scopes of a buffer.
+
+    The buffer gets the base scope of its syntax, with spans of string
+    and comment scopes found by the syntax's patterns on top of it.
+    Spans can also be given explicitly.
+    """
+
+    def __init__(self, base, spans):
+        """Setup the scopes from spans of `(begin, end, scope)`."""
+
+        self.base = base
+        self.spans = sorted(spans)
+        self.bounds = sorted(set([0] + [b for s in self.spans for b in s[:2]]))
+
+    @classmethod
+    def from_text(cls, text, syntax_name):
+        """Find the scopes of the text with the syntax's patterns."""
+
+        base, patterns = SYNTAXES.get(syntax_name, ("source.%s" % syntax_name, []))
+        spans = []
+        if patterns:
+            pattern = re.compile("|".join("(?P<s%d>%s)" % (i, p[0]) for i, p in enumerate(patterns)))
+            for m in pattern.finditer(text):
+                scope = patterns[int(m.lastgroup[1:])][1]
+                spans.append((m.start(), m.end(), "%s.%s" % (scope, base.split(".")[-1])))
+        return cls(base, spans)
+
+    def scopes_at(self, pt):
+        """Get the scopes at the point."""
+
+        scopes = [self.base]
+        for begin, end, scope in self.spans:
+            if begin > pt:
+                break
+            if begin <= pt < end:
+                scopes.append(scope)
+        return scopes
+
+    def extent(self, pt, size):
+        """Get the extent of the innermost scope at the point."""
+
+        region = None
+        for begin, end, scope in self.spans:
+            if begin > pt:
+                break
+            if begin <= pt < end:
+                region = Region(begin, end)
+        if region is None:
+            start = 0
+            stop = size
+            for begin, end, scope in self.spans:
+                if end <= pt:
+                    start = max(start, end)
+                elif begin > pt:
+                    stop = begin
+                    break
+            region = Region(start, stop)
+        return region
+
+    def shift(self, begin, end, delta):
+        """Adjust the spans to an edit replacing `begin`-`end` with `delta` more characters."""
+
+        spans = []
+        for b, e, scope in self.spans:
+            if e <= begin:
+                spans.append((b, e, scope))
+            elif b >= end:
+                spans.append((b + delta, e + delta, scope))
+            else:
+                e = e + delta if e >= end else begin
+                b = min(b, begin)
+                if e > b:
+                    spans.append((b, e, scope))
+        self.spans = spans
+        self.bounds = sorted(set([0] + [b for s in self.spans for b in s[:2]]))
+
+
+def parse_selector(selector):
+    """Parse a scope selector into alternatives of `(included, excluded)` lists of scope atoms."""
+
+    alternatives = []
+    for alternative in re.split(r"[,|]", selector.replace("(", " ").replace(")", " ")):
+        parts = alternative.split(" -")
+        include = parts[0].split()
+        exclude = [p.split() for p in parts[1:] if p.strip()]
+        if include or exclude:
+            alternatives.append((include, exclude))
+    return alternatives
+
+
+def match_path(atoms, scopes):
+    """Score how well the selector atoms match the scopes in order."""
+
+    score = 0
+    index = 0
+    for atom in atoms:
+        while index < len(scopes):
+            scope = scopes[index]
+            index += 1
+            if scope == atom or scope.startswith(atom + "."):
+                score += atom.count(".") + 1
+                break
+        else:
+            return 0
+    return score
+
+
+def score_scopes(scopes, selector):
+    """Score the scopes against the selector."""
+
+    best = 0
+    for include, excludes in parse_selector(selector):
+        score = match_path(include, scopes) if include else 1
+        if score and not any(match_path(exclude, scopes) for exclude in excludes):
+            best = max(best, score)
+    return best
+
+
+class View(object):
+    """View with a buffer, selections, settings, regions and a simple scope model."""
+
+    def __init__(self, text="", syntax=None, window=None, scopes=None):
+        """Setup the view."""
+
+        view_count[0] += 1
+        self.view_id = view_count[0]
+        self.text = text
+        self.selection = Selection()
+        self.view_settings = Settings()
+        self.regions = {}
+        self.status = {}
+        self.changes = 0
+        self.view_name = ""
+        self.view_window = window
+        self.folded = []
+        self.set_syntax_file(syntax if syntax is not None else "Packages/Text/Plain text.tmLanguage", scopes)
+
+    def __repr__(self):
+        """Represent the view."""
+
+        return "View(%d)" % self.view_id
+
+    def __eq__(self, other):
+        """Compare views."""
+
+        return isinstance(other, View) and self.view_id == other.view_id
+
+    def __hash__(self):
+        """Hash the view."""
+
+        return self.view_id
+
+    def id(self):
+        """Get the view's id."""
+
+        return self.view_id
+
+    def buffer_id(self):
+        """Get the view's buffer id."""
+
+        return self.view_id
+
+    def is_valid(self):
+        """Check if the view is still open."""
+
+        return True
+
+    def window(self):
+        """Get the window of the view."""
+
+        return self.view_window
+
+    def file_name(self):
+        """Get the file name of the view."""
+
+        return None
+
+    def name(self):
+        """Get the name of the view."""
+
+        return self.view_name
+
+    def set_name(self, name):
+        """Set the name of the view."""
+
+        self.view_name = name
+
+    def set_scratch(self, scratch):
+        """Set the view as scratch."""
+
+    def set_read_only(self, read_only):
+        """Set the view as read only."""
+
+    def settings(self):
+        """Get the view's settings."""
+
+        return self.view_settings
+
+    def set_syntax_file(self, syntax, scopes=None):
+        """Set the syntax, and build the scopes for it unless they are given."""
+
+        self.view_settings.set("syntax", syntax)
+        name = splitext(basename(syntax))[0].lower()
+        if scopes is None:
+            self.scope_model = ScopeModel.from_text(self.text, name)
+        else:
+            self.scope_model = ScopeModel(SYNTAXES.get(name, ("source.%s" % name, []))[0], scopes)
+
+    def line_height(self):
+        """Get the line height."""
+
+        return 19
+
+    def change_count(self):
+        """Get the number of changes made to the buffer."""
+
+        return self.changes
+
+    def size(self):
+        """Get the size of the buffer."""
+
+        return len(self.text)
+
+    def substr(self, x):
+        """Get the text of the region, or the character at the point."""
+
+        if isinstance(x, Region):
+            return self.text[x.begin():x.end()]
+        return self.text[x:x + 1]
+
+    def sel(self):
+        """Get the selections."""
+
+        return self.selection
+
+    def rowcol(self, pt):
+        """Get the row and column of the point."""
+
+        row = self.text.count("\n", 0, pt)
+        return row, pt - (self.text.rfind("\n", 0, pt) + 1)
+
+    def text_point(self, row, col):
+        """Get the point of the row and column."""
+
+        pt = 0
+        for _ in range(row):
+            index = self.text.find("\n", pt)
+            if index == -1:
+                return len(self.text)
+            pt = index + 1
+        return min(pt + col, len(self.text))
+
+    def line(self, x):
+        """Get the line containing the point or region."""
+
+        region = x if isinstance(x, Region) else Region(x)
+        begin = self.text.rfind("\n", 0, region.begin()) + 1
+        end = self.text.find("\n", region.end())
+        return Region(begin, len(self.text) if end == -1 else end)
+
+    def full_line(self, x):
+        """Get the line containing the point or region, including the newline."""
+
+        region = self.line(x)
+        return Region(region.a, min(region.b + 1, len(self.text)))
+
+    def lines(self, region):
+        """Get the lines of the region."""
+
+        lines = []
+        pt = region.begin()
+        while True:
+            line = self.line(pt)
+            lines.append(line)
+            if line.end() >= region.end() or line.end() >= len(self.text):
+                break
+            pt = line.end() + 1
+        return lines
+
+    def find(self, pattern, start, flags=0):
+        """Find the pattern from the start point."""
+
+        if flags & LITERAL:
+            pattern = re.escape(pattern)
+        m = re.compile(pattern, re.IGNORECASE if flags & IGNORECASE else 0).search(self.text, start)
+        return Region(m.start(), m.end()) if m is not None else Region(-1, -1)
+
+    def find_all(self, pattern, flags=0):
+        """Find all matches of the pattern."""
+
+        if flags & LITERAL:
+            pattern = re.escape(pattern)
+        return [
+            Region(m.start(), m.end())
+            for m in re.compile(pattern, re.IGNORECASE if flags & IGNORECASE else 0).finditer(self.text)
+        ]
+
+    def scope_name(self, pt):
+        """Get the scope name at the point."""
+
+        return " ".join(self.scope_model.scopes_at(pt)) + " "
+
+    def match_selector(self, pt, selector):
+        """Check if the scope at the point matches the selector."""
+
+        return score_scopes(self.scope_model.scopes_at(pt), selector) > 0
+
+    def score_selector(self, pt, selector):
+        """Score the scope at the point against the selector."""
+
+        return score_scopes(self.scope_model.scopes_at(pt), selector)
+
+    def extract_scope(self, pt):
+        """Get the extent of the scope at the point."""
+
+        return self.scope_model.extent(pt, len(self.text))
+
+    def find_by_selector(self, selector):
+        """Find the regions whose scope matches the selector."""
+
+        regions = []
+        bounds = [b for b in self.scope_model.bounds if b < len(self.text)]
+        for begin, end in zip(bounds, bounds[1:] + [len(self.text)]):
+            if score_scopes(self.scope_model.scopes_at(begin), selector):
+                if regions and regions[-1].b == begin:
+                    regions[-1] = Region(regions[-1].a, end)
+                else:
+                    regions.append(Region(begin, end))
+        return regions
+
+    def modify(self, begin, end, text, notify=True):
+        """Replace the text between the points and move everything after it."""
+
+        delta = len(text) - (end - begin)
+        self.text = self.text[:begin] + text + self.text[end:]
+        self.changes += 1
+
+        def move(pt):
+            """Move a point past the edit."""
+
+            if pt >= end:
+                return pt + delta
+            if pt > begin:
+                return begin + len(text) if pt == end else min(pt, begin + len(text))
+            return pt
+
+        for key, (regions, scope, icon, flags) in list(self.regions.items()):
+            self.regions[key] = ([Region(move(r.a), move(r.b)) for r in regions], scope, icon, flags)
+        sels = [Region(move(r.a), move(r.b)) for r in self.selection]
+        self.selection.clear()
+        self.selection.add_all(sels)
+        self.scope_model.shift(begin, end, delta)
+        if notify:
+            self.notify("on_modified")
+        return len(text)
+
+    def notify(self, event):
+        """Send the event to the event listeners."""
+
+        for listener in event_listeners():
+            callback = getattr(listener, event, None)
+            if callback is not None:
+                callback(self)
+
+    def insert(self, edit, pt, text):
+        """Insert text at the point."""
+
+        return self.modify(pt, pt, text)
+
+    def erase(self, edit, region):
+        """Erase the region."""
+
+        self.modify(region.begin(), region.end(), "")
+
+    def replace(self, edit, region, text):
+        """Replace the region with the text."""
+
+        self.modify(region.begin(), region.end(), text)
+
+    def add_regions(self, key, regions, scope="", icon="", flags=0):
+        """Add highlight regions."""
+
+        self.regions[key] = (list(regions), scope, icon, flags)
+
+    def get_regions(self, key):
+        """Get the highlight regions."""
+
+        return sorted(self.regions.get(key, ([],))[0], key=lambda r: (r.begin(), r.end()))
+
+    def erase_regions(self, key):
+        """Erase the highlight regions."""
+
+        self.regions.pop(key, None)
+
+    def set_status(self, key, value):
+        """Set a status bar entry."""
+
+        self.status[key] = value
+
+    def get_status(self, key):
+        """Get a status bar entry."""
+
+        return self.status.get(key, "")
+
+    def erase_status(self, key):
+        """Erase a status bar entry."""
+
+        self.status.pop(key, None)
+
+    def show(self, x, show_surrounds=True):
+        """Scroll to the point or region."""
+
+    def fold(self, region):
+        """Fold the region."""
+
+        if region in self.folded:
+            return False
+        self.folded.append(region)
+        return True
+
+    def unfold(self, region):
+        """Unfold the regions in the region."""
+
+        unfolded = [r for r in self.folded if region.contains(r)]
+        self.folded = [r for r in self.folded if not region.contains(r)]
+        return unfolded
+
+    def run_command(self, cmd, args=None):
+        """Run a text command."""
+
+        import sublime_plugin
+        command = sublime_plugin.find_command(sublime_plugin.TextCommand, cmd)
+        if command is not None:
+            command(self).run(Edit(), **(args or {}))
+
+
+class Window(object):
+    """Window."""
+
+    def __init__(self):
+        """Setup the window."""
+
+        self.view_list = []
+        self.active = None
+        self.panel = None
+
+    def id(self):
+        """Get the window's id."""
+
+        return window_list.index(self) + 1
+
+    def views(self):
+        """Get the views of the window."""
+
+        return list(self.view_list)
+
+    def active_view(self):
+        """Get the active view."""
+
+        return self.active
+
+    def new_file(self):
+        """Create a new view."""
+
+        view = View(window=self)
+        self.view_list.append(view)
+        self.active = view
+        return view
+
+    def focus_view(self, view):
+        """Make the view active."""
+
+        self.active = view
+
+    def show_quick_panel(self, items, on_select, flags=0, selected_index=-1, on_highlight=None):
+        """Show a quick panel; the items and callback are kept in `panel` for the caller to pick from."""
+
+        self.panel = (items, on_select)
+
+    def run_command(self, cmd, args=None):
+        """Run a window command."""
+
+        import sublime_plugin
+        command = sublime_plugin.find_command(sublime_plugin.WindowCommand, cmd)
+        if command is not None:
+            command(self).run(**(args or {}))
+
+
+def event_listeners():
+    """Get the registered event listeners."""
+
+    import sublime_plugin
+    return sublime_plugin.all_listeners
+
+
+def active_window():
+    """Get the active window."""
+
+    if not window_list:
+        window_list.append(Window())
+    return window_list[0]
+
+
+def windows():
+    """Get the windows."""
+
+    return list(window_list)
+
+
+def run_command(cmd, args=None):
+    """Run an application command."""
+
+    import sublime_plugin
+    command = sublime_plugin.find_command(sublime_plugin.ApplicationCommand, cmd)
+    if command is not None:
+        command().run(**(args or {}))
+
+
+def strip_json_comments(text):
+    """Strip the comments and trailing commas of Sublime's JSON."""
+
+    text = re.sub(
+        r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*[\s\S]*?\*/',
+        lambda m: m.group(1) if m.group(1) else "",
+        text
+    )
+    return re.sub(r'("(?:\\.|[^"\\])*")|,(\s*[\]}])', lambda m: m.group(1) if m.group(1) else m.group(2), text)
+
+
+def find_resource_path(name):
+    """Get the file of a `Packages/...` resource."""
+
+    name = name.replace("\\", "/")
+    for prefix, folder in resource_paths.items():
+        if name.startswith(prefix + "/"):
+            return join(folder, normpath(name[len(prefix) + 1:]))
+    return None
+
+
+def load_resource(name):
+    """Load a text resource."""
+
+    path = find_resource_path(name)
+    if path is None or not exists(path):
+        raise IOError("resource not found")
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_binary_resource(name):
+    """Load a binary resource."""
+
+    path = find_resource_path(name)
+    if path is None or not exists(path):
+        raise IOError("resource not found")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def load_settings(name):
+    """Load a settings file from the package."""
+
+    settings = settings_cache.get(name)
+    if settings is None:
+        path = join(ROOT, name)
+        values = {}
+        if exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                values = json.loads(strip_json_comments(f.read()))
+        settings = Settings(values)
+        settings_cache[name] = settings
+    return settings
+
+
+def save_settings(name):
+    """Save settings."""
+
+
+def status_message(msg):
+    """Show a status message."""
+
+    status.append(msg)
+
+
+def set_timeout(callback, delay=0):
+    """Run the callback after the delay in milliseconds of simulated time."""
+
+    timeout_count[0] += 1
+    heapq.heappush(timeouts, (clock[0] + delay / 1000.0, timeout_count[0], callback))
+
+
+def set_timeout_async(callback, delay=0):
+    """Run the callback after the delay in milliseconds of simulated time."""
+
+    set_timeout(callback, delay)
+
+
+def advance(seconds=0.0):
+    """Advance the simulated clock, running the timeouts that come due."""
+
+    clock[0] += seconds
+    while timeouts and timeouts[0][0] <= clock[0]:
+        callback = heapq.heappop(timeouts)[2]
+        callback()
+
+
+def version():
+    """Get the version."""
+
+    return "3211"
+
+
+def platform():
+    """Get the platform."""
+
+    return "linux"
+
+
+def arch():
+    """Get the architecture."""
+
+    return "x64"
+
+
+def packages_path():
+    """Get the packages path."""
+
+    return dirname(ROOT)
+
+
+def cache_path():
+    """Get the cache path."""
+
+    return tempfile.gettempdir()
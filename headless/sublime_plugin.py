@@ -0,0 +1,81 @@
+"""
+BracketHighlighter.
+
+Copyright (c) 2013 - 2016 Isaac Muse <isaacmuse@gmail.com>
+License: MIT
+
+Headless stand-in for the subset of the `sublime_plugin` API that BracketHighlighter uses.
+"""
+import re
+
+# Event listeners that receive the events of headless views.
+all_listeners = []
+
+
+class Command(object):
+    """Command."""
+
+    def is_enabled(self, *args, **kwargs):
+        """Check if the command is enabled."""
+
+        return True
+
+    def is_checked(self, *args, **kwargs):
+        """Check if the command is checked."""
+
+        return False
+
+
+class ApplicationCommand(Command):
+    """Application command."""
+
+
+class WindowCommand(Command):
+    """Window command."""
+
+    def __init__(self, window):
+        """Setup the command."""
+
+        self.window = window
+
+
+class TextCommand(Command):
+    """Text command."""
+
+    def __init__(self, view):
+        """Setup the command."""
+
+        self.view = view
+
+
+class EventListener(object):
+    """Event listener."""
+
+
+def command_name(cls):
+    """Get the name of a command class the way Sublime derives it."""
+
+    name = cls.__name__
+    if name.endswith("Command"):
+        name = name[:-len("Command")]
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+def subclasses(cls):
+    """Get all subclasses of a class."""
+
+    found = []
+    for sub in cls.__subclasses__():
+        found.append(sub)
+        found.extend(subclasses(sub))
+    return found
+
+
+def find_command(kind, name):
+    """Find the most recently defined command class of the kind with the name."""
+
+    command = None
+    for cls in subclasses(kind):
+        if command_name(cls) == name:
+            command = cls
+    return command
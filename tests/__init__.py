@@ -1 +1,10 @@
 """Unit Tests."""
+import unittest
+try:
+    import backrefs  # noqa: F401
+    BACKREFS_AVAILABLE = True
+except ImportError:
+    BACKREFS_AVAILABLE = False
+
+# Tests that load the plugin need `backrefs`, which Sublime installs as a dependency.
+requires_backrefs = unittest.skipUnless(BACKREFS_AVAILABLE, "backrefs is not installed")
@@ -0,0 +1,24 @@
+"""Test the plugin benchmarks."""
+import unittest
+from tests import requires_backrefs
+
+
+@requires_backrefs
+class TestBenchPlugins(unittest.TestCase):
+    """Test the plugin benchmark cases."""
+
+    def test_callbacks(self):
+        """Test that the callbacks are timed and the expected pairs are matched."""
+
+        from benchmarks import bench_plugins
+        stats, missed = bench_plugins.run_case("latexenvironments", "4k", 5)
+        self.assertEqual(missed, 0)
+        self.assertEqual(list(stats), ["compare", "highlighting"])
+        self.assertTrue(all(calls > 0 for calls, elapsed in stats.values()))
+
+    def test_command(self):
+        """Test that the run of a plugin command is timed."""
+
+        from benchmarks import bench_plugins
+        stats, missed = bench_plugins.run_case("bracketremove", "4k", 3)
+        self.assertEqual(stats["run"][0], 3)
@@ -0,0 +1,20 @@
+"""Test the regex engine benchmark."""
+import unittest
+from tests import requires_backrefs
+
+
+@requires_backrefs
+class TestBenchRegex(unittest.TestCase):
+    """Test the regex engine benchmark."""
+
+    def test_engines_agree(self):
+        """Test that both engines are timed and find the same brackets."""
+
+        from benchmarks import bench_regex
+        results = bench_regex.run(["nested", "keywords_ruby"], "4k", 1)
+        for name, engines in results.items():
+            self.assertGreater(engines["backrefs"]["brackets"], 0)
+            self.assertEqual(engines["backrefs"]["brackets"], engines["selected"]["brackets"])
+            self.assertTrue(engines["backrefs"]["ignorecase"])
+        self.assertFalse(results["nested"]["selected"]["ignorecase"])
+        self.assertIn("compile x", bench_regex.report(results))
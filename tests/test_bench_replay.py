@@ -0,0 +1,36 @@
+"""Test the replay benchmark."""
+import unittest
+from tests import requires_backrefs
+
+
+@requires_backrefs
+class TestBenchReplay(unittest.TestCase):
+    """Test replaying traces."""
+
+    def replay(self, trace, **kwargs):
+        """Replay a synthetic trace over a small document."""
+
+        from benchmarks import bench_replay, corpus
+        doc = corpus.generate("nested", "4k")
+        header, events = bench_replay.TRACES[trace](doc, **kwargs)
+        replay = bench_replay.Replay(events)
+        stats, latency = replay.run()
+        return doc, replay, stats, latency
+
+    def test_typing(self):
+        """Test that typing edits the buffer and its events are matched."""
+
+        doc, replay, stats, latency = self.replay("typing_burst", chars=20)
+        self.assertEqual(stats["events"], 40)
+        self.assertEqual(replay.views[1].size(), doc.size + 20)
+        self.assertGreater(stats["matches"], 0)
+        self.assertEqual(stats["matches"] + stats["coalesced"] + stats["skipped"], stats["events"])
+        self.assertEqual(list(latency), ["on_modified", "on_selection_modified"])
+
+    def test_debounce(self):
+        """Test that a key repeat walk is coalesced while the cursor keeps moving."""
+
+        doc, replay, stats, latency = self.replay("cursor_walk", steps=30)
+        self.assertEqual(stats["events"], 30)
+        self.assertEqual(stats["matches"], 1)
+        self.assertEqual(stats["coalesced"], 29)
@@ -0,0 +1,46 @@
+"""Test the benchmark corpus generators."""
+import unittest
+from benchmarks import corpus
+from tests import requires_backrefs
+
+
+class TestCorpus(unittest.TestCase):
+    """Test the generated documents."""
+
+    def test_sizes(self):
+        """Test that documents come close to the requested size."""
+
+        for name in corpus.GENERATORS:
+            doc = corpus.generate(name, "16k")
+            self.assertEqual(len(doc.text()), doc.size)
+            self.assertTrue(8 * 1024 < doc.size <= 17 * 1024, "%s: %d" % (name, doc.size))
+
+    def test_repeated_pairs(self):
+        """Test that the pairs of repeated segments point at brackets."""
+
+        doc = corpus.generate("nested", 3 * corpus.BLOCK_SIZE)
+        text = doc.text()
+        self.assertGreater(doc.segments[0].count, 1)
+        for pair in doc.pairs():
+            self.assertIn(text[pair.left[0]:pair.left[1]], "([{")
+            self.assertEqual(
+                text[pair.right[0]:pair.right[1]], {"(": ")", "[": "]", "{": "}"}[text[pair.left[0]]]
+            )
+
+    @requires_backrefs
+    def test_matches(self):
+        """Test that the matcher finds the expected pairs."""
+
+        import headless
+        bh_core = headless.load_plugin()
+        for name in corpus.GENERATORS:
+            doc = corpus.generate(name, "4k")
+            text = doc.text()
+            for pair in doc.sample(10, max_span=4000):
+                view = headless.new_view(text, doc.syntax, [pair.left[1]])
+                bh_core.bh_match(view)
+                found = None
+                for tail in bh_core.BhCore.last_match[view.id()][-1][0]:
+                    if tail[1] is not None and tail[2] is not None:
+                        found = ((tail[1].begin, tail[1].end), (tail[2].begin, tail[2].end))
+                self.assertEqual(found, (pair.left, pair.right), "%s: %r" % (name, pair))
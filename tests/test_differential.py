@@ -0,0 +1,41 @@
+"""Test the differential verification of fast paths."""
+import unittest
+from tests import requires_backrefs
+
+
+@requires_backrefs
+class TestDifferential(unittest.TestCase):
+    """Test checking fast paths against the reference."""
+
+    def test_agree(self):
+        """Test that the reference agrees with itself."""
+
+        from benchmarks import differential
+        self.assertIsNone(differential.check({}, cases=20))
+
+    def test_divergence(self):
+        """Test that a divergence is found and minimized."""
+
+        from benchmarks import differential
+        divergence = differential.check({"user_brackets": [{"name": "round", "enabled": False}]}, cases=20)
+        self.assertIsNotNone(divergence)
+        self.assertEqual(divergence.case["text"], "(")
+        self.assertEqual(len(divergence.case["steps"]), 1)
+        self.assertIsNotNone(differential.run_case(divergence.repro()))
+
+    def test_fast_paths(self):
+        """Test that the registered fast paths agree with the reference."""
+
+        from benchmarks import differential
+        for name in differential.FAST_PATHS:
+            for cases, use_corpus in ((10, False), (3, True)):
+                divergence = differential.check(name, cases=cases, use_corpus=use_corpus)
+                self.assertIsNone(divergence, "%s: %s" % (name, divergence))
+
+    def test_defaults(self):
+        """Test that the fast paths all on together, as shipped, agree with the reference."""
+
+        from benchmarks import differential
+        for cases, use_corpus in ((40, False), (len(differential.CORPORA), True)):
+            divergence = differential.check("defaults", cases=cases, use_corpus=use_corpus)
+            self.assertIsNone(divergence, "defaults: %s" % divergence)
@@ -0,0 +1,65 @@
+"""Test matching with the headless Sublime API."""
+import unittest
+from tests import requires_backrefs
+
+PYTHON = "Packages/Python/Python.tmLanguage"
+
+
+@requires_backrefs
+class TestHeadless(unittest.TestCase):
+    """Test matching in headless views."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin."""
+
+        import headless
+        cls.headless = headless
+        cls.bh_core = headless.load_plugin()
+
+    def match(self, text, sels, syntax=PYTHON):
+        """Match the brackets at the selections and return the view."""
+
+        view = self.headless.new_view(text, syntax, sels)
+        self.bh_core.bh_match(view)
+        return view
+
+    def regions(self, view, key):
+        """Get the regions of a key as tuples."""
+
+        return [(r.begin(), r.end()) for r in view.get_regions(key)]
+
+    def test_match(self):
+        """Test that the brackets around the cursor are highlighted."""
+
+        view = self.match("def f(a, [b, c]):\n    pass\n", [10])
+        self.assertEqual(self.regions(view, "bh_square"), [(9, 9), (14, 14)])
+        self.assertEqual(self.regions(view, "bh_round"), [])
+
+    def test_match_multi_select(self):
+        """Test that each cursor gets its match."""
+
+        view = self.match("x = (1, {'a': 2})\n", [5, 9])
+        self.assertEqual(self.regions(view, "bh_round"), [(4, 4), (16, 16)])
+        self.assertEqual(self.regions(view, "bh_curly"), [(8, 8), (15, 15)])
+
+    def test_string_scope(self):
+        """Test that brackets in strings don't match code brackets."""
+
+        view = self.match("f(')', x)\n", [7])
+        self.assertEqual(self.regions(view, "bh_round"), [(1, 1), (8, 8)])
+
+    def test_unmatched(self):
+        """Test that an unmatched bracket is flagged."""
+
+        view = self.match("f(a, b\n", [4])
+        self.assertEqual(self.regions(view, "bh_unmatched"), [(1, 2)])
+
+    def test_key_command(self):
+        """Test that the key command runs its plugin."""
+
+        view = self.headless.new_view("def f(a, [b, c]):\n    pass\n", PYTHON, [10])
+        view.window().run_command(
+            "bh_key", {"plugin": {"type": ["__all__"], "command": "bh_modules.bracketselect"}}
+        )
+        self.assertEqual([(r.begin(), r.end()) for r in view.sel()], [(10, 14)])
@@ -0,0 +1,77 @@
+"""Test reusing the cores of key commands."""
+import unittest
+from tests import requires_backrefs
+
+PYTHON = "Packages/Python/Python.tmLanguage"
+SELECT = {"type": ["__all__"], "command": "bh_modules.bracketselect"}
+
+
+@requires_backrefs
+class TestKeyCores(unittest.TestCase):
+    """Test the cache of key command cores."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin."""
+
+        import headless
+        cls.headless = headless
+        cls.bh_core = headless.load_plugin()
+
+    def setUp(self):
+        """Start with no cached cores."""
+
+        import sublime
+        self.settings = sublime.load_settings("bh_core.sublime-settings")
+        self.bh_core.clear_key_cores()
+
+    def key(self, view, **args):
+        """Run the key command on the view and return the selections."""
+
+        view.window().focus_view(view)
+        view.window().run_command("bh_key", args)
+        return [(r.begin(), r.end()) for r in view.sel()]
+
+    def test_reuse(self):
+        """Test that key commands with the same arguments share a core."""
+
+        view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+        self.key(view, plugin=SELECT)
+        core = list(self.bh_core.key_cores.values())[0]
+        self.key(view, plugin=SELECT)
+        self.key(view, lines=True)
+        self.assertEqual(len(self.bh_core.key_cores), 2)
+        self.assertIs(self.bh_core.get_key_core(True, False, False, False, False, {}, SELECT), core)
+
+    def test_eviction(self):
+        """Test that the least recently used core is dropped when the cache is full."""
+
+        get_key_core = self.bh_core.get_key_core
+        first = get_key_core(True, False, False, False, False, {}, {})
+        second = get_key_core(False, False, False, False, False, {}, {})
+        for i in range(self.bh_core.KEY_CORE_CACHE_SIZE - 2):
+            get_key_core(True, False, False, False, False, {"round": [str(i)]}, {})
+        self.assertIs(get_key_core(True, False, False, False, False, {}, {}), first)
+        get_key_core(True, True, False, False, False, {}, {})
+        self.assertEqual(len(self.bh_core.key_cores), self.bh_core.KEY_CORE_CACHE_SIZE)
+        self.assertIs(get_key_core(True, False, False, False, False, {}, {}), first)
+        self.assertIsNot(get_key_core(False, False, False, False, False, {}, {}), second)
+
+    def test_settings_changed(self):
+        """Test that changing the settings drops the cores, so key commands use the new settings."""
+
+        view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+        self.assertEqual(self.key(view, plugin=SELECT), [(6, 7)])
+        self.bh_core.bh_match(view)
+        self.assertTrue(self.bh_core.key_cores)
+        self.assertIn(view.id(), self.bh_core.BhCore.last_match)
+
+        self.settings.set("user_brackets", [{"name": "round", "enabled": False}])
+        try:
+            self.assertFalse(self.bh_core.key_cores)
+            self.assertNotIn(view.id(), self.bh_core.BhCore.last_match)
+            view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+            self.assertEqual(self.key(view, plugin=SELECT), [(6, 6)])
+        finally:
+            self.settings.set("user_brackets", [])
+        self.assertEqual(self.key(view, plugin=SELECT), [(6, 7)])
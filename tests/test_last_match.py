@@ -0,0 +1,148 @@
+"""Test key commands reusing the listener's last match."""
+import unittest
+from tests import requires_backrefs
+
+PYTHON = "Packages/Python/Python.tmLanguage"
+SELECT = {"type": ["__all__"], "command": "bh_modules.bracketselect"}
+
+
+@requires_backrefs
+class TestLastMatch(unittest.TestCase):
+    """Test that a replayed match gives the same result as a fresh search."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin."""
+
+        import headless
+        cls.headless = headless
+        cls.bh_core = headless.load_plugin()
+
+    def setUp(self):
+        """Count the replayed selections."""
+
+        self.replayed = []
+        replay_match = self.bh_core.BhCore.replay_match
+
+        def count(core, tails):
+            """Count the replay and replay the match."""
+
+            self.replayed.append(tails)
+            return replay_match(core, tails)
+
+        self.bh_core.BhCore.replay_match = count
+        self.addCleanup(setattr, self.bh_core.BhCore, "replay_match", replay_match)
+
+    def tearDown(self):
+        """Forget the cores and matches of the tests."""
+
+        self.bh_core.HIGH_VISIBILITY = False
+        self.bh_core.clear_key_cores()
+
+    def key(self, view, **args):
+        """Run the key command on the view and get the selections and highlighted regions."""
+
+        view.window().focus_view(view)
+        view.window().run_command("bh_key", args)
+        regions = dict(
+            (key, [(r.begin(), r.end()) for r in view.get_regions(key)])
+            for key in view.regions if key.startswith("bh_")
+        )
+        return [(r.begin(), r.end()) for r in view.sel()], regions
+
+    def compare(self, text, sels, listener=None, **args):
+        """
+        Run the key command after a listener match and on a fresh view.
+
+        `listener` is called before the listener match.  Returns the number
+        of selections the key command replayed from the listener's match.
+        """
+
+        view = self.headless.new_view(text, PYTHON, sels)
+        if listener is not None:
+            listener()
+        self.bh_core.bh_match(view)
+        self.assertIn(view.id(), self.bh_core.BhCore.last_match)
+        replayed = self.key(view, **args)
+        used = len(self.replayed)
+
+        fresh = self.headless.new_view(text, PYTHON, sels)
+        del self.replayed[:]
+        expected = self.key(fresh, **args)
+        self.assertFalse(self.replayed)
+        self.assertEqual(replayed, expected)
+        return used
+
+    def test_multi_select(self):
+        """Test replaying the matches of several selections."""
+
+        text = "x = (1, [2, 3], {'a': (4)}, 'b(')\n"
+        self.assertEqual(self.compare(text, [5, 9, 17, 23, 30], plugin=SELECT), 5)
+        self.assertEqual(self.compare(text, [5, 9, 17, 23, 30]), 5)
+
+    def test_high_visibility(self):
+        """Test replaying a match in high visibility mode."""
+
+        def toggle():
+            """Turn on high visibility."""
+
+            self.bh_core.HIGH_VISIBILITY = True
+
+        text = "x = f(a, 'b(c)', [d])\n"
+        self.assertEqual(self.compare(text, [7, 12, 18], toggle, plugin=SELECT), 3)
+        self.assertEqual(self.compare(text, [7, 12, 18], toggle), 3)
+
+    def test_high_visibility_changed(self):
+        """Test that a match from before high visibility was toggled isn't replayed."""
+
+        view = self.headless.new_view("x = f(a, [b])\n", PYTHON, [7, 10])
+        self.bh_core.bh_match(view)
+        self.bh_core.HIGH_VISIBILITY = True
+        replayed = self.key(view)
+        self.assertFalse(self.replayed)
+
+        fresh = self.headless.new_view("x = f(a, [b])\n", PYTHON, [7, 10])
+        self.assertEqual(replayed, self.key(fresh))
+
+    def test_threshold_whole_buffer(self):
+        """Test that a match that searched the whole buffer is replayed when the key command ignores the threshold."""
+
+        self.assertEqual(self.compare("x = f(a, [b])\n", [7, 10], plugin=SELECT), 2)
+
+    def test_threshold_changed(self):
+        """Test that a match limited by the threshold is only replayed by key commands with the same threshold."""
+
+        text = "x = (\n%s)\n" % ("a,\n" * 3000)
+        self.assertEqual(self.compare(text, [len(text) // 2], plugin=SELECT), 0)
+        self.assertEqual(self.compare(text, [len(text) // 2], threshold=False, plugin=SELECT), 1)
+
+        view = self.headless.new_view(text, PYTHON, [len(text) // 2])
+        self.assertEqual(self.key(view, plugin=SELECT)[0], [(5, len(text) - 2)])
+
+    def test_threshold_setting_changed(self):
+        """Test that a match from before the search threshold was changed isn't replayed."""
+
+        import sublime
+        settings = sublime.load_settings("bh_core.sublime-settings")
+        text = "x = (\n%s)\n" % ("a,\n" * 3000)
+        view = self.headless.new_view(text, PYTHON, [len(text) // 2])
+        self.bh_core.bh_match(view)
+        settings.set("search_threshold", 10000)
+        try:
+            replayed = self.key(view, threshold=False, plugin=SELECT)
+            self.assertFalse(self.replayed)
+            fresh = self.headless.new_view(text, PYTHON, [len(text) // 2])
+            self.assertEqual(replayed, self.key(fresh, threshold=False, plugin=SELECT))
+        finally:
+            settings.set("search_threshold", 5000)
+        self.assertEqual(replayed[0], [(5, len(text) - 2)])
+
+    def test_edited(self):
+        """Test that a match from before an edit isn't replayed."""
+
+        import sublime
+        view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+        self.bh_core.bh_match(view)
+        view.insert(sublime.Edit(), 0, "(")
+        self.key(view, plugin=SELECT)
+        self.assertFalse(self.replayed)
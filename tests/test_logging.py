@@ -0,0 +1,77 @@
+"""Test the debug log."""
+import unittest
+from tests import requires_backrefs
+
+PYTHON = "Packages/Python/Python.tmLanguage"
+
+
+@requires_backrefs
+class TestLogging(unittest.TestCase):
+    """Test that debug messages are only built when debugging is enabled."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin."""
+
+        import headless
+        cls.headless = headless
+        cls.bh_core = headless.load_plugin()
+        from BracketHighlighter import bh_logging
+        cls.bh_logging = bh_logging
+
+    def setUp(self):
+        """Capture the log."""
+
+        import sublime
+        self.settings = sublime.load_settings("bh_core.sublime-settings")
+        self.logged = []
+        self.built = 0
+        log = self.bh_logging.log
+        self.bh_logging.log = self.logged.append
+        self.addCleanup(setattr, self.bh_logging, "log", log)
+        self.addCleanup(self.settings.set, "debug_enable", False)
+
+    def message(self):
+        """Build a message, counting how often it is built."""
+
+        self.built += 1
+        return "built"
+
+    def test_disabled(self):
+        """Test that nothing is built or logged while debugging is disabled."""
+
+        self.settings.set("debug_enable", False)
+        self.bh_logging.debug(self.message)
+        self.bh_logging.debug("%s and %s", "a", "b")
+        self.assertEqual(self.built, 0)
+        self.assertEqual(self.logged, [])
+
+    def test_enabled(self):
+        """Test that callables are called and arguments are formatted while debugging is enabled."""
+
+        self.settings.set("debug_enable", True)
+        self.bh_logging.debug(self.message)
+        self.bh_logging.debug("%s and %s", "a", "b")
+        self.bh_logging.debug("100%")
+        self.assertEqual(self.built, 1)
+        self.assertEqual(self.logged, ["built", "a and b", "100%"])
+
+    def test_setting_changed(self):
+        """Test that the cached setting follows the settings."""
+
+        self.settings.set("debug_enable", True)
+        self.assertTrue(self.bh_logging.debug_enabled)
+        self.settings.set("debug_enable", False)
+        self.assertFalse(self.bh_logging.debug_enabled)
+
+    def test_match(self):
+        """Test that a timed match only logs its timings while debugging is enabled."""
+
+        self.settings.set("perf_enable", True)
+        self.addCleanup(self.settings.set, "perf_enable", False)
+        self.bh_core.bh_match(self.headless.new_view("x = f(a)\n", PYTHON, [6]))
+        self.assertEqual(self.logged, [])
+
+        self.settings.set("debug_enable", True)
+        self.bh_core.bh_match(self.headless.new_view("x = f(a)\n", PYTHON, [6]))
+        self.assertTrue([msg for msg in self.logged if msg.startswith("Match ")])
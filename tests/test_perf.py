@@ -0,0 +1,209 @@
+"""Test the performance timers."""
+import unittest
+from tests import requires_backrefs
+
+PYTHON = "Packages/Python/Python.tmLanguage"
+
+
+@requires_backrefs
+class TestPerf(unittest.TestCase):
+    """Test the match timings that are recorded."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin."""
+
+        import headless
+        cls.headless = headless
+        cls.bh_core = headless.load_plugin()
+        from BracketHighlighter import bh_perf
+        cls.bh_perf = bh_perf
+
+    def setUp(self):
+        """Enable the timers."""
+
+        import sublime
+        self.settings = sublime.load_settings("bh_core.sublime-settings")
+        self.settings.set("perf_enable", True)
+
+    def tearDown(self):
+        """Disable the timers, which clears what they recorded."""
+
+        self.settings.set("perf_api_calls", False)
+        self.settings.set("perf_enable", False)
+
+    def match(self, text, sels):
+        """Match the brackets at the selections and return the view."""
+
+        view = self.headless.new_view(text, PYTHON, sels)
+        self.bh_core.bh_match(view)
+        return view
+
+    def test_phases(self):
+        """Test that the phases of a match are recorded per view and per language."""
+
+        view = self.match("x = f(a, 'b')\n", [7])
+        self.assertIsNone(self.bh_perf.timer)
+        total, phases = self.bh_perf.view_stats[view.id()][-1]
+        self.assertIs(self.bh_perf.language_stats["python"][-1][1], phases)
+        self.assertTrue(set(phases) <= set(self.bh_perf.PHASES))
+        self.assertTrue({"snapshot", "render"} <= set(phases))
+        self.assertAlmostEqual(sum(phases.values()), total, places=6)
+
+        report = self.bh_perf.perf_report()
+        self.assertIn("Language python (last 1 matches):", report)
+        self.assertIn("View %d (last 1 matches):" % view.id(), report)
+
+    def test_disabled(self):
+        """Test that nothing is timed while the timers are disabled."""
+
+        self.settings.set("perf_enable", False)
+        self.match("x = f(a)\n", [6])
+        self.assertEqual(len(self.bh_perf.view_stats), 0)
+        self.assertIn("disabled", self.bh_perf.perf_report())
+
+    def test_api_calls(self):
+        """Test that the API calls of a match are counted when enabled."""
+
+        self.settings.set("perf_api_calls", True)
+        self.match("x = f(a, 'b')\n", [7])
+        calls = dict(self.bh_perf.last_api_calls)
+        self.assertIn("substr", calls)
+        count, elapsed = calls["substr"]
+        self.assertGreater(count, 0)
+        self.assertGreaterEqual(elapsed, 0)
+        self.assertEqual(self.bh_perf.api_stats["substr"], calls["substr"])
+
+        self.match("x = f(a, 'b')\n", [7])
+        self.assertEqual(self.bh_perf.api_stats["substr"][0], count * 2)
+        report = self.bh_perf.perf_report()
+        self.assertIn("API calls of the last match", report)
+        self.assertIn("API calls of all matches", report)
+
+    def test_api_calls_disabled(self):
+        """Test that the view isn't wrapped unless API calls are counted."""
+
+        view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+        self.bh_perf.begin_match()
+        try:
+            self.assertIs(self.bh_perf.account_view(view), view)
+        finally:
+            self.bh_perf.cancel_match()
+        self.match("x = f(a)\n", [6])
+        self.assertFalse(self.bh_perf.api_stats)
+
+    def test_worst_calls(self):
+        """Test that the calls that took the most time are reported first."""
+
+        calls = {"substr": [10, 0.001], "match_selector": [3, 0.004], "size": [1, 0.0001]}
+        self.assertEqual([name for name, entry in self.bh_perf.worst_calls(calls, 2)], ["match_selector", "substr"])
+
+    def listener(self):
+        """Get the event listener that matches the views."""
+
+        for listener in self.headless.sublime.event_listeners():
+            if type(listener).__name__ == "BhListenerCommand":
+                return listener
+
+    def test_histogram(self):
+        """Test the buckets and percentiles of the latencies."""
+
+        histogram = self.bh_perf.LatencyHistogram()
+        for queued, compute in ((0.1, 0.2), (1, 2), (1500, 500), (0.5, 0.5)):
+            histogram.add(queued, compute)
+        exported = histogram.export()
+        self.assertEqual(exported["count"], 4)
+        self.assertEqual(exported["buckets"]["<=0.5ms"], 1)
+        self.assertEqual(exported["buckets"]["<=1ms"], 1)
+        self.assertEqual(exported["buckets"]["<=4ms"], 1)
+        self.assertEqual(exported["buckets"][">1024ms"], 1)
+        self.assertEqual(sum(exported["buckets"].values()), 4)
+        self.assertEqual(exported["total"], {"p50": 1.0, "p95": 2000.0, "p99": 2000.0})
+        self.assertEqual(exported["queued"]["p50"], 0.5)
+        self.assertEqual(exported["compute"]["p50"], 0.5)
+
+    def test_event_latency(self):
+        """Test that the latency of a listener event is recorded under the event that queued the match."""
+
+        view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+        self.addCleanup(setattr, self.bh_core.bh_thread, "modified", False)
+        listener = self.listener()
+        listener.on_modified(view)
+        listener.on_selection_modified(view)
+        self.bh_core.bh_thread.payload()
+        self.assertEqual(list(self.bh_perf.latency_stats), ["on_modified"])
+        self.assertEqual(self.bh_perf.latency_stats["on_modified"].count, 1)
+        self.assertIsNone(self.bh_perf.pending_event)
+
+        listener.on_selection_modified(view)
+        view.window().run_command("bh_key")
+        self.assertEqual(self.bh_perf.latency_stats["key"].count, 1)
+        self.assertNotIn("on_selection_modified", self.bh_perf.latency_stats)
+        self.assertIn("Event key (1 events):", self.bh_perf.perf_report())
+
+    def test_export_latency(self):
+        """Test that the export command writes the histograms as JSON to the cache directory."""
+
+        import json
+        import os
+        import sublime
+        messages = []
+        status_message = sublime.status_message
+        sublime.status_message = messages.append
+        self.addCleanup(setattr, sublime, "status_message", status_message)
+
+        sublime.run_command("bh_export_latency")
+        self.assertEqual(messages, ["BracketHighlighter: no latency recorded"])
+
+        self.bh_perf.latency_stats["key"] = self.bh_perf.LatencyHistogram()
+        self.bh_perf.latency_stats["key"].add(1, 2)
+        sublime.run_command("bh_export_latency")
+        path = messages[-1].split(" exported to ")[1]
+        self.addCleanup(os.remove, path)
+        self.assertTrue(path.startswith(sublime.cache_path()))
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(data["version"], sublime.version())
+        self.assertEqual(data["events"]["key"]["count"], 1)
+        self.assertEqual(data["events"]["key"]["total"]["p50"], 3)
+
+    def test_early_return(self):
+        """Test that a match with nothing to search for doesn't leave its timer for the next match."""
+
+        core = self.bh_core.bh_match.__self__
+        view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+        init_match = core.init_match
+
+        def disable(num_sels):
+            """Prepare the match with the rules disabled."""
+
+            init_match(num_sels)
+            core.rules.enabled = False
+
+        core.init_match = disable
+        try:
+            core.match(view)
+        finally:
+            del core.init_match
+            core.view_tracker = (None, None)
+        self.assertIsNone(self.bh_perf.timer)
+
+    def test_error(self):
+        """Test that a match that fails doesn't leave its timer for the next match."""
+
+        core = self.bh_core.bh_match.__self__
+        view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+
+        def fail(num_sels):
+            """Fail to prepare the match."""
+
+            raise RuntimeError("match failed")
+
+        core.init_match = fail
+        try:
+            with self.assertRaises(RuntimeError):
+                core.match(view)
+        finally:
+            del core.init_match
+            self.bh_core.bh_regions.set_busy(view, False)
+        self.assertIsNone(self.bh_perf.timer)
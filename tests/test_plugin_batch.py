@@ -0,0 +1,189 @@
+"""Test running bracket plugins on many selections at once."""
+import os
+import shutil
+import tempfile
+import unittest
+from tests import requires_backrefs
+
+PYTHON = "Packages/Python/Python.tmLanguage"
+
+# Plugin dropping the opening bracket of the named brackets and selecting the content of the others.
+DROP_PLUGIN = '''
+import sublime
+import BracketHighlighter.bh_plugin as bh_plugin
+
+
+class DropLeft(bh_plugin.BracketPluginCommand):
+    def run(self, edit, name, drop=()):
+        if name in drop:
+            self.left = None
+        else:
+            self.selection = [sublime.Region(self.left.end, self.right.begin)]
+
+
+def plugin():
+    return DropLeft
+'''
+
+# Plugin moving each cursor one character right, which doesn't say whether it shares its results.
+STEP_PLUGIN = '''
+import sublime
+import BracketHighlighter.bh_plugin as bh_plugin
+
+
+class StepRight(bh_plugin.BracketPluginCommand):
+    def run(self, edit, name):
+        self.selection = [sublime.Region(self.selection[0].begin() + 1)]
+
+
+def plugin():
+    return StepRight
+'''
+
+# Read only plugin selecting the start of the buffer if it was given nothing through the payload.
+PROBE_PLUGIN = '''
+import sublime
+import BracketHighlighter.bh_plugin as bh_plugin
+
+
+class Probe(bh_plugin.BracketPluginCommand):
+    read_only = True
+
+    def run(self, edit, name):
+        payload = bh_plugin.Payload
+        if edit is None and payload.plugin is None and payload.entries is None:
+            self.selection = [sublime.Region(0)]
+
+
+def plugin():
+    return Probe
+'''
+
+
+@requires_backrefs
+class TestPluginBatch(unittest.TestCase):
+    """Test the results of plugins run on the matches of all selections."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin and a test bracket plugin."""
+
+        import headless
+        cls.headless = headless
+        cls.bh_core = headless.load_plugin()
+        import sublime
+        cls.folder = tempfile.mkdtemp()
+        for name, source in (("drop_left", DROP_PLUGIN), ("probe", PROBE_PLUGIN), ("step_right", STEP_PLUGIN)):
+            with open(os.path.join(cls.folder, name + ".py"), "w") as f:
+                f.write(source)
+        sublime.resource_paths["Packages/BhTests"] = cls.folder
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the test bracket plugin."""
+
+        import sublime
+        del sublime.resource_paths["Packages/BhTests"]
+        shutil.rmtree(cls.folder)
+
+    def tearDown(self):
+        """Forget the cores configured by the tests."""
+
+        self.bh_core.clear_key_cores()
+
+    def run_plugin(self, text, sels, command, args=None, syntax=PYTHON):
+        """Run a bracket plugin on the selections and return the view."""
+
+        view = self.headless.new_view(text, syntax, sels)
+        plugin = {"type": ["__all__"], "command": command}
+        if args is not None:
+            plugin["args"] = args
+        view.window().run_command("bh_key", {"plugin": plugin})
+        return view
+
+    def sels(self, view):
+        """Get the selections as tuples."""
+
+        return [(r.begin(), r.end()) for r in view.sel()]
+
+    def test_separate_pairs(self):
+        """Test that the brackets of each selection are removed."""
+
+        view = self.run_plugin("f(a) + g[b] + h{c}\n", [2, 9, 16], "bh_modules.bracketremove")
+        self.assertEqual(view.substr(self.headless.sublime.Region(0, view.size())), "fa + gb + hc\n")
+
+    def test_nested_pairs(self):
+        """Test that nested pairs of different selections are both removed."""
+
+        view = self.run_plugin("x = ((a) b)\n", [6, 9], "bh_modules.bracketremove")
+        self.assertEqual(view.substr(self.headless.sublime.Region(0, view.size())), "x = a b\n")
+
+    def test_duplicate_pair(self):
+        """Test that selections in the same pair remove it once and keep their own selections."""
+
+        view = self.run_plugin("x = (a, b, c)\n", [5, 8, 11], "bh_modules.bracketremove")
+        self.assertEqual(view.substr(self.headless.sublime.Region(0, view.size())), "x = a, b, c\n")
+        self.assertEqual(len(view.sel()), 3)
+
+    def test_duplicate_cursor(self):
+        """Test that the same cursor given twice runs the plugin once."""
+
+        view = self.run_plugin("x = (a)\n", [5, 5], "bh_modules.bracketselect")
+        self.assertEqual(self.sels(view), [(5, 6)])
+
+    def test_selection_dependent(self):
+        """Test that selections in the same pair each get the result of their own selection."""
+
+        view = self.run_plugin(
+            "x = (a b)\n", [6, 5], "bh_modules.bracketselect", {"select": "left", "alternate": True}
+        )
+        self.assertEqual(self.sels(view), [(5, 5), (8, 8)])
+
+    def test_selection_default(self):
+        """Test that plugins run for each selection in a pair unless they share their results."""
+
+        view = self.run_plugin("x = (a b c)\n", [5, 7, 9], "BhTests.step_right")
+        self.assertEqual(self.sels(view), [(6, 6), (8, 8), (10, 10)])
+
+    def test_remove_block_shared_line(self):
+        """Test removing the blocks of pairs whose brackets share a line."""
+
+        view = self.run_plugin(
+            "x = (\n    1\n), (\n    2\n)\n", [10, 20], "bh_modules.bracketremove", {"remove_block": True}
+        )
+        self.assertEqual(view.substr(self.headless.sublime.Region(0, view.size())), "    1\n    2\n")
+
+    def test_scope_fallback(self):
+        """Test that a scope match the plugin leaves unmatched falls back to the brackets around it."""
+
+        import sublime
+        settings = sublime.load_settings("bh_core.sublime-settings")
+        scopes = settings.get("scope_brackets")
+        quote = dict([rule for rule in scopes if rule["name"] == "py_double_quote"][0])
+        del quote["sub_bracket_search"]
+        settings.set("scope_brackets", [quote])
+        settings.set("show_unmatched", False)
+        try:
+            view = self.run_plugin('x = ("a b")\n', [7], "BhTests.drop_left", {"drop": ["py_double_quote"]})
+        finally:
+            settings.set("scope_brackets", scopes)
+            settings.set("show_unmatched", True)
+        self.assertEqual(self.sels(view), [(5, 10)])
+
+    def test_sub_search_fallback(self):
+        """Test that a match inside a scope that the plugin leaves unmatched falls back to the scope match."""
+
+        import sublime
+        settings = sublime.load_settings("bh_core.sublime-settings")
+        settings.set("show_unmatched", False)
+        try:
+            view = self.run_plugin('x = "a (b) c"\n', [9], "BhTests.drop_left", {"drop": ["round"]})
+        finally:
+            settings.set("show_unmatched", True)
+        self.assertEqual(self.sels(view), [(5, 12)])
+
+    def test_read_only_direct(self):
+        """Test that read only plugins are called without an edit or the payload."""
+
+        view = self.run_plugin("x = (a)\n", [5], "BhTests.probe")
+        self.assertEqual(self.sels(view), [(0, 0)])
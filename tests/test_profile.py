@@ -0,0 +1,111 @@
+"""Test profiling matches and reporting memory."""
+import unittest
+from tests import requires_backrefs
+
+PYTHON = "Packages/Python/Python.tmLanguage"
+
+
+@requires_backrefs
+class TestProfile(unittest.TestCase):
+    """Test the profiler and the memory report."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin."""
+
+        import headless
+        cls.headless = headless
+        cls.bh_core = headless.load_plugin()
+        from BracketHighlighter import bh_profile
+        cls.bh_profile = bh_profile
+
+    def run_command(self, name, **args):
+        """Run a window command in the active window."""
+
+        self.headless.sublime.active_window().run_command(name, args)
+
+    def match(self, text, sels):
+        """Match the brackets at the selections and return the view."""
+
+        view = self.headless.new_view(text, PYTHON, sels)
+        self.bh_core.bh_match(view)
+        return view
+
+    def test_trace_allocations(self):
+        """Test that the net and peak allocation of the last match are reported."""
+
+        self.run_command("bh_memory_report", trace=True)
+        self.addCleanup(self.run_command, "bh_memory_report", trace=False)
+        self.match("x = [%s]\n" % ", ".join("(%d)" % i for i in range(2000)), [3])
+        net, peak = self.bh_profile.last_trace
+        self.assertGreater(peak, 0)
+        self.assertGreaterEqual(peak, net)
+
+        self.match("x = (a)\n", [5])
+        self.assertLess(self.bh_profile.last_trace[1], peak)
+        report = self.bh_profile.memory_report()
+        self.assertIn("peak allocation", report)
+        self.assertNotIn("not available", report)
+
+    def test_trace_off(self):
+        """Test that stopping the trace forgets the last match's allocations."""
+
+        self.run_command("bh_memory_report", trace=True)
+        self.match("x = (a)\n", [5])
+        self.run_command("bh_memory_report", trace=False)
+        self.assertIsNone(self.bh_profile.last_trace)
+        self.assertIn("Allocation tracing is off", self.bh_profile.memory_report())
+
+    def test_profile_matches(self):
+        """Test that the requested number of matches is profiled and written to the cache directory."""
+
+        import os
+        import sublime
+        messages = []
+        status_message = sublime.status_message
+        sublime.status_message = messages.append
+        self.addCleanup(setattr, sublime, "status_message", status_message)
+
+        self.headless.sublime.run_command("bh_profile_matches", {"count": 2})
+        self.assertEqual(self.bh_profile.remaining, 2)
+        self.match("x = f(a)\n", [6])
+        self.assertIsNotNone(self.bh_profile.profiler)
+        self.assertEqual(self.bh_profile.remaining, 1)
+        self.match("x = [b]\n", [5])
+        self.assertIsNone(self.bh_profile.profiler)
+        self.assertEqual(self.bh_profile.remaining, 0)
+
+        summary = messages[-1].split(" written to ")[1]
+        path = summary[:-len("txt")] + "pstats"
+        self.addCleanup(os.remove, path)
+        self.addCleanup(os.remove, summary)
+        self.assertTrue(summary.startswith(sublime.cache_path()))
+        self.assertTrue(os.path.exists(path))
+        with open(summary) as f:
+            self.assertIn("bh_core.py", f.read())
+
+        self.match("x = (c)\n", [5])
+        self.assertEqual(len(messages), 2)
+
+    def test_profile_error(self):
+        """Test that a match that fails still counts towards the profiled matches."""
+
+        import os
+        import sublime
+        messages = []
+        status_message = sublime.status_message
+        sublime.status_message = messages.append
+        self.addCleanup(setattr, sublime, "status_message", status_message)
+
+        def fail():
+            """Fail the match."""
+
+            raise RuntimeError("match failed")
+
+        self.headless.sublime.run_command("bh_profile_matches", {"count": 1})
+        with self.assertRaises(RuntimeError):
+            self.bh_profile.run(fail)
+        self.assertIsNone(self.bh_profile.profiler)
+        summary = messages[-1].split(" written to ")[1]
+        self.addCleanup(os.remove, summary[:-len("txt")] + "pstats")
+        self.addCleanup(os.remove, summary)
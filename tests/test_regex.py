@@ -0,0 +1,63 @@
+"""Test picking the regex engine of the rules."""
+import re
+import unittest
+from tests import requires_backrefs
+
+FLAGS = re.MULTILINE | re.IGNORECASE
+
+
+@requires_backrefs
+class TestRegex(unittest.TestCase):
+    """Test which rules are compiled with `re` and which ignore case."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Import the regex helpers."""
+
+        import headless
+        headless.install()
+        from BracketHighlighter import bh_regex
+        cls.bh_regex = bh_regex
+
+    def test_needs_backrefs(self):
+        """Test which patterns use syntax only `backrefs` has."""
+
+        needs_backrefs = self.bh_regex.needs_backrefs
+        self.assertTrue(needs_backrefs(r"(\p{Lu}+)"))
+        self.assertTrue(needs_backrefs(r"([[:alpha:]]+)"))
+        self.assertTrue(needs_backrefs(r"(\Qa.b\E)"))
+        self.assertFalse(needs_backrefs(r"(\\p)"))
+        self.assertFalse(needs_backrefs(r"(\b(end)\b)"))
+        self.assertFalse(needs_backrefs(r"(\{)|(\})"))
+
+    def test_uses_case(self):
+        """Test which patterns can match differently ignoring case."""
+
+        uses_case = self.bh_regex.uses_case
+        self.assertTrue(uses_case(r"(end)"))
+        self.assertTrue(uses_case(r"(\x41)"))
+        self.assertTrue(uses_case(r"(\()\1"))
+        self.assertTrue(uses_case(r"(?P<q>\()(?P=q)"))
+        self.assertTrue(uses_case("(µ)"))
+        self.assertFalse(uses_case(r"(\{)|(\})"))
+        self.assertFalse(uses_case(r"(?P<name>\()"))
+        self.assertFalse(uses_case(r"(?<=[\s;])(\b\d\w)"))
+
+    def test_compile_search(self):
+        """Test the flags a pattern is compiled with."""
+
+        compile_search = self.bh_regex.compile_search
+
+        pattern = compile_search(r"(\{)|(\})", FLAGS)
+        self.assertFalse(pattern.flags & re.IGNORECASE)
+        self.assertIsNotNone(pattern.search("}"))
+
+        pattern = compile_search(r"\b(end)\b", FLAGS)
+        self.assertTrue(pattern.flags & re.IGNORECASE)
+        self.assertIsNotNone(pattern.search("END"))
+
+        pattern = compile_search(r"(\p{Lu}+)", FLAGS)
+        self.assertEqual(pattern.search("aBC").group(1), "aBC")
+
+        pattern = compile_search(r"(\{)", FLAGS, select=False)
+        self.assertTrue(pattern.flags & re.IGNORECASE)
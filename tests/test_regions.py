@@ -0,0 +1,164 @@
+"""Test the gutter icons and the regions applied to views."""
+import unittest
+from tests import requires_backrefs
+
+PYTHON = "Packages/Python/Python.tmLanguage"
+ICONS = "Packages/BracketHighlighter/icons"
+
+
+@requires_backrefs
+class TestIcons(unittest.TestCase):
+    """Test locating the gutter icons."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin."""
+
+        import headless
+        cls.headless = headless
+        headless.load_plugin()
+        from BracketHighlighter import bh_regions
+        cls.bh_regions = bh_regions
+
+    def setUp(self):
+        """Count the resources that are loaded."""
+
+        import sublime
+        self.settings = sublime.load_settings("bh_core.sublime-settings")
+        self.bh_regions.icon_cache.clear()
+        self.loaded = []
+        load_binary_resource = sublime.load_binary_resource
+
+        def count(name):
+            """Count the resource and load it."""
+
+            self.loaded.append(name)
+            return load_binary_resource(name)
+
+        sublime.load_binary_resource = count
+        self.addCleanup(setattr, sublime, "load_binary_resource", load_binary_resource)
+
+    def test_cached(self):
+        """Test that the icons of an option are only located once."""
+
+        icons = self.bh_regions.select_bracket_icons("dot", ICONS)
+        self.assertEqual(icons[0], ICONS + "/dot.png")
+        self.assertEqual(len(self.loaded), 6)
+        self.assertEqual(self.bh_regions.select_bracket_icons("dot", ICONS), icons)
+        self.assertEqual(len(self.loaded), 6)
+
+        self.bh_regions.select_bracket_icons("dot", "Packages/User/icons")
+        self.assertEqual(len(self.loaded), 12)
+
+    def test_missing(self):
+        """Test that icons that can't be found are cached as missing too."""
+
+        icons = self.bh_regions.select_bracket_icons("missing", ICONS)
+        self.assertEqual(icons, ("",) * 6)
+        self.bh_regions.select_bracket_icons("missing", ICONS)
+        self.assertEqual(len(self.loaded), 6)
+
+    def test_styles_changed(self):
+        """Test that the icons are located again only when the bracket styles change."""
+
+        dot = ICONS + "/dot.png"
+        styles = self.settings.get("bracket_styles")
+        self.bh_regions.select_bracket_icons("dot", ICONS)
+        self.settings.set("show_unmatched", True)
+        self.bh_regions.select_bracket_icons("dot", ICONS)
+        self.assertEqual(self.loaded.count(dot), 1)
+
+        changed = dict(styles)
+        changed["default"] = dict(styles["default"], icon="question")
+        self.settings.set("bracket_styles", changed)
+        self.settings.set("bracket_styles", styles)
+        self.bh_regions.select_bracket_icons("dot", ICONS)
+        self.assertGreater(self.loaded.count(dot), 1)
+
+
+@requires_backrefs
+class TestRegions(unittest.TestCase):
+    """Test tracking the views being matched and the regions applied to them."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin."""
+
+        import headless
+        cls.headless = headless
+        cls.bh_core = headless.load_plugin()
+        from BracketHighlighter import bh_regions
+        cls.bh_regions = bh_regions
+
+    def match(self, view, sels=None):
+        """Match the brackets at the selections."""
+
+        if sels is not None:
+            view.sel().clear()
+            for sel in sels:
+                view.sel().add(self.headless.sublime.Region(sel))
+        self.bh_core.bh_match(view)
+
+    def test_applied(self):
+        """Test that the applied region keys are kept in memory and cleared by the next match."""
+
+        view = self.headless.new_view("x = f(a, [b])\n", PYTHON, [6])
+        self.match(view)
+        keys = self.bh_regions.view_regions[view.id()]
+        self.assertIn("bh_round", keys)
+        self.assertEqual(len(view.get_regions("bh_round")), 2)
+        self.assertIsNone(view.settings().get("bh_regions"))
+
+        self.match(view, [11])
+        self.assertEqual(view.get_regions("bh_round"), [])
+        self.assertEqual(len(view.get_regions("bh_square")), 2)
+
+    def test_busy(self):
+        """Test that a view is only flagged as busy while it is matched."""
+
+        core = self.bh_core.bh_match.__self__
+        view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+        busy = []
+        init_match = core.init_match
+
+        def check(num_sels):
+            """Check the busy flag while matching."""
+
+            busy.append(self.bh_regions.is_busy(view))
+            init_match(num_sels)
+
+        core.init_match = check
+        try:
+            self.match(view)
+        finally:
+            del core.init_match
+        self.assertEqual(busy, [True])
+        self.assertFalse(self.bh_regions.is_busy(view))
+        self.assertIsNone(view.settings().get("BracketHighlighterBusy"))
+
+    def test_close(self):
+        """Test that a closed view is forgotten."""
+
+        view = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+        self.match(view)
+        self.bh_regions.set_busy(view, True)
+        for listener in self.headless.sublime.event_listeners():
+            if hasattr(listener, "on_close"):
+                listener.on_close(view)
+        self.assertNotIn(view.id(), self.bh_regions.view_regions)
+        self.assertFalse(self.bh_regions.is_busy(view))
+
+    def test_disable(self):
+        """Test that disabling the plugin clears the applied regions of every view."""
+
+        first = self.headless.new_view("x = f(a)\n", PYTHON, [6])
+        self.match(first)
+        second = self.headless.new_view("y = [b]\n", PYTHON, [5])
+        self.match(second)
+        self.headless.sublime.run_command("bh_toggle_enable")
+        try:
+            for view in (first, second):
+                self.assertNotIn(view.id(), self.bh_regions.view_regions)
+                self.assertFalse([key for key in view.regions if key.startswith("bh_")])
+        finally:
+            self.headless.sublime.run_command("bh_toggle_enable")
@@ -0,0 +1,148 @@
+"""Test the bracket scanners."""
+import re
+import unittest
+
+
+def compile_pattern(find_regex):
+    """Compile rule patterns the way the rules do, with `re`."""
+
+    return re.compile("(?:%s)" % '|'.join(find_regex), re.MULTILINE | re.IGNORECASE)
+
+
+class TestScanner(unittest.TestCase):
+    """Test that the literal scanner finds what the combined pattern finds."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Import the scanners."""
+
+        import headless
+        headless.install()
+        from BracketHighlighter import bh_scanner
+        cls.bh_scanner = bh_scanner
+
+    def compare(self, find_regex, text):
+        """Scan the text with both scanners and check they agree; return the literal scanner."""
+
+        pattern = compile_pattern(find_regex)
+        reference = self.bh_scanner.RegexScanner(pattern)
+        scanner = self.bh_scanner.scanner(find_regex, pattern, compile_pattern, literal_scan=True)
+        for start, end in ((0, len(text)), (1, len(text) - 1)):
+            self.assertEqual(list(scanner.scan(text, start, end)), list(reference.scan(text, start, end)))
+        return scanner
+
+    def test_literal(self):
+        """Test which rule patterns are single characters."""
+
+        literal = self.bh_scanner.literal
+        self.assertEqual(literal(r"(\{)"), "{")
+        self.assertEqual(literal(r"(')"), "'")
+        self.assertIsNone(literal(r"(a)"))
+        self.assertIsNone(literal(r"(\d)"))
+        self.assertIsNone(literal(r"(.)"))
+        self.assertIsNone(literal(r"(<)(?=[^?%]|$)"))
+
+    def test_literals_only(self):
+        """Test rules that are all single characters."""
+
+        scanner = self.compare([r"(\{)", r"(\})", r"(\()", r"(\))"], "a{(b)}c)(")
+        self.assertIsNone(scanner.rest)
+
+    def test_consumed(self):
+        """Test that characters inside a regex match are skipped."""
+
+        self.compare(
+            [r"(\()", r"(\))", r"(/\* *@group .*\*/)", r"(/\* *@end *\*/)"],
+            "(/* @group (a) */ (b) /* @end */)"
+        )
+
+    def test_order(self):
+        """Test that the first rule wins when rules match at the same point."""
+
+        self.compare([r"(<\?)(?:php)?", r"(\?>)", r"(<)", r"(>)"], "<?php a ?> <b> <?")
+        self.compare([r"(<)", r"(>)", r"(<\?)(?:php)?", r"(\?>)"], "<?php a ?> <b> <?")
+
+    def test_empty(self):
+        """Test that empty regex matches are left to the combined pattern."""
+
+        self.compare([r"(\()", r"(\))", r"(x*)", r"(y)"], "(xx)y()")
+
+    def test_keywords(self):
+        """Test that keyword rules are only tried where their words are, and find the same brackets."""
+
+        find_regex = [
+            r"\s*(\b(?:if|case|begin|try|fun(?=\s*\()|receive)\b)", r"\b(end)\b",
+            r"(?:(?<!\\\n)(?:;|^|&|\|)\s*)\b(if|case|while)\s", r"(?:(?:;|^)\s*)\b(fi|esac|done)\b",
+            r"(\()", r"(\))"
+        ]
+        text = "case X of\n  If -> fun (A) end;\nappend fi ; done\n  ca\u017fe\tEND\n\u212aend if x\n"
+        pattern = compile_pattern(find_regex)
+        reference = self.bh_scanner.RegexScanner(pattern)
+        for literal_scan in (False, True):
+            scanner = self.bh_scanner.scanner(
+                find_regex, pattern, compile_pattern, literal_scan=literal_scan, keyword_scan=True
+            )
+            search = scanner.rest if literal_scan else scanner.pattern
+            self.assertIsInstance(search, self.bh_scanner.KeywordPattern)
+            for start, end in ((0, len(text)), (3, len(text) - 4)):
+                self.assertEqual(list(scanner.scan(text, start, end)), list(reference.scan(text, start, end)))
+
+    def test_not_keywords(self):
+        """Test that patterns whose matches can start anywhere are not keyword patterns."""
+
+        keywords = self.bh_scanner.keywords
+        self.assertIsNone(keywords(compile_pattern([r"(.)", r"(end)"])))
+        self.assertIsNone(keywords(compile_pattern([r"(\w+)", r"(end)"])))
+        self.assertIsNone(keywords(compile_pattern([r"(x*)", r"(end)"])))
+        self.assertIsNotNone(keywords(compile_pattern([r"(?<=[\s;])(end|until)\b", r"([^\s\S])"])))
+
+    def test_vectorized(self):
+        """Test that NumPy finds the same literal characters."""
+
+        if not self.bh_scanner.NUMPY_AVAILABLE:
+            self.skipTest("numpy is not installed")
+        find_regex = [r"(\{)", r"(\})", r"(\()", r"(\))"]
+        pattern = compile_pattern(find_regex)
+        scanner = self.bh_scanner.scanner(find_regex, pattern, compile_pattern, literal_scan=True, vector_threshold=1)
+        reference = self.bh_scanner.RegexScanner(pattern)
+        text = "a{(b)}éc)(\U0001f600{"
+        self.assertTrue(scanner.vectorize(0, len(text)))
+        self.assertEqual(list(scanner.scan(text, 1, len(text))), list(reference.scan(text, 1, len(text))))
+
+    def test_without_numpy(self):
+        """Test that the literal scanner doesn't vectorize when NumPy can't be imported."""
+
+        find_regex = [r"(\{)", r"(\})", r"(\()", r"(\))"]
+        pattern = compile_pattern(find_regex)
+        reference = self.bh_scanner.RegexScanner(pattern)
+        text = "a{(b)}c)({"
+        available = self.bh_scanner.NUMPY_AVAILABLE
+        self.bh_scanner.NUMPY_AVAILABLE = False
+        try:
+            scanner = self.bh_scanner.scanner(
+                find_regex, pattern, compile_pattern, literal_scan=True, vector_threshold=1
+            )
+        finally:
+            self.bh_scanner.NUMPY_AVAILABLE = available
+        self.assertFalse(scanner.vectorize(0, len(text)))
+        self.assertEqual(list(scanner.scan(text, 0, len(text))), list(reference.scan(text, 0, len(text))))
+
+    def test_first_unmatched(self):
+        """Test finding the bracket that settles a walk from the cursor."""
+
+        if not self.bh_scanner.NUMPY_AVAILABLE:
+            self.skipTest("numpy is not installed")
+        import numpy
+
+        def first(walk):
+            """Walk the `(push, type)` pairs."""
+
+            return self.bh_scanner.first_unmatched(
+                numpy.array([p for p, t in walk], dtype=bool), numpy.array([t for p, t in walk])
+            )
+
+        self.assertEqual(first([(True, 0), (False, 0), (False, 1)]), 2)
+        self.assertEqual(first([(True, 0), (True, 1), (False, 1), (False, 0), (False, 0)]), 4)
+        self.assertEqual(first([(True, 0), (False, 1), (False, 0)]), -1)
+        self.assertEqual(first([(True, 0), (False, 0)]), -1)
+        self.assertEqual(first([]), -1)
@@ -0,0 +1,190 @@
+"""Test matching HTML tags with the tag tree."""
+import re
+import unittest
+from tests import requires_backrefs
+
+HTML = "Packages/HTML/HTML.tmLanguage"
+
+
+@requires_backrefs
+class TestTags(unittest.TestCase):
+    """Test the tags that are matched and the caching of the tag trees."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Load the plugin and the tag module."""
+
+        import headless
+        headless.load_plugin()
+        from BracketHighlighter.bh_plugin import import_module
+        from BracketHighlighter import bh_tag_cache
+        cls.headless = headless
+        cls.bh_tag_cache = bh_tag_cache
+        cls.tags = import_module("bh_modules.tags")
+
+    def match(self, text, begin, threshold=None):
+        """Match the tag that begins at the point and return the spans of the left and right tag."""
+
+        view = self.headless.new_view(text, HTML)
+        end = text.index(">", begin) + 1
+        left, right = self.tags.TagMatch(view, text, threshold, (begin, end), None, begin + 1, False, "html").match()
+        return (left.begin, left.end) if left else None, (right.begin, right.end) if right else None
+
+    def test_optional_close(self):
+        """Test that optional close tags are closed by the next tag of the same name or their parent."""
+
+        text = "<ul><li>a<li>b</ul>"
+        self.assertEqual(self.match(text, 0), ((0, 4), (14, 19)))
+        self.assertEqual(self.match(text, 14), ((0, 4), (14, 19)))
+        self.assertEqual(self.match(text, 4), ((4, 8), (4, 8)))
+        self.assertEqual(self.match(text, 9), ((9, 13), (9, 13)))
+
+        text = "<table><tr><td>1<td>2<tr><td>3</table>"
+        self.assertEqual(self.match(text, 30), ((0, 7), (30, 38)))
+        self.assertEqual(self.match(text, 21), ((21, 25), (21, 25)))
+
+    def test_nested_optional_close(self):
+        """Test that an optional close tag inside a nested list doesn't close the outer one."""
+
+        text = "<li>a<ul><li>b</ul><li>c"
+        self.assertEqual(self.match(text, 5), ((5, 9), (14, 19)))
+        self.assertEqual(self.match(text, 14), ((5, 9), (14, 19)))
+        self.assertEqual(self.match(text, 0), ((0, 4), (0, 4)))
+
+    def test_void_tags(self):
+        """Test that void and self closing tags match themselves and don't affect their parent."""
+
+        text = "<p>a<br>b</p>"
+        self.assertEqual(self.match(text, 4), ((4, 8), (4, 8)))
+        self.assertEqual(self.match(text, 9), ((0, 3), (9, 13)))
+
+        text = "<div>a<img/>b</div>"
+        self.assertEqual(self.match(text, 6), ((6, 12), (6, 12)))
+        self.assertEqual(self.match(text, 0), ((0, 5), (13, 19)))
+
+    def test_malformed_nesting(self):
+        """Test that a closing tag closes the tags opened inside of it, which are then left unmatched."""
+
+        text = "<b><i>x</b></i>"
+        self.assertEqual(self.match(text, 0), ((0, 3), (7, 11)))
+        self.assertEqual(self.match(text, 7), ((0, 3), (7, 11)))
+        self.assertEqual(self.match(text, 3), ((3, 6), None))
+        self.assertEqual(self.match(text, 11), (None, (11, 15)))
+
+    def test_stray_close(self):
+        """Test that a closing tag with no opening tag is unmatched."""
+
+        text = "<p>a</p></p><p>"
+        self.assertEqual(self.match(text, 4), ((0, 3), (4, 8)))
+        self.assertEqual(self.match(text, 8), (None, (8, 12)))
+
+    def test_excluded_scope(self):
+        """Test that tags in comments are skipped."""
+
+        text = "<!-- <b> --><b>x</b>"
+        self.assertEqual(self.match(text, 16), ((12, 15), (16, 20)))
+
+    def test_threshold(self):
+        """Test that a tag outside of the threshold is not matched, even from a tree of the whole view."""
+
+        text = "<div>%s</div>" % ("x" * 100)
+        view = self.headless.new_view(text, HTML)
+        self.tags.get_view_tag_tree(view, "html")
+        tag = self.tags.TagMatch(view, text, (0, 50), (0, 5), None, 1, False, "html")
+        self.assertEqual(tag.match()[1], None)
+
+    def test_lazy_scope_check(self):
+        """Test that only the scopes of the tags read up to the match are checked."""
+
+        text = "<b>x</b>" + "<i>y</i>" * 100
+        view = self.headless.new_view(text, HTML)
+        calls = []
+        score_selector = view.score_selector
+
+        def count(pt, selector):
+            """Count the scope checks."""
+
+            calls.append(pt)
+            return score_selector(pt, selector)
+
+        view.score_selector = count
+        tree = self.tags.get_tag_tree(view, text, (0, len(text)), "html")
+        self.assertEqual(tree.opening(0).close.begin, 4)
+        self.assertLess(len(set(calls)), 4)
+
+    def test_cache_lru(self):
+        """Test that the tree of the whole view serves windows with the same start and is kept while it is used."""
+
+        text = "".join("<p>%d</p>\n" % i for i in range(50))
+        view = self.headless.new_view(text, HTML)
+        tree = self.tags.get_view_tag_tree(view, "html")
+        for i in range(1, self.bh_tag_cache.TAG_TREE_CACHE_SIZE + 2):
+            self.tags.get_tag_tree(view, text, (i * 10, i * 10 + 50), "html")
+            self.assertIs(self.tags.get_tag_tree(view, text, (0, i * 10), "html"), tree)
+        self.assertIs(self.tags.find_cached_tag_tree(view, (0, len(text)), "html"), tree)
+
+        import sublime
+        view.insert(sublime.Edit(), 0, "<b>")
+        self.assertIsNone(self.tags.find_cached_tag_tree(view, (0, view.size()), "html"))
+
+    def test_cache_eviction(self):
+        """Test that the least recently used tree is dropped first."""
+
+        text = "".join("<p>%d</p>\n" % i for i in range(50))
+        view = self.headless.new_view(text, HTML)
+        size = self.bh_tag_cache.TAG_TREE_CACHE_SIZE
+        first = self.tags.get_tag_tree(view, text, (0, 10), "html")
+        for i in range(1, size):
+            self.tags.get_tag_tree(view, text, (i * 10, i * 10 + 10), "html")
+            self.assertIs(self.tags.get_tag_tree(view, text, (0, 10), "html"), first)
+        self.tags.get_tag_tree(view, text, (size * 10, size * 10 + 10), "html")
+        self.assertIs(self.tags.find_cached_tag_tree(view, (0, 10), "html"), first)
+        self.assertIsNone(self.tags.find_cached_tag_tree(view, (10, 20), "html"))
+
+    def test_cache_window_start(self):
+        """Test that a cached tree starting before the threshold doesn't change the match."""
+
+        text = "<b>xx<i>y</b>z</i>"
+        self.assertEqual(self.match(text, 5, (3, 18)), ((5, 8), (14, 18)))
+
+        view = self.headless.new_view(text, HTML)
+        self.tags.get_view_tag_tree(view, "html")
+        left, right = self.tags.TagMatch(view, text, (3, 18), (5, 8), None, 6, False, "html").match()
+        self.assertEqual(((left.begin, left.end), (right.begin, right.end)), ((5, 8), (14, 18)))
+
+    def test_path(self):
+        """Test the ancestor path and siblings of a point."""
+
+        text = "<html><body><ul><li>a<li>b</ul></body></html>"
+        view = self.headless.new_view(text, HTML)
+        tree = self.tags.get_view_tag_tree(view, "html")
+        self.assertEqual(tree.path(text.index("b<")), ["html", "body", "ul", "li"])
+        node = tree.ancestors(text.index("a<"))[-1]
+        self.assertEqual([n.begin for n in tree.siblings(node)], [m.start() for m in re.finditer("<li>", text)])
+        self.assertIs(tree.previous_sibling(tree.next_sibling(node)), node)
+
+    def test_shared_cache(self):
+        """Test that the matcher reuses the tree the tag path built, though each loads the tag module anew."""
+
+        from BracketHighlighter import bh_tag_path
+        text = "<div>\n%s</div>\n" % ("<p>x</p>\n" * 2000)
+        view = self.headless.new_view(text, HTML, [7])
+        tree = bh_tag_path.tags.get_view_tag_tree(view, "html")
+        self.headless.bh_core.bh_match(view)
+        self.assertTrue(view.get_regions("bh_tag"))
+        self.assertIsNot(bh_tag_path.tags, self.tags)
+        trees = self.bh_tag_cache.tag_tree_cache[view.id()][1]
+        self.assertEqual(list(trees.values()), [tree])
+
+    def test_forget_on_close(self):
+        """Test that the trees of a view are dropped when it is closed."""
+
+        import sublime
+        text = "<ul><li>a<li>b</ul>"
+        view = self.headless.new_view(text, HTML, [1])
+        self.headless.bh_core.bh_match(view)
+        self.assertIn(view.id(), self.bh_tag_cache.tag_tree_cache)
+        for listener in sublime.event_listeners():
+            if hasattr(listener, "on_close"):
+                listener.on_close(view)
+        self.assertNotIn(view.id(), self.bh_tag_cache.tag_tree_cache)
@@ -0,0 +1,56 @@
+"""Test recording traces."""
+import unittest
+from tests import requires_backrefs
+
+PYTHON = "Packages/Python/Python.tmLanguage"
+
+
+@requires_backrefs
+class TestTrace(unittest.TestCase):
+    """Test the events a trace records."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Import the trace recorder."""
+
+        import headless
+        headless.install()
+        from BracketHighlighter import bh_trace
+        cls.headless = headless
+        cls.bh_trace = bh_trace
+
+    def kinds(self, recorder):
+        """Get the kinds of the recorded events."""
+
+        return [event[0] for event in recorder.events]
+
+    def test_snapshot_on_change(self):
+        """Test that switching to a view only records its buffer again if it changed."""
+
+        import sublime
+        recorder = self.bh_trace.TraceRecorder(100, 1000)
+        first = self.headless.new_view("x = (a)\n", PYTHON)
+        second = self.headless.new_view("y = [b]\n", PYTHON)
+        for view in (first, second, first, second):
+            recorder.event("on_activated", view)
+        self.assertEqual(
+            self.kinds(recorder),
+            ["snapshot", "on_activated", "snapshot", "on_activated", "on_activated", "on_activated"]
+        )
+
+        first.insert(sublime.Edit(), 0, "z")
+        recorder.event("on_activated", first)
+        self.assertEqual(self.kinds(recorder)[-2:], ["snapshot", "on_activated"])
+        self.assertEqual(recorder.events[-2][-1][1], "zx = (a)\n")
+
+    def test_snapshot_left_ring(self):
+        """Test that a view's buffer is recorded again once its last snapshot left the ring buffer."""
+
+        recorder = self.bh_trace.TraceRecorder(4, 1000)
+        view = self.headless.new_view("x = (a)\n", PYTHON)
+        recorder.event("on_activated", view)
+        recorder.event("on_selection_modified", view)
+        recorder.event("on_selection_modified", view)
+        self.assertEqual(self.kinds(recorder).count("snapshot"), 1)
+        recorder.event("on_selection_modified", view)
+        self.assertEqual(self.kinds(recorder)[-2:], ["snapshot", "on_selection_modified"])